@@ -1,18 +1,59 @@
-import { MongoClient } from 'mongodb'
 import { v4 as uuidv4 } from 'uuid'
 import { NextResponse } from 'next/server'
-
-// MongoDB connection
-let client
-let db
-
-async function connectToMongo() {
-  if (!client) {
-    client = new MongoClient(process.env.MONGO_URL)
-    await client.connect()
-    db = client.db(process.env.DB_NAME)
+import { ApiError } from '@/lib/errors'
+import { findPage, parseListOptions, parseFields } from '@/lib/pagination'
+import { storeImage, imageResponse, migrateInlinePhotos } from '@/lib/images'
+import {
+  resolveRange, revenueFilter, summarize,
+  applyRevenueChange, applyRevenueChanges, rollupHarian, rebuildRollup, verifyRollup
+} from '@/lib/laporan'
+import { TtlCache, cacheStats } from '@/lib/cache'
+import { connectToMongo, poolStats } from '@/lib/mongo'
+import { BOOKABLE_STATUS, tanggalSelesai, hasOverlap, reactivates, reactivationCheck, parseWindow, findAvailable } from '@/lib/availability'
+import { RequestTiming, withTiming, timedDb, json } from '@/lib/timing'
+import { observeRequest, renderPrometheus } from '@/lib/metrics'
+import { Router } from '@/lib/router'
+import { createBooking } from '@/lib/reservations'
+import { createSession, endSession, sessionIdFrom, requireAdmin } from '@/lib/sessions'
+import { bumpVersion, collectionEtag, isNotModified, notModified, withEtag } from '@/lib/etag'
+import {
+  BOOKING_STATUSES, KENDARAAN_STATUSES, STATUS_COUNT_PIPELINE,
+  validateKendaraan, validateBooking, buildKendaraan
+} from '@/lib/records'
+import { readRows, importKendaraan, importBooking, bulkUpdateStatus } from '@/lib/bulk'
+import { parseSearch, searchKendaraan } from '@/lib/search'
+import { parseFormat, exportFilter, exportStream, exportResponse } from '@/lib/export'
+import { parseResponseFormat, formatBody } from '@/lib/columnar'
+import { compressResponse } from '@/lib/compression'
+import { ensureFeed, parseTopics, liveStream, kendaraanChanged, bookingChanged } from '@/lib/events'
+import {
+  TARIFF_FIELDS, PRICE_FIELDS, tariffCache, tariffFor,
+  validateTariff, validatePricing, priceBooking, quote
+} from '@/lib/pricing'
+import { ARCHIVE_COLLECTION, includeArchive, bookingSources, archiveBookings } from '@/lib/archive'
+import { explainQueries } from '@/lib/plans'
+
+// Dashboard statistics are polled often; writes to kendaraan/booking clear it
+const statisticsCache = new TtlCache('statistics', {
+  ttl: parseInt(process.env.STATISTICS_CACHE_TTL_MS || '5000')
+})
+
+async function loadStatistics(db) {
+  const [statusCounts, totalBooking, bookingArsip] = await Promise.all([
+    db.collection('kendaraan').aggregate(STATUS_COUNT_PIPELINE).toArray(),
+    db.collection('booking').estimatedDocumentCount(),
+    db.collection(ARCHIVE_COLLECTION).estimatedDocumentCount()
+  ])
+
+  const perStatus = Object.fromEntries(statusCounts.map(({ _id, count }) => [_id, count]))
+
+  return {
+    total_kendaraan: statusCounts.reduce((sum, { count }) => sum + count, 0),
+    total_booking: totalBooking,
+    booking_arsip: bookingArsip,
+    kendaraan_tersedia: perStatus['Tersedia'] || 0,
+    kendaraan_disewa: perStatus['Disewa'] || 0
   }
-  return db
 }
 
 // Helper function to handle CORS
@@ -29,381 +70,648 @@ export async function OPTIONS() {
   return handleCORS(new NextResponse(null, { status: 200 }))
 }
 
-// Route handler function
-async function handleRoute(request, { params }) {
-  const { path = [] } = params
-  const route = `/${path.join('/')}`
-  const method = request.method
-
-  try {
-    const db = await connectToMongo()
-
-    // Root endpoint - GET /api/
-    if (route === '/' && method === 'GET') {
-      return handleCORS(NextResponse.json({ message: "Rino Rental Sorong API" }))
-    }
+// Handlers receive { request, params, db, session }. The table is compiled once at
+// module load; see lib/router.js.
+const router = new Router()
+
+// Root endpoint - GET /api/
+router.get('/', async () => {
+  return json({ message: "Rino Rental Sorong API" })
+}, { db: false })
+
+// KENDARAAN ENDPOINTS
+
+// GET /api/kendaraan - Ambil semua kendaraan
+// ?limit=&cursor= untuk keyset pagination, ?fields= untuk projection
+// ?format=columnar untuk { kolom, baris }
+router.get('/kendaraan', async ({ request, db }) => {
+  const etag = await collectionEtag(db, 'kendaraan', request)
+  if (isNotModified(request, etag)) return notModified(etag)
+
+  const { searchParams } = new URL(request.url)
+  const options = parseListOptions(searchParams)
+  const format = parseResponseFormat(searchParams)
+
+  // Projection already drops MongoDB _id field
+  const kendaraan = await findPage(db.collection('kendaraan'), {}, options)
+  return json(formatBody(format, kendaraan), { headers: withEtag({}, etag) })
+})
+
+// GET /api/kendaraan/cari?q=&kategori=&transmisi=&bahan_bakar=&kapasitas=
+//   &status=&harga_min=&harga_max=&sort=&limit=&offset= - Pencarian katalog
+// ?cocok=awalan mencocokkan q sebagai awalan kata (untuk pencarian saat mengetik)
+// Mengembalikan { data, total, next_offset, facets, harga }
+router.get('/kendaraan/cari', async ({ request, db }) => {
+  const etag = await collectionEtag(db, 'kendaraan', request)
+  if (isNotModified(request, etag)) return notModified(etag)
+
+  const { searchParams } = new URL(request.url)
+  const format = parseResponseFormat(searchParams)
+  const hasil = await searchKendaraan(db, parseSearch(searchParams))
+  return json(formatBody(format, hasil), { headers: withEtag({}, etag) })
+})
+
+// POST /api/kendaraan - Tambah kendaraan baru
+router.post('/kendaraan', async ({ request, db }) => {
+  const body = await request.json()
+  
+  const error = validateKendaraan(body)
+  if (error) {
+    return json({ error }, { status: 400 })
+  }
 
-    // KENDARAAN ENDPOINTS
-    
-    // GET /api/kendaraan - Ambil semua kendaraan
-    if (route === '/kendaraan' && method === 'GET') {
-      const kendaraan = await db.collection('kendaraan')
-        .find({})
-        .sort({ created_at: -1 })
-        .toArray()
+  const kendaraan = buildKendaraan(body, await storeImage(db, body.foto))
+
+  await db.collection('kendaraan').insertOne(kendaraan)
+  statisticsCache.clear()
+  await bumpVersion(db, 'kendaraan')
+  kendaraanChanged('tambah', kendaraan)
+  
+  // Remove MongoDB _id field
+  const { _id, ...cleanKendaraan } = kendaraan
+  return json(cleanKendaraan, { status: 201 })
+})
+
+// POST /api/kendaraan/bulk - Import banyak kendaraan (JSON array / NDJSON)
+router.post('/kendaraan/bulk', async ({ request, db }) => {
+  const { inserted, ...result } = await importKendaraan(db, await readRows(request))
+  statisticsCache.clear()
+  await bumpVersion(db, 'kendaraan')
+  kendaraanChanged('tambah', inserted)
+  return json(result)
+})
+
+// POST /api/kendaraan/bulk-status - Update status banyak kendaraan [{ id, status }]
+router.post('/kendaraan/bulk-status', async ({ request, db }) => {
+  const { changes, ...result } = await bulkUpdateStatus(db, 'kendaraan', await readRows(request), KENDARAAN_STATUSES)
+  statisticsCache.clear()
+  await bumpVersion(db, 'kendaraan')
+  kendaraanChanged('ubah', changes.map(([, after]) => after))
+  return json(result)
+})
+
+// GET /api/ketersediaan?from=YYYY-MM-DD&to=YYYY-MM-DD - Kendaraan Tersedia yang bebas
+router.get('/ketersediaan', async ({ request, db }) => {
+  const { searchParams } = new URL(request.url)
+  const range = parseWindow(searchParams)
+
+  const kendaraan = await findAvailable(db, range, parseFields(searchParams.get('fields')))
+  return json(kendaraan)
+})
+
+// GET /api/kendaraan/{id} - Ambil kendaraan berdasarkan ID
+router.get('/kendaraan/{id}', async ({ request, params, db }) => {
+  const etag = await collectionEtag(db, 'kendaraan', request)
+  if (isNotModified(request, etag)) return notModified(etag)
+
+  const { id } = params
+  const kendaraan = await db.collection('kendaraan').findOne({ id })
+  
+  if (!kendaraan) {
+    return json(
+      { error: 'Kendaraan tidak ditemukan' },
+      { status: 404 }
+    )
+  }
 
-      // Remove MongoDB _id field
-      const cleanKendaraan = kendaraan.map(({ _id, ...rest }) => rest)
-      return handleCORS(NextResponse.json(cleanKendaraan))
-    }
+  const { _id, ...cleanKendaraan } = kendaraan
+  return json(cleanKendaraan, { headers: withEtag({}, etag) })
+})
 
-    // POST /api/kendaraan - Tambah kendaraan baru
-    if (route === '/kendaraan' && method === 'POST') {
-      const body = await request.json()
-      
-      const requiredFields = ['nama', 'merek', 'plat_nomor', 'kategori', 'harga_harian', 'harga_bulanan', 'kapasitas', 'transmisi', 'bahan_bakar']
-      const missingFields = requiredFields.filter(field => !body[field])
-      
-      if (missingFields.length > 0) {
-        return handleCORS(NextResponse.json(
-          { error: `Field wajib tidak diisi: ${missingFields.join(', ')}` },
-          { status: 400 }
-        ))
-      }
+// PUT /api/kendaraan/{id} - Update kendaraan
+router.put('/kendaraan/{id}', async ({ request, params, db }) => {
+  const { id } = params
+  const body = await request.json()
 
-      const kendaraan = {
-        id: uuidv4(),
-        nama: body.nama,
-        merek: body.merek,
-        plat_nomor: body.plat_nomor,
-        kategori: body.kategori,
-        harga_harian: parseInt(body.harga_harian),
-        harga_bulanan: parseInt(body.harga_bulanan),
-        kapasitas: parseInt(body.kapasitas),
-        transmisi: body.transmisi,
-        bahan_bakar: body.bahan_bakar,
-        status: body.status || 'Tersedia',
-        deskripsi: body.deskripsi || '',
-        foto: body.foto || '',
-        created_at: new Date(),
-        updated_at: new Date()
-      }
+  const updateData = { ...body, updated_at: new Date() }
+  delete updateData.id // Prevent ID changes
+  delete updateData._id // Prevent MongoDB ID changes
 
-      await db.collection('kendaraan').insertOne(kendaraan)
-      
-      // Remove MongoDB _id field
-      const { _id, ...cleanKendaraan } = kendaraan
-      return handleCORS(NextResponse.json(cleanKendaraan, { status: 201 }))
-    }
+  const tariffError = validateTariff(updateData)
+  if (tariffError) {
+    return json({ error: tariffError }, { status: 400 })
+  }
+  for (const field of TARIFF_FIELDS) {
+    if (field in updateData) updateData[field] = parseInt(updateData[field])
+  }
 
-    // GET /api/kendaraan/{id} - Ambil kendaraan berdasarkan ID
-    if (route.startsWith('/kendaraan/') && method === 'GET') {
-      const id = path[1]
-      const kendaraan = await db.collection('kendaraan').findOne({ id })
-      
-      if (!kendaraan) {
-        return handleCORS(NextResponse.json(
-          { error: 'Kendaraan tidak ditemukan' },
-          { status: 404 }
-        ))
-      }
+  if ('foto' in body) {
+    Object.assign(updateData, await storeImage(db, body.foto))
+  }
 
-      const { _id, ...cleanKendaraan } = kendaraan
-      return handleCORS(NextResponse.json(cleanKendaraan))
-    }
+  const updatedKendaraan = await db.collection('kendaraan').findOneAndUpdate(
+    { id },
+    { $set: updateData },
+    { returnDocument: 'after', projection: { _id: 0 } }
+  )
 
-    // PUT /api/kendaraan/{id} - Update kendaraan
-    if (route.startsWith('/kendaraan/') && method === 'PUT') {
-      const id = path[1]
-      const body = await request.json()
+  if (!updatedKendaraan) {
+    return json(
+      { error: 'Kendaraan tidak ditemukan' },
+      { status: 404 }
+    )
+  }
 
-      const updateData = { ...body, updated_at: new Date() }
-      delete updateData.id // Prevent ID changes
-      delete updateData._id // Prevent MongoDB ID changes
+  // Invalidate only once something changed, so requests for unknown ids
+  // cannot flush caches and ETags
+  statisticsCache.clear()
+  await bumpVersion(db, 'kendaraan')
+  // New prices apply to the next quote or booking on this instance
+  if (TARIFF_FIELDS.some(field => field in updateData)) tariffCache.delete(id)
+
+  if ('status' in updateData) kendaraanChanged('ubah', updatedKendaraan)
+  return json(updatedKendaraan)
+})
+
+// DELETE /api/kendaraan/{id} - Hapus kendaraan
+router.delete('/kendaraan/{id}', async ({ params, db }) => {
+  const { id } = params
+  
+  const result = await db.collection('kendaraan').deleteOne({ id })
+  
+  if (result.deletedCount === 0) {
+    return json(
+      { error: 'Kendaraan tidak ditemukan' },
+      { status: 404 }
+    )
+  }
 
-      const result = await db.collection('kendaraan').updateOne(
-        { id },
-        { $set: updateData }
-      )
+  statisticsCache.clear()
+  await bumpVersion(db, 'kendaraan')
+  tariffCache.delete(id)
+
+  kendaraanChanged('hapus', { id })
+  return json({ message: 'Kendaraan berhasil dihapus' })
+})
+
+// BOOKING ENDPOINTS
+
+// GET /api/booking - Ambil semua booking
+// ?limit=&cursor= untuk keyset pagination, ?fields= untuk projection
+// ?format=columnar untuk { kolom, baris }
+router.get('/booking', async ({ request, db }) => {
+  const { searchParams } = new URL(request.url)
+  const options = parseListOptions(searchParams)
+  const format = parseResponseFormat(searchParams)
+
+  const bookings = await findPage(db.collection('booking'), {}, options)
+  return json(formatBody(format, bookings))
+})
+
+// POST /api/booking - Buat booking baru
+router.post('/booking', async ({ request, db }) => {
+  const body = await request.json()
+  
+  const error = validateBooking(body)
+  if (error) {
+    return json({ error }, { status: 400 })
+  }
 
-      if (result.matchedCount === 0) {
-        return handleCORS(NextResponse.json(
-          { error: 'Kendaraan tidak ditemukan' },
-          { status: 404 }
-        ))
-      }
+  // confirm_booking claims the kendaraan (Disewa) atomically with the insert
+  const { booking, claimed } = await createBooking(db, body)
+  if (claimed) {
+    await bumpVersion(db, 'kendaraan')
+    kendaraanChanged('ubah', { id: booking.kendaraan_id, status: 'Disewa' })
+  }
+  bookingChanged('tambah', booking)
+  statisticsCache.clear()
+
+  return json(booking, { status: 201 })
+})
+
+// POST /api/harga - Hitung harga banyak kombinasi sekaligus
+// Body: [{ kendaraan_id, durasi, tipe_sewa, dengan_sopir }]
+router.post('/harga', async ({ request, db }) => {
+  const items = await request.json().catch(() => null)
+  const hasil = await quote(db, items)
+  const gagal = hasil.filter(item => item.status === 'error').length
+  return json({ total: hasil.length, berhasil: hasil.length - gagal, gagal, hasil })
+})
+
+// GET /api/booking/export?format=ndjson|csv&status=&from=&to= - Ekspor streaming
+// ?arsip=true untuk menyertakan booking yang sudah diarsipkan
+router.get('/booking/export', async ({ request, db }) => {
+  const { searchParams } = new URL(request.url)
+  const format = parseFormat(searchParams)
+  const sources = bookingSources(db, includeArchive(searchParams))
+
+  const stream = exportStream(sources, exportFilter(searchParams), { format })
+  return exportResponse(stream, format, 'booking')
+})
+
+// POST /api/booking/arsip?umur_hari= - Pindahkan booking Selesai yang sudah
+// lewat umur_hari (default ARCHIVE_AFTER_DAYS) ke booking_archive (admin)
+router.post('/booking/arsip', async ({ request, db }) => {
+  const { searchParams } = new URL(request.url)
+  const umurHari = searchParams.get('umur_hari')
+
+  const result = await archiveBookings(db, umurHari === null ? {} : { olderThanDays: Number(umurHari) })
+  if (result.dipindahkan > 0) statisticsCache.clear()
+  return json({ message: `${result.dipindahkan} booking diarsipkan`, ...result })
+}, { admin: true })
+
+// POST /api/booking/bulk - Import banyak booking (JSON array / NDJSON)
+router.post('/booking/bulk', async ({ request, db }) => {
+  const { inserted, ...result } = await importBooking(db, await readRows(request))
+  statisticsCache.clear()
+  bookingChanged('tambah', inserted)
+  return json(result)
+})
+
+// POST /api/booking/bulk-status - Update status banyak booking [{ id, status }]
+router.post('/booking/bulk-status', async ({ request, db }) => {
+  // Dibatalkan bookings that become active again must still fit the calendar
+  const { changes, ...result } = await bulkUpdateStatus(db, 'booking', await readRows(request), BOOKING_STATUSES, {
+    checkChange: reactivationCheck(db)
+  })
+  await applyRevenueChanges(db, changes)
+  statisticsCache.clear()
+  bookingChanged('ubah', changes.map(([, after]) => after))
+  return json(result)
+})
+
+// PUT /api/booking/{id} - Update booking (mis. status Dikonfirmasi/Selesai)
+router.put('/booking/{id}', async ({ request, params, db }) => {
+  const { id } = params
+  const body = await request.json()
+
+  if (body.status && !BOOKING_STATUSES.includes(body.status)) {
+    return json(
+      { error: `Status tidak valid, gunakan: ${BOOKING_STATUSES.join(', ')}` },
+      { status: 400 }
+    )
+  }
 
-      const updatedKendaraan = await db.collection('kendaraan').findOne({ id })
-      const { _id, ...cleanKendaraan } = updatedKendaraan
-      
-      return handleCORS(NextResponse.json(cleanKendaraan))
-    }
+  const updateData = { ...body, updated_at: new Date() }
+  delete updateData.id // Prevent ID changes
+  delete updateData._id // Prevent MongoDB ID changes
+  delete updateData.created_at // Rollup day is keyed on created_at
 
-    // DELETE /api/kendaraan/{id} - Hapus kendaraan
-    if (route.startsWith('/kendaraan/') && method === 'DELETE') {
-      const id = path[1]
-      
-      const result = await db.collection('kendaraan').deleteOne({ id })
-      
-      if (result.deletedCount === 0) {
-        return handleCORS(NextResponse.json(
-          { error: 'Kendaraan tidak ditemukan' },
-          { status: 404 }
-        ))
-      }
+  delete updateData.tanggal_selesai // Always derived from the fields below
 
-      return handleCORS(NextResponse.json({ message: 'Kendaraan berhasil dihapus' }))
+  if ('tanggal_sewa' in updateData) {
+    updateData.tanggal_sewa = new Date(updateData.tanggal_sewa)
+    if (isNaN(updateData.tanggal_sewa.getTime())) {
+      return json({ error: 'tanggal_sewa tidak valid' }, { status: 400 })
     }
+  }
+  delete updateData.total_harga // Priced by the server, see below
 
-    // BOOKING ENDPOINTS
+  if (updateData.durasi) updateData.durasi = parseInt(updateData.durasi)
+  if ('dengan_sopir' in updateData) updateData.dengan_sopir = Boolean(updateData.dengan_sopir)
 
-    // GET /api/booking - Ambil semua booking
-    if (route === '/booking' && method === 'GET') {
-      const bookings = await db.collection('booking')
-        .find({})
-        .sort({ created_at: -1 })
-        .toArray()
+  // Moving a booking to another vehicle is checked like a reschedule
+  const rescheduled = ['kendaraan_id', 'tanggal_sewa', 'durasi', 'tipe_sewa'].some(field => field in updateData)
+  const repriced = PRICE_FIELDS.some(field => field in updateData)
 
-      const cleanBookings = bookings.map(({ _id, ...rest }) => rest)
-      return handleCORS(NextResponse.json(cleanBookings))
+  if (rescheduled || repriced || 'status' in updateData) {
+    const current = await db.collection('booking').findOne({ id })
+    if (!current) {
+      return json(
+        { error: 'Booking tidak ditemukan' },
+        { status: 404 }
+      )
     }
 
-    // POST /api/booking - Buat booking baru
-    if (route === '/booking' && method === 'POST') {
-      const body = await request.json()
-      
-      const requiredFields = ['kendaraan_id', 'nama_penyewa', 'no_hp', 'tanggal_sewa', 'durasi']
-      const missingFields = requiredFields.filter(field => !body[field])
-      
-      if (missingFields.length > 0) {
-        return handleCORS(NextResponse.json(
-          { error: `Field wajib tidak diisi: ${missingFields.join(', ')}` },
-          { status: 400 }
-        ))
-      }
+    const next = { ...current, ...updateData }
+    const error = (rescheduled || repriced) && validatePricing(next)
+    if (error) {
+      return json({ error }, { status: 400 })
+    }
 
-      // Check if kendaraan exists and available
-      const kendaraan = await db.collection('kendaraan').findOne({ id: body.kendaraan_id })
+    if (next.kendaraan_id !== current.kendaraan_id) {
+      const kendaraan = await db.collection('kendaraan')
+        .findOne({ id: next.kendaraan_id }, { projection: { _id: 0, status: 1 } })
       if (!kendaraan) {
-        return handleCORS(NextResponse.json(
+        return json(
           { error: 'Kendaraan tidak ditemukan' },
           { status: 404 }
-        ))
+        )
       }
-
-      if (kendaraan.status !== 'Tersedia') {
-        return handleCORS(NextResponse.json(
+      if (kendaraan.status !== BOOKABLE_STATUS) {
+        return json(
           { error: 'Kendaraan tidak tersedia' },
-          { status: 400 }
-        ))
+          { status: 409 }
+        )
       }
+    }
 
-      const booking = {
-        id: uuidv4(),
-        kendaraan_id: body.kendaraan_id,
-        nama_penyewa: body.nama_penyewa,
-        no_hp: body.no_hp,
-        email: body.email || '',
-        tanggal_sewa: new Date(body.tanggal_sewa),
-        durasi: parseInt(body.durasi),
-        tipe_sewa: body.tipe_sewa || 'harian', // harian/bulanan
-        dengan_sopir: body.dengan_sopir || false,
-        alamat_jemput: body.alamat_jemput || '',
-        catatan: body.catatan || '',
-        status: 'Pending',
-        total_harga: body.total_harga || 0,
-        created_at: new Date(),
-        updated_at: new Date()
-      }
+    if (repriced) {
+      updateData.total_harga = priceBooking(await tariffFor(db, next.kendaraan_id), next).total_harga
+    }
 
-      await db.collection('booking').insertOne(booking)
+    if (rescheduled) {
+      updateData.tanggal_selesai = tanggalSelesai(next.tanggal_sewa, next.durasi, next.tipe_sewa)
+    }
 
-      // Update kendaraan status to 'Disewa' if booking is confirmed
-      if (body.confirm_booking) {
-        await db.collection('kendaraan').updateOne(
-          { id: body.kendaraan_id },
-          { $set: { status: 'Disewa', updated_at: new Date() } }
+    // Rescheduling, and reviving a Dibatalkan booking, must not overlap
+    // another booking of the (new) vehicle
+    if (rescheduled || reactivates(current, next)) {
+      const end = updateData.tanggal_selesai || current.tanggal_selesai
+      if (await hasOverlap(db, next.kendaraan_id, next.tanggal_sewa, end, id)) {
+        return json(
+          { error: 'Kendaraan sudah dibooking pada tanggal tersebut' },
+          { status: 409 }
         )
       }
-      
-      const { _id, ...cleanBooking } = booking
-      return handleCORS(NextResponse.json(cleanBooking, { status: 201 }))
     }
+  }
 
-    // GALLERY ENDPOINTS
+  const before = await db.collection('booking').findOneAndUpdate(
+    { id },
+    { $set: updateData },
+    { returnDocument: 'before' }
+  )
 
-    // GET /api/gallery - Ambil semua foto gallery
-    if (route === '/gallery' && method === 'GET') {
-      const gallery = await db.collection('gallery')
-        .find({})
-        .sort({ created_at: -1 })
-        .toArray()
+  if (!before) {
+    return json(
+      { error: 'Booking tidak ditemukan' },
+      { status: 404 }
+    )
+  }
 
-      const cleanGallery = gallery.map(({ _id, ...rest }) => rest)
-      return handleCORS(NextResponse.json(cleanGallery))
-    }
+  const { _id, ...updatedBooking } = { ...before, ...updateData }
+  await applyRevenueChange(db, before, updatedBooking)
+  statisticsCache.clear()
+  bookingChanged('ubah', updatedBooking)
 
-    // POST /api/gallery - Upload foto gallery
-    if (route === '/gallery' && method === 'POST') {
-      const body = await request.json()
-      
-      if (!body.foto || !body.judul) {
-        return handleCORS(NextResponse.json(
-          { error: 'Foto dan judul wajib diisi' },
-          { status: 400 }
-        ))
-      }
+  return json(updatedBooking)
+})
 
-      const galleryItem = {
-        id: uuidv4(),
-        judul: body.judul,
-        deskripsi: body.deskripsi || '',
-        foto: body.foto, // base64 string
-        kategori: body.kategori || 'kendaraan',
-        created_at: new Date(),
-        updated_at: new Date()
-      }
+// DELETE /api/booking/{id} - Hapus booking
+router.delete('/booking/{id}', async ({ params, db }) => {
+  const { id } = params
 
-      await db.collection('gallery').insertOne(galleryItem)
-      
-      const { _id, ...cleanGalleryItem } = galleryItem
-      return handleCORS(NextResponse.json(cleanGalleryItem, { status: 201 }))
-    }
+  const deleted = await db.collection('booking').findOneAndDelete({ id }, { projection: { _id: 0 } })
+  if (!deleted) {
+    return json(
+      { error: 'Booking tidak ditemukan' },
+      { status: 404 }
+    )
+  }
 
-    // LAPORAN KEUANGAN ENDPOINTS
-
-    // GET /api/laporan-keuangan - Ambil laporan keuangan
-    if (route === '/laporan-keuangan' && method === 'GET') {
-      const { searchParams } = new URL(request.url)
-      const periode = searchParams.get('periode') || '1-hari' // 1-hari, 7-hari, 1-bulan
-      
-      let dateFilter = {}
-      const now = new Date()
-      
-      switch (periode) {
-        case '1-hari':
-          dateFilter = {
-            created_at: {
-              $gte: new Date(now.getFullYear(), now.getMonth(), now.getDate()),
-              $lt: new Date(now.getFullYear(), now.getMonth(), now.getDate() + 1)
-            }
-          }
-          break
-        case '7-hari':
-          const weekAgo = new Date(now.getTime() - 7 * 24 * 60 * 60 * 1000)
-          dateFilter = {
-            created_at: {
-              $gte: weekAgo,
-              $lt: now
-            }
-          }
-          break
-        case '1-bulan':
-          const monthAgo = new Date(now.getFullYear(), now.getMonth() - 1, now.getDate())
-          dateFilter = {
-            created_at: {
-              $gte: monthAgo,
-              $lt: now
-            }
-          }
-          break
-      }
+  await applyRevenueChange(db, deleted, null)
+  statisticsCache.clear()
+  bookingChanged('hapus', deleted)
+  return json({ message: 'Booking berhasil dihapus' })
+})
+
+// GALLERY ENDPOINTS
+
+// GET /api/gallery - Ambil semua foto gallery
+router.get('/gallery', async ({ request, db }) => {
+  const etag = await collectionEtag(db, 'gallery', request)
+  if (isNotModified(request, etag)) return notModified(etag)
+
+  const gallery = await db.collection('gallery')
+    .find({})
+    .sort({ created_at: -1 })
+    .toArray()
+
+  const cleanGallery = gallery.map(({ _id, ...rest }) => rest)
+  return json(cleanGallery, { headers: withEtag({}, etag) })
+})
+
+// POST /api/gallery - Upload foto gallery
+router.post('/gallery', async ({ request, db }) => {
+  const body = await request.json()
+  
+  if (!body.foto || !body.judul) {
+    return json(
+      { error: 'Foto dan judul wajib diisi' },
+      { status: 400 }
+    )
+  }
 
-      // Ambil booking yang sudah dikonfirmasi
-      const bookings = await db.collection('booking')
-        .find({ 
-          ...dateFilter,
-          status: { $in: ['Dikonfirmasi', 'Selesai'] }
-        })
-        .toArray()
-
-      const totalPendapatan = bookings.reduce((sum, booking) => sum + (booking.total_harga || 0), 0)
-      const totalTransaksi = bookings.length
-
-      // Group by tanggal untuk chart
-      const pendapatanHarian = bookings.reduce((acc, booking) => {
-        const tanggal = booking.created_at.toISOString().split('T')[0]
-        acc[tanggal] = (acc[tanggal] || 0) + booking.total_harga
-        return acc
-      }, {})
-
-      const laporan = {
-        periode,
-        total_pendapatan: totalPendapatan,
-        total_transaksi: totalTransaksi,
-        rata_rata_per_transaksi: totalTransaksi > 0 ? Math.round(totalPendapatan / totalTransaksi) : 0,
-        pendapatan_harian: Object.entries(pendapatanHarian).map(([tanggal, pendapatan]) => ({
-          tanggal,
-          pendapatan
-        })),
-        detail_booking: bookings.map(({ _id, ...rest }) => rest)
-      }
+  const galleryItem = {
+    id: uuidv4(),
+    judul: body.judul,
+    deskripsi: body.deskripsi || '',
+    ...(await storeImage(db, body.foto)), // base64 -> /api/images/{hash}
+    kategori: body.kategori || 'kendaraan',
+    created_at: new Date(),
+    updated_at: new Date()
+  }
 
-      return handleCORS(NextResponse.json(laporan))
-    }
+  await db.collection('gallery').insertOne(galleryItem)
+  await bumpVersion(db, 'gallery')
+  
+  const { _id, ...cleanGalleryItem } = galleryItem
+  return json(cleanGalleryItem, { status: 201 })
+})
 
-    // ADMIN AUTH ENDPOINTS
-
-    // POST /api/admin/login - Login admin
-    if (route === '/admin/login' && method === 'POST') {
-      const body = await request.json()
-      
-      // Simple admin auth - in production use proper authentication
-      if (body.username === 'admin' && body.password === 'admin123') {
-        const adminSession = {
-          id: uuidv4(),
-          username: body.username,
-          login_time: new Date(),
-          expires_at: new Date(Date.now() + 24 * 60 * 60 * 1000) // 24 hours
-        }
-
-        await db.collection('admin_sessions').insertOne(adminSession)
-        
-        const { _id, ...cleanSession } = adminSession
-        return handleCORS(NextResponse.json(cleanSession))
-      }
+// IMAGE ENDPOINTS
 
-      return handleCORS(NextResponse.json(
-        { error: 'Username atau password salah' },
-        { status: 401 }
-      ))
-    }
+// POST /api/images/migrate - Pindahkan foto base64 lama ke image store (admin)
+router.post('/images/migrate', async ({ db }) => {
+  const migrated = {
+    kendaraan: await migrateInlinePhotos(db, 'kendaraan'),
+    gallery: await migrateInlinePhotos(db, 'gallery')
+  }
+  await bumpVersion(db, 'kendaraan')
+  await bumpVersion(db, 'gallery')
+  return json({ migrated })
+}, { admin: true })
+
+// GET /api/images/{hash} dan /api/images/{hash}/thumb - Stream foto
+async function streamImage({ request, params, db }, variant) {
+  const response = await imageResponse(db, params.hash, variant, request.headers.get('if-none-match'))
+
+  if (!response) {
+    return json(
+      { error: 'Foto tidak ditemukan' },
+      { status: 404 }
+    )
+  }
 
-    // POST /api/admin/logout - Logout admin
-    if (route === '/admin/logout' && method === 'POST') {
-      const body = await request.json()
-      
-      await db.collection('admin_sessions').deleteOne({ id: body.session_id })
-      
-      return handleCORS(NextResponse.json({ message: 'Logout berhasil' }))
+  return response
+}
+router.get('/images/{hash}', (context) => streamImage(context))
+router.get('/images/{hash}/thumb', (context) => streamImage(context, 'thumb'))
+
+// LAPORAN KEUANGAN ENDPOINTS
+
+// GET /api/laporan-keuangan - Ambil laporan keuangan
+// ?periode=1-hari|7-hari|1-bulan atau ?from=YYYY-MM-DD&to=YYYY-MM-DD (WIT)
+// ?detail=true&limit=&cursor= untuk menyertakan detail_booking per halaman
+// ?format=columnar untuk pendapatan_harian/detail_booking sebagai { kolom, baris }
+// ?arsip=true agar detail_booking juga memuat booking yang sudah diarsipkan
+router.get('/laporan-keuangan', async ({ request, db }) => {
+  const { searchParams } = new URL(request.url)
+  const range = resolveRange(searchParams)
+  const format = parseResponseFormat(searchParams)
+  const withDetail = searchParams.get('detail') === 'true'
+  const sources = bookingSources(db, includeArchive(searchParams))
+
+  // Totals come from the daily rollup, which archiving leaves untouched;
+  // detail is optional
+  const [harian, detail] = await Promise.all([
+    rollupHarian(db, range),
+    withDetail
+      ? findPage(sources, revenueFilter(range), { ...parseListOptions(searchParams), paginated: true })
+      : null
+  ])
+
+  const laporan = summarize(range.periode, range, harian)
+  if (detail) {
+    laporan.detail_booking = detail.data
+    laporan.detail_next_cursor = detail.next_cursor
+  }
+
+  return json(formatBody(format, laporan))
+})
+
+// GET /api/laporan-keuangan/export?format=ndjson|csv - Detail pendapatan
+// untuk akuntansi, periode, filter dan ?arsip=true sama dengan /laporan-keuangan
+router.get('/laporan-keuangan/export', async ({ request, db }) => {
+  const { searchParams } = new URL(request.url)
+  const format = parseFormat(searchParams)
+  const sources = bookingSources(db, includeArchive(searchParams))
+
+  const filter = revenueFilter(resolveRange(searchParams))
+  const stream = exportStream(sources, filter, { format })
+  return exportResponse(stream, format, 'laporan-keuangan')
+})
+
+// POST /api/laporan-keuangan/rebuild - Hitung ulang rollup pendapatan harian (admin)
+router.post('/laporan-keuangan/rebuild', async ({ db }) => {
+  const hari = await rebuildRollup(db)
+  return json({ message: 'Rollup pendapatan harian dibangun ulang', hari })
+}, { admin: true })
+
+// GET /api/laporan-keuangan/verify - Bandingkan rollup dengan data booking
+router.get('/laporan-keuangan/verify', async ({ db }) => {
+  return json(await verifyRollup(db))
+})
+
+// ADMIN AUTH ENDPOINTS
+
+// POST /api/admin/login - Login admin
+router.post('/admin/login', async ({ request, db }) => {
+  const body = await request.json()
+  
+  // Simple admin auth - in production use proper authentication
+  if (body.username === 'admin' && body.password === 'admin123') {
+    return json(await createSession(db, body.username))
+  }
+
+  return json(
+    { error: 'Username atau password salah' },
+    { status: 401 }
+  )
+})
+
+// POST /api/admin/logout - Logout admin
+// Session id dari body { session_id } atau header Authorization: Bearer
+router.post('/admin/logout', async ({ request, db }) => {
+  const body = await request.json().catch(() => ({}))
+  
+  await endSession(db, body.session_id || sessionIdFrom(request))
+  
+  return json({ message: 'Logout berhasil' })
+})
+
+// GET /api/admin/session - Cek sesi admin (Authorization: Bearer <session id>)
+router.get('/admin/session', async ({ session }) => {
+  return json(session)
+}, { admin: true })
+
+// Statistics endpoint
+// Connects only on a cache miss, so cached reads never touch the pool
+router.get('/statistics', async () => {
+  // getOrLoad does the one counted lookup; has() only labels the response
+  const hit = statisticsCache.has('all')
+  const stats = await statisticsCache.getOrLoad('all', async () => loadStatistics(timedDb(await connectToMongo())))
+
+  const response = json(stats)
+  response.headers.set('X-Cache', hit ? 'HIT' : 'MISS')
+  return response
+}, { db: false })
+
+// GET /api/pool/stats - Metrik connection pool MongoDB
+router.get('/pool/stats', async () => {
+  return json(poolStats())
+}, { db: false })
+
+// GET /api/query-plans - Rencana query (explain) tiap endpoint, dibangun
+// dengan helper yang sama dengan handler-nya
+router.get('/query-plans', async ({ db }) => {
+  return json(await explainQueries(db))
+}, { admin: true })
+
+// GET /api/metrics - Latency histogram per route (format Prometheus)
+router.get('/metrics', async () => {
+  return new NextResponse(renderPrometheus(), {
+    headers: { 'Content-Type': 'text/plain; version=0.0.4; charset=utf-8' }
+  })
+}, { db: false })
+
+// GET /api/events?topik=kendaraan,booking - Server-Sent Events
+// Diff kecil saat status kendaraan atau booking berubah; EventSource
+// mengirim Last-Event-ID saat reconnect untuk melanjutkan dari event terakhir
+router.get('/events', async ({ request }) => {
+  const { searchParams } = new URL(request.url)
+  const topics = parseTopics(searchParams)
+  await ensureFeed()
+
+  const stream = liveStream(topics, request.headers.get('last-event-id'), request.signal)
+  return new NextResponse(stream, {
+    headers: {
+      'Content-Type': 'text/event-stream; charset=utf-8',
+      'Cache-Control': 'no-cache, no-transform',
+      'Connection': 'keep-alive',
+      // Stop nginx-style proxies from buffering the stream
+      'X-Accel-Buffering': 'no'
     }
+  })
+}, { db: false })
 
-    // Statistics endpoint
-    if (route === '/statistics' && method === 'GET') {
-      const totalKendaraan = await db.collection('kendaraan').countDocuments()
-      const totalBooking = await db.collection('booking').countDocuments()
-      const kendaraanTersedia = await db.collection('kendaraan').countDocuments({ status: 'Tersedia' })
-      const kendaraanDisewa = await db.collection('kendaraan').countDocuments({ status: 'Disewa' })
-
-      const stats = {
-        total_kendaraan: totalKendaraan,
-        total_booking: totalBooking,
-        kendaraan_tersedia: kendaraanTersedia,
-        kendaraan_disewa: kendaraanDisewa
-      }
+// GET /api/cache/stats - Hit/miss counter cache in-process
+router.get('/cache/stats', async () => {
+  return json(cacheStats())
+}, { db: false })
+
+// Route handler function
+async function handleRoute(request, { params }) {
+  const timing = new RequestTiming()
+  const { path = [] } = params
+  const matched = router.match(request.method, path)
+  const response = await withTiming(timing, () => dispatch(request, path, matched))
 
-      return handleCORS(NextResponse.json(stats))
+  // Route templates as metric labels, so ids do not explode cardinality
+  observeRequest(request.method, matched ? matched.route.template : 'other', response.status, timing.elapsed())
+
+  response.headers.set('Server-Timing', timing.header())
+  response.headers.set('Timing-Allow-Origin', process.env.CORS_ORIGINS || '*')
+  return response
+}
+
+async function dispatch(request, path, matched) {
+  try {
+    if (!matched) {
+      return handleCORS(json(
+        { error: `Route /${path.join('/')} not found` },
+        { status: 404 }
+      ))
     }
 
-    // Route not found
-    return handleCORS(NextResponse.json(
-      { error: `Route ${route} not found` }, 
-      { status: 404 }
-    ))
+    const { route, params } = matched
+    const db = route.db ? timedDb(await connectToMongo()) : null
+    const session = route.admin ? await requireAdmin(request, db) : null
+    // Compressed inside the try, so a failing encoder still ends in a JSON
+    // error with CORS headers
+    return await compressResponse(request, handleCORS(await route.handler({ request, params, db, session })))
 
   } catch (error) {
+    if (error instanceof ApiError) {
+      return handleCORS(json(
+        { error: error.message },
+        { status: error.status }
+      ))
+    }
+
     console.error('API Error:', error)
-    return handleCORS(NextResponse.json(
+    return handleCORS(json(
       { error: "Internal server error" }, 
       { status: 500 }
     ))
@@ -1,6 +1,6 @@
 'use client'
 
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { Button } from '@/components/ui/button'
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card'
 import { Badge } from '@/components/ui/badge'
@@ -9,41 +9,96 @@ import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@
 import { Dialog, DialogContent, DialogHeader, DialogTitle } from '@/components/ui/dialog'
 import { Car, Phone, MapPin, Clock, Users, Fuel, Settings, Star, WhatsApp } from 'lucide-react'
 
+const PAGE_SIZE = 24
+
 export default function App() {
   const [kendaraan, setKendaraan] = useState([])
   const [filteredKendaraan, setFilteredKendaraan] = useState([])
+  // Search results come a page at a time; null when nothing is left
+  const [nextOffset, setNextOffset] = useState(null)
+  const [totalKendaraan, setTotalKendaraan] = useState(0)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [loading, setLoading] = useState(true)
   const [selectedKendaraan, setSelectedKendaraan] = useState(null)
   const [searchTerm, setSearchTerm] = useState('')
   const [filterKategori, setFilterKategori] = useState('semua')
   const [filterStatus, setFilterStatus] = useState('semua')
+  const [kategoriOptions, setKategoriOptions] = useState(['MPV', 'Sedan', 'SUV', 'Hatchback'])
+  // Latest search and status filter for the live update listener below
+  const liveRef = useRef({})
+
+  useEffect(() => {
+    // Debounce typing so every keystroke does not hit the API
+    const timer = setTimeout(() => searchKendaraan(), searchTerm ? 250 : 0)
+    return () => clearTimeout(timer)
+  }, [searchTerm, filterKategori, filterStatus])
 
   useEffect(() => {
-    fetchKendaraan()
+    // Status changes arrive as small diffs instead of re-fetching the list
+    const events = new EventSource('/api/events?topik=kendaraan')
+    events.addEventListener('kendaraan', (event) => {
+      const { aksi, id, status } = JSON.parse(event.data)
+      const { search, filterStatus } = liveRef.current
+      // Added/removed vehicles, or a status filter the vehicle may have left
+      if (aksi !== 'ubah' || filterStatus !== 'semua') return search()
+      setFilteredKendaraan(list => list.map(k => k.id === id ? { ...k, status } : k))
+    })
+    // The server could not replay what we missed while disconnected
+    events.addEventListener('reset', () => liveRef.current.search())
+    return () => events.close()
   }, [])
 
   useEffect(() => {
-    filterKendaraan()
+    // Only the offline sample data is filtered client-side
+    if (kendaraan.length > 0) filterKendaraan()
   }, [kendaraan, searchTerm, filterKategori, filterStatus])
 
-  const fetchKendaraan = async () => {
+  // offset 0 replaces the list, later offsets append the next page
+  const searchKendaraan = async (offset = 0) => {
+    // Input is searched while typing, so terms match as word prefixes
+    // ("Ava" finds "Avanza") rather than whole words
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE), offset: String(offset), cocok: 'awalan' })
+    if (searchTerm) params.set('q', searchTerm)
+    if (filterKategori !== 'semua') params.set('kategori', filterKategori)
+    if (filterStatus !== 'semua') params.set('status', filterStatus)
+
     try {
-      const response = await fetch('/api/kendaraan')
+      const response = await fetch(`/api/kendaraan/cari?${params}`)
       if (response.ok) {
-        const data = await response.json()
-        setKendaraan(data)
+        const hasil = await response.json()
+        setFilteredKendaraan(list => offset > 0 ? [...list, ...hasil.data] : hasil.data)
+        setNextOffset(hasil.next_offset)
+        setTotalKendaraan(hasil.total)
+        // Keep the chosen kategori in the list while it filters the facets
+        if (filterKategori === 'semua' && hasil.facets.kategori.length > 0) {
+          setKategoriOptions(hasil.facets.kategori.map(({ nilai }) => nilai))
+        }
       } else {
         // Fallback dengan sample data jika API belum ready
         setSampleData()
       }
     } catch (error) {
-      console.error('Error fetching kendaraan:', error)
+      console.error('Error searching kendaraan:', error)
       setSampleData()
     } finally {
       setLoading(false)
     }
   }
 
+  const loadMore = async () => {
+    setLoadingMore(true)
+    await searchKendaraan(nextOffset)
+    setLoadingMore(false)
+  }
+
+  liveRef.current = { search: () => searchKendaraan(), filterStatus }
+
+  const resetFilter = () => {
+    setSearchTerm('')
+    setFilterKategori('semua')
+    setFilterStatus('semua')
+  }
+
   const setSampleData = () => {
     const sampleKendaraan = [
       {
@@ -93,6 +148,7 @@ export default function App() {
       }
     ]
     setKendaraan(sampleKendaraan)
+    setNextOffset(null)
   }
 
   const filterKendaraan = () => {
@@ -253,10 +309,9 @@ export default function App() {
               </SelectTrigger>
               <SelectContent>
                 <SelectItem value="semua">Semua Kategori</SelectItem>
-                <SelectItem value="MPV">MPV</SelectItem>
-                <SelectItem value="Sedan">Sedan</SelectItem>
-                <SelectItem value="SUV">SUV</SelectItem>
-                <SelectItem value="Hatchback">Hatchback</SelectItem>
+                {kategoriOptions.map((kategori) => (
+                  <SelectItem key={kategori} value={kategori}>{kategori}</SelectItem>
+                ))}
               </SelectContent>
             </Select>
             <Select value={filterStatus} onValueChange={setFilterStatus}>
@@ -270,7 +325,7 @@ export default function App() {
                 <SelectItem value="Perbaikan">Perbaikan</SelectItem>
               </SelectContent>
             </Select>
-            <Button variant="outline">
+            <Button variant="outline" onClick={resetFilter}>
               Reset Filter
             </Button>
           </div>
@@ -284,8 +339,9 @@ export default function App() {
                 <Card key={kendaraan.id} className="overflow-hidden">
                   <div className="aspect-video bg-gray-200">
                     <img 
-                      src={kendaraan.foto} 
+                      src={kendaraan.foto_thumb || kendaraan.foto} 
                       alt={kendaraan.nama}
+                      loading="lazy"
                       className="w-full h-full object-cover"
                     />
                   </div>
@@ -344,6 +400,17 @@ export default function App() {
               ))}
             </div>
           )}
+
+          {!loading && nextOffset !== null && (
+            <div className="mt-8 text-center">
+              <p className="text-sm text-gray-600 mb-3">
+                Menampilkan {filteredKendaraan.length} dari {totalKendaraan} kendaraan
+              </p>
+              <Button variant="outline" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? 'Memuat...' : 'Muat Lebih Banyak'}
+              </Button>
+            </div>
+          )}
         </div>
       </section>
 
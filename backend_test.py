@@ -7,19 +7,116 @@ Tests all endpoints with realistic Indonesian rental car data
 import requests
 import json
 import uuid
+import argparse
+import asyncio
+import base64
+import csv
+import io
+import math
+import random
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 
+try:
+    from pymongo import MongoClient, UpdateOne
+except ImportError:  # Only needed for benchmark mode and the image dedupe count
+    MongoClient = UpdateOne = None
+
+try:
+    import brotli
+except ImportError:  # Only needed to decode br responses in the compression test
+    brotli = None
+
 # Load environment variables
 load_dotenv()
 
+try:
+    from rino_client import RinoApiError, RinoRentalClient
+except ImportError:  # httpx is only needed for the parallel regression run
+    RinoApiError = RinoRentalClient = None
+
 # Get base URL from environment - use localhost for testing
-BASE_URL = "http://localhost:3000"
+BASE_URL = os.environ.get('RINO_BASE_URL', "http://localhost:3000")
 API_BASE = f"{BASE_URL}/api"
 
 print(f"Testing API at: {API_BASE}")
 
+ADMIN_LOGIN = {"username": "admin", "password": "admin123"}
+
+
+@contextmanager
+def admin_auth(session):
+    """Log in as admin for the maintenance endpoints and yield the Bearer header"""
+    login = session.post(f"{API_BASE}/admin/login", json=ADMIN_LOGIN)
+    if login.status_code != 200:
+        raise RuntimeError(f"Admin login failed: {login.status_code}")
+    auth = {"Authorization": f"Bearer {login.json()['id']}"}
+    try:
+        yield auth
+    finally:
+        session.post(f"{API_BASE}/admin/logout", headers=auth)
+
+# p95 latency budgets per route in milliseconds, checked against /api/metrics
+LATENCY_BUDGETS_MS = {
+    'GET /': 50,
+    'GET /kendaraan': 250,
+    'GET /kendaraan/{id}': 100,
+    'GET /kendaraan/cari': 100,
+    'GET /booking': 250,
+    'GET /gallery': 250,
+    'GET /statistics': 100,
+    'GET /laporan-keuangan': 250,
+}
+DEFAULT_LATENCY_BUDGET_MS = 500
+
+
+def parse_prometheus_histograms(text, metric):
+    """Collect ``{(method, route): [(le_seconds, cumulative_count), ...]}`` buckets"""
+    histograms = defaultdict(list)
+    prefix = f"{metric}_bucket{{"
+    for line in text.splitlines():
+        if not line.startswith(prefix):
+            continue
+        labels_part, value = line[len(prefix):].rsplit('} ', 1)
+        labels = dict(item.split('=', 1) for item in labels_part.split(','))
+        labels = {name: label.strip('"') for name, label in labels.items()}
+        le = float('inf') if labels['le'] == '+Inf' else float(labels['le'])
+        histograms[(labels['method'], labels['route'])].append((le, float(value)))
+    return histograms
+
+
+def histogram_quantile(buckets, q):
+    """Upper bound of the bucket holding the q-quantile, like PromQL without interpolation"""
+    buckets = sorted(buckets)
+    total = buckets[-1][1]
+    if total == 0:
+        return 0.0
+    for le, cumulative in buckets:
+        if cumulative >= q * total:
+            return le
+    return float('inf')
+
+
+def histogram_delta(after, before):
+    """Buckets observed between two scrapes; routes with no new samples are dropped"""
+    delta = {}
+    for key, buckets in after.items():
+        previous = dict(before.get(key, []))
+        counts = [(le, cumulative - previous.get(le, 0.0)) for le, cumulative in buckets]
+        if max(count for _, count in counts) > 0:
+            delta[key] = counts
+    return delta
+
+
 class RinoRentalAPITester:
     def __init__(self):
         self.session = requests.Session()
@@ -185,6 +282,118 @@ class RinoRentalAPITester:
         print(f"\nVehicle CRUD Tests: {success_count}/6 passed")
         return success_count >= 5  # Allow 1 failure
 
+    def test_vehicle_search(self):
+        """Test full-text and faceted catalog search"""
+        print("\n=== Testing Vehicle Search ===")
+
+        success_count = 0
+        # A unique word keeps the assertions independent of other test data
+        marker = f"uji{uuid.uuid4().hex[:10]}"
+        vehicles = [
+            ("Toyota Fortuner", "Toyota", "SUV", "Otomatis", "Diesel", 7, 1200000),
+            ("Daihatsu Sigra", "Daihatsu", "MPV", "Manual", "Bensin", 7, 300000),
+            ("Honda Brio", "Honda", "City Car", "Otomatis", "Bensin", 5, 280000),
+        ]
+
+        try:
+            for nama, merek, kategori, transmisi, bahan_bakar, kapasitas, harga in vehicles:
+                response = self.session.post(f"{API_BASE}/kendaraan", json={
+                    "nama": nama, "merek": merek, "plat_nomor": f"PB {random.randint(1000, 9999)} SR",
+                    "kategori": kategori, "harga_harian": harga, "harga_bulanan": harga * 25,
+                    "kapasitas": kapasitas, "transmisi": transmisi, "bahan_bakar": bahan_bakar,
+                    "deskripsi": f"Unit {marker} siap antar jemput bandara DEO Sorong"
+                })
+                self.created_vehicles.append(response.json()['id'])
+        except Exception as e:
+            print(f"❌ Error creating search fixtures: {str(e)}")
+            return False
+
+        def search(**params):
+            return self.session.get(f"{API_BASE}/kendaraan/cari", params={"q": marker, **params})
+
+        print("\n--- Testing Full-Text Match And Facets ---")
+        try:
+            response = search()
+            result = response.json()
+            transmisi = {facet['nilai']: facet['jumlah'] for facet in result.get('facets', {}).get('transmisi', [])}
+            print(f"Total: {result.get('total')}, transmisi facet: {transmisi}, harga: {result.get('harga')}")
+
+            if (response.status_code == 200 and result['total'] == 3 and transmisi == {'Otomatis': 2, 'Manual': 1}
+                    and result['harga'] == {'min': 280000, 'max': 1200000}):
+                print("✅ Text search returns matches with facet counts")
+                success_count += 1
+            else:
+                print(f"❌ Unexpected search result: {response.text[:300]}")
+        except Exception as e:
+            print(f"❌ Error testing text search: {str(e)}")
+
+        print("\n--- Testing Facet Filters And Price Range ---")
+        try:
+            automatic = search(transmisi="Otomatis").json()
+            budget = search(harga_max=300000, sort="harga_terendah").json()
+            seven_seats = search(kapasitas=7, kategori="SUV,MPV").json()
+            prices = [vehicle['harga_harian'] for vehicle in budget['data']]
+            print(f"Otomatis: {automatic['total']}, <= Rp 300.000: {prices}, 7 kursi: {seven_seats['total']}")
+
+            if automatic['total'] == 2 and prices == [280000, 300000] and seven_seats['total'] == 2:
+                print("✅ Filters and price sort applied")
+                success_count += 1
+            else:
+                print("❌ Filters not applied correctly")
+        except Exception as e:
+            print(f"❌ Error testing search filters: {str(e)}")
+
+        print("\n--- Testing Name Outranks Description ---")
+        try:
+            result = self.session.get(f"{API_BASE}/kendaraan/cari", params={"q": f"fortuner {marker}", "limit": 1}).json()
+            top = result['data'][0]['nama'] if result.get('data') else None
+            print(f"Top result: {top}, next_offset: {result.get('next_offset')}")
+
+            if top == "Toyota Fortuner" and result['next_offset'] == 1:
+                print("✅ Relevance ranking and offset paging work")
+                success_count += 1
+            else:
+                print("❌ Unexpected ranking or paging")
+        except Exception as e:
+            print(f"❌ Error testing relevance: {str(e)}")
+
+        # As-you-type input is a partial word the text index cannot match
+        print("\n--- Testing Prefix Match For Partial Terms ---")
+        try:
+            fortuner_id = self.created_vehicles[-3]
+            whole_word = self.session.get(f"{API_BASE}/kendaraan/cari", params={"q": "Fortun", "limit": 100}).json()
+            prefix = self.session.get(
+                f"{API_BASE}/kendaraan/cari", params={"q": "Fortun", "cocok": "awalan", "limit": 100}
+            ).json()
+            names = [f"{vehicle['merek']} {vehicle['nama']}".lower() for vehicle in prefix['data']]
+            print(f"cocok=kata: {whole_word['total']} match(es), cocok=awalan: {prefix['total']} match(es)")
+
+            if (fortuner_id in {vehicle['id'] for vehicle in prefix['data']}
+                    and all(' fortun' in f" {name}" for name in names)):
+                print("✅ Partial term matched as a word prefix")
+                success_count += 1
+            else:
+                print(f"❌ Prefix match failed: {names}")
+        except Exception as e:
+            print(f"❌ Error testing prefix match: {str(e)}")
+
+        print("\n--- Testing Invalid Search Parameters ---")
+        try:
+            bad_status = search(status="Hilang")
+            bad_sort = self.session.get(f"{API_BASE}/kendaraan/cari", params={"sort": "relevan"})
+            bad_mode = search(cocok="mirip")
+
+            if bad_status.status_code == 400 and bad_sort.status_code == 400 and bad_mode.status_code == 400:
+                print("✅ Invalid parameters rejected")
+                success_count += 1
+            else:
+                print(f"❌ Expected 400s, got {bad_status.status_code}, {bad_sort.status_code} and {bad_mode.status_code}")
+        except Exception as e:
+            print(f"❌ Error testing invalid search parameters: {str(e)}")
+
+        print(f"\nVehicle Search Tests: {success_count}/5 passed")
+        return success_count >= 5
+
     def test_booking_system(self):
         """Test booking system endpoints"""
         print("\n=== Testing Booking System ===")
@@ -285,6 +494,524 @@ class RinoRentalAPITester:
         print(f"\nBooking System Tests: {success_count}/4 passed")
         return success_count >= 3
 
+    def test_pricing(self):
+        """Test server-side prices, the batch quote endpoint and tariff invalidation"""
+        print("\n=== Testing Pricing ===")
+
+        success_count = 0
+        sopir = int(os.environ.get('TARIF_SOPIR_HARIAN', '250000'))
+        response = self.session.post(f"{API_BASE}/kendaraan", json={
+            "nama": "Daihatsu Xenia Tarif", "merek": "Daihatsu", "plat_nomor": "PB 3030 TR",
+            "kategori": "MPV", "harga_harian": 300000, "harga_bulanan": 7500000,
+            "kapasitas": 7, "transmisi": "Manual", "bahan_bakar": "Bensin"
+        })
+        if response.status_code != 201:
+            print(f"❌ Could not create vehicle: {response.text}")
+            return False
+        vehicle_id = response.json()['id']
+        self.created_vehicles.append(vehicle_id)
+
+        print("\n--- Testing Batch Quote ---")
+        items = [
+            {"kendaraan_id": vehicle_id, "durasi": 3},
+            {"kendaraan_id": vehicle_id, "durasi": 1, "tipe_sewa": "bulanan", "dengan_sopir": True},
+            {"kendaraan_id": "non-existent-id", "durasi": 1},
+            {"kendaraan_id": vehicle_id, "durasi": 0}
+        ]
+        try:
+            response = self.session.post(f"{API_BASE}/harga", json=items)
+            hasil = response.json().get('hasil', [])
+            totals = [row.get('total_harga') for row in hasil]
+            print(f"Status Code: {response.status_code}, totals: {totals}")
+
+            if response.status_code == 200 and totals == [900000, 7500000 + 30 * sopir, None, None]:
+                print("✅ Quotes priced per item, bad items reported individually")
+                success_count += 1
+            else:
+                print(f"❌ Unexpected quote result: {response.text}")
+        except Exception as e:
+            print(f"❌ Error testing quote: {str(e)}")
+
+        print("\n--- Testing Booking Ignores Client Price ---")
+        booking_id = None
+        try:
+            response = self.session.post(f"{API_BASE}/booking", json={
+                "kendaraan_id": vehicle_id,
+                "nama_penyewa": "Penyewa Tarif",
+                "no_hp": "081233334444",
+                "tanggal_sewa": (datetime.now() + timedelta(days=150)).isoformat(),
+                "durasi": 3,
+                "dengan_sopir": True,
+                "total_harga": 1
+            })
+            booking = response.json()
+            print(f"Status Code: {response.status_code}, total_harga: {booking.get('total_harga')}")
+
+            if response.status_code == 201 and booking['total_harga'] == 3 * (300000 + sopir):
+                booking_id = booking['id']
+                self.created_bookings.append(booking_id)
+                print("✅ total_harga computed by the server")
+                success_count += 1
+            else:
+                print(f"❌ Unexpected booking price: {response.text}")
+        except Exception as e:
+            print(f"❌ Error testing booking price: {str(e)}")
+
+        print("\n--- Testing Tariff Invalidation ---")
+        try:
+            self.session.put(f"{API_BASE}/kendaraan/{vehicle_id}", json={"harga_harian": 400000})
+            response = self.session.post(f"{API_BASE}/harga", json=items[:1])
+            total = response.json()['hasil'][0].get('total_harga')
+            print(f"Quote after price change: {total}")
+
+            if total == 1200000:
+                print("✅ Price change visible to the next quote")
+                success_count += 1
+            else:
+                print("❌ Stale tariff served after PUT")
+        except Exception as e:
+            print(f"❌ Error testing tariff invalidation: {str(e)}")
+
+        print("\n--- Testing Repricing On Booking Update ---")
+        try:
+            if booking_id:
+                response = self.session.put(f"{API_BASE}/booking/{booking_id}", json={"durasi": 4, "dengan_sopir": False, "total_harga": 1})
+                total = response.json().get('total_harga')
+                print(f"Status Code: {response.status_code}, total_harga: {total}")
+
+                if response.status_code == 200 and total == 1600000:
+                    print("✅ Booking repriced from the current tariff")
+                    success_count += 1
+                else:
+                    print(f"❌ Unexpected repriced booking: {response.text}")
+        except Exception as e:
+            print(f"❌ Error testing booking repricing: {str(e)}")
+
+        print(f"\nPricing Tests: {success_count}/4 passed")
+        return success_count >= 4
+
+    def test_availability(self):
+        """Test date-range availability search and double-booking check"""
+        print("\n=== Testing Availability ===")
+
+        if not self.created_vehicles:
+            print("❌ No vehicles available for availability test")
+            return False
+
+        success_count = 0
+        vehicle_id = self.created_vehicles[-1]
+        start = datetime.now().date() + timedelta(days=40)
+        booking_id = None
+
+        def available_ids(day_from, day_to):
+            response = self.session.get(f"{API_BASE}/ketersediaan", params={
+                "from": day_from.isoformat(), "to": day_to.isoformat(), "fields": "-foto"
+            })
+            return [vehicle['id'] for vehicle in response.json()]
+
+        # Book the vehicle for three days starting at noon
+        print("\n--- Testing Booking Stores End Date ---")
+        booking_data = {
+            "kendaraan_id": vehicle_id,
+            "nama_penyewa": "Yohanes Kambu",
+            "no_hp": "081298765432",
+            "tanggal_sewa": f"{start.isoformat()}T12:00:00+09:00",
+            "durasi": 3,
+            "tipe_sewa": "harian"
+        }
+        try:
+            response = self.session.post(f"{API_BASE}/booking", json=booking_data)
+            print(f"Status Code: {response.status_code}")
+
+            if response.status_code == 201 and response.json().get('tanggal_selesai'):
+                booking = response.json()
+                booking_id = booking['id']
+                self.created_bookings.append(booking_id)
+                print(f"✅ Booking {booking['tanggal_sewa']} -> {booking['tanggal_selesai']}")
+                success_count += 1
+            else:
+                print(f"❌ Booking without end date: {response.text}")
+        except Exception as e:
+            print(f"❌ Error creating booking: {str(e)}")
+
+        # The vehicle disappears from the window it is booked for only
+        print("\n--- Testing Availability Search ---")
+        try:
+            busy = available_ids(start + timedelta(days=1), start + timedelta(days=2))
+            free = available_ids(start + timedelta(days=10), start + timedelta(days=12))
+
+            if vehicle_id not in busy and vehicle_id in free:
+                print(f"✅ Availability search correct ({len(busy)} free during booking, {len(free)} after)")
+                success_count += 1
+            else:
+                print("❌ Availability search ignores the booking window")
+        except Exception as e:
+            print(f"❌ Error searching availability: {str(e)}")
+
+        # Overlapping booking is rejected
+        print("\n--- Testing Double Booking Rejected ---")
+        overlapping = dict(booking_data, tanggal_sewa=f"{(start + timedelta(days=2)).isoformat()}T08:00:00+09:00", durasi=1)
+        try:
+            response = self.session.post(f"{API_BASE}/booking", json=overlapping)
+            print(f"Status Code: {response.status_code}")
+
+            if response.status_code == 409:
+                print(f"✅ Double booking rejected: {response.json()['error']}")
+                success_count += 1
+            else:
+                print(f"❌ Double booking not rejected: Expected 409, got {response.status_code}")
+                if response.status_code == 201:
+                    self.created_bookings.append(response.json()['id'])
+        except Exception as e:
+            print(f"❌ Error testing double booking: {str(e)}")
+
+        # Moving the booking to another vehicle checks that vehicle's bookings
+        print("\n--- Testing Booking Moved to Another Vehicle ---")
+        other_id = next((vid for vid in self.created_vehicles if vid != vehicle_id), None)
+        try:
+            if other_id and booking_id:
+                blocker = self.session.post(f"{API_BASE}/booking", json=dict(booking_data, kendaraan_id=other_id))
+                if blocker.status_code == 201:
+                    self.created_bookings.append(blocker.json()['id'])
+
+                onto_busy = self.session.put(f"{API_BASE}/booking/{booking_id}", json={"kendaraan_id": other_id})
+                onto_missing = self.session.put(f"{API_BASE}/booking/{booking_id}", json={"kendaraan_id": "non-existent-id"})
+                print(f"Status Codes: busy={onto_busy.status_code} missing={onto_missing.status_code}")
+
+                if blocker.status_code == 201 and onto_busy.status_code == 409 and onto_missing.status_code == 404:
+                    print("✅ Vehicle change checked against the target vehicle")
+                    success_count += 1
+                else:
+                    print("❌ Vehicle change not checked against the target vehicle")
+            else:
+                print("❌ Need two vehicles and a booking for the vehicle change test")
+        except Exception as e:
+            print(f"❌ Error testing vehicle change: {str(e)}")
+
+        # A cancelled booking frees its dates; reviving it after someone else
+        # took them is a double booking too, one by one or in bulk
+        print("\n--- Testing Reactivation of a Cancelled Booking ---")
+        try:
+            if booking_id:
+                self.session.put(f"{API_BASE}/booking/{booking_id}", json={"status": "Dibatalkan"})
+                replacement = self.session.post(f"{API_BASE}/booking", json=booking_data)
+                if replacement.status_code == 201:
+                    self.created_bookings.append(replacement.json()['id'])
+
+                revived = self.session.put(f"{API_BASE}/booking/{booking_id}", json={"status": "Dikonfirmasi"})
+                bulk = self.session.post(f"{API_BASE}/booking/bulk-status", json=[{"id": booking_id, "status": "Pending"}])
+                bulk_row = bulk.json().get('hasil', [{}])[0] if bulk.status_code == 200 else {}
+                print(f"Status Codes: replacement={replacement.status_code} put={revived.status_code} bulk_row={bulk_row.get('status')}")
+
+                if replacement.status_code == 201 and revived.status_code == 409 and bulk_row.get('status') == 'error':
+                    print("✅ Reactivation checked for overlap")
+                    success_count += 1
+                else:
+                    print("❌ Cancelled booking revived over another booking")
+            else:
+                print("❌ No booking for the reactivation test")
+        except Exception as e:
+            print(f"❌ Error testing reactivation: {str(e)}")
+
+        print("\n--- Testing Invalid tanggal_sewa on Update ---")
+        try:
+            if booking_id:
+                response = self.session.put(f"{API_BASE}/booking/{booking_id}", json={"tanggal_sewa": "bukan-tanggal"})
+                print(f"Status Code: {response.status_code}")
+                if response.status_code == 400:
+                    print(f"✅ Invalid date rejected: {response.json()['error']}")
+                    success_count += 1
+                else:
+                    print(f"❌ Invalid date not rejected: Expected 400, got {response.status_code}")
+            else:
+                print("❌ No booking for the invalid date test")
+        except Exception as e:
+            print(f"❌ Error testing invalid date: {str(e)}")
+
+        # A vehicle the booking endpoints reject is not listed as available
+        print("\n--- Testing Availability Matches Booking Rule ---")
+        try:
+            if other_id:
+                self.session.put(f"{API_BASE}/kendaraan/{other_id}", json={"status": "Disewa"})
+                window_from, window_to = start + timedelta(days=20), start + timedelta(days=21)
+                listed = other_id in available_ids(window_from, window_to)
+                attempt = self.session.post(f"{API_BASE}/booking", json=dict(
+                    booking_data, kendaraan_id=other_id, tanggal_sewa=f"{window_from.isoformat()}T12:00:00+09:00", durasi=1
+                ))
+                if attempt.status_code == 201:
+                    self.created_bookings.append(attempt.json()['id'])
+                self.session.put(f"{API_BASE}/kendaraan/{other_id}", json={"status": "Tersedia"})
+                print(f"Listed: {listed}, booking status: {attempt.status_code}")
+
+                if not listed and attempt.status_code == 400:
+                    print("✅ Disewa vehicle neither listed nor bookable")
+                    success_count += 1
+                else:
+                    print("❌ Availability search and booking disagree")
+            else:
+                print("❌ Need two vehicles for the availability rule test")
+        except Exception as e:
+            print(f"❌ Error testing availability rule: {str(e)}")
+
+        print(f"\nAvailability Tests: {success_count}/7 passed")
+        return success_count >= 7
+
+    def test_pagination_and_projection(self):
+        """Test keyset pagination and field projection on list endpoints"""
+        print("\n=== Testing Pagination and Projection ===")
+
+        success_count = 0
+
+        for resource in ['kendaraan', 'booking']:
+            print(f"\n--- Testing {resource} Pagination ---")
+            try:
+                start = time.perf_counter()
+                full = self.session.get(f"{API_BASE}/{resource}")
+                full_ms = (time.perf_counter() - start) * 1000
+
+                start = time.perf_counter()
+                page = self.session.get(f"{API_BASE}/{resource}", params={"limit": 1, "fields": "-foto"})
+                page_ms = (time.perf_counter() - start) * 1000
+
+                print(f"Full list: {len(full.content):,} bytes in {full_ms:.1f} ms")
+                print(f"Paginated (limit=1, fields=-foto): {len(page.content):,} bytes in {page_ms:.1f} ms")
+
+                if full.status_code != 200 or page.status_code != 200:
+                    print(f"❌ {resource} list failed: {full.status_code}/{page.status_code}")
+                    continue
+
+                body = page.json()
+                items = body.get('data', [])
+                if any('foto' in item for item in items):
+                    print(f"❌ {resource} projection still ships foto")
+                    continue
+
+                # Follow the cursor and make sure pages do not overlap
+                seen = [item['id'] for item in items]
+                if body.get('next_cursor'):
+                    next_page = self.session.get(f"{API_BASE}/{resource}", params={"limit": 1, "cursor": body['next_cursor']})
+                    seen += [item['id'] for item in next_page.json().get('data', [])]
+
+                if len(seen) == len(set(seen)) and seen == [item['id'] for item in full.json()][:len(seen)]:
+                    print(f"✅ {resource} pagination working ({len(seen)} items across pages)")
+                    success_count += 1
+                else:
+                    print(f"❌ {resource} pages out of order or overlapping: {seen}")
+            except Exception as e:
+                print(f"❌ Error testing {resource} pagination: {str(e)}")
+
+        # Test invalid cursor
+        print("\n--- Testing Invalid Cursor ---")
+        try:
+            response = self.session.get(f"{API_BASE}/kendaraan", params={"cursor": "bukan-cursor"})
+            print(f"Status Code: {response.status_code}")
+
+            if response.status_code == 400:
+                print(f"✅ Invalid cursor rejected: {response.json()['error']}")
+                success_count += 1
+            else:
+                print(f"❌ Invalid cursor not rejected: Expected 400, got {response.status_code}")
+        except Exception as e:
+            print(f"❌ Error testing invalid cursor: {str(e)}")
+
+        print(f"\nPagination Tests: {success_count}/3 passed")
+        return success_count >= 3
+
+    def test_concurrent_booking(self, attempts=100):
+        """Fire simultaneous confirmed bookings at one car; exactly one may win"""
+        print("\n=== Testing Concurrent Booking ===")
+
+        success_count = 0
+        response = self.session.post(f"{API_BASE}/kendaraan", json={
+            "nama": "Toyota Rush Rebutan", "merek": "Toyota", "plat_nomor": "PB 7777 RB",
+            "kategori": "SUV", "harga_harian": 450000, "harga_bulanan": 11000000,
+            "kapasitas": 7, "transmisi": "Manual", "bahan_bakar": "Bensin"
+        })
+        if response.status_code != 201:
+            print(f"❌ Could not create vehicle: {response.text}")
+            return False
+        vehicle_id = response.json()['id']
+        self.created_vehicles.append(vehicle_id)
+
+        print(f"\n--- Testing {attempts} Simultaneous Confirmed Bookings ---")
+        barrier = threading.Barrier(attempts)
+
+        def attempt(i):
+            # One session per thread: requests.Session is not thread-safe
+            with requests.Session() as session:
+                barrier.wait()
+                return session.post(f"{API_BASE}/booking", json={
+                    "kendaraan_id": vehicle_id,
+                    "nama_penyewa": f"Penyewa Rebutan {i}",
+                    "no_hp": f"0812{i:08d}",
+                    "tanggal_sewa": (datetime.now() + timedelta(days=200)).isoformat(),
+                    "durasi": 2,
+                    "total_harga": 900000,
+                    "confirm_booking": True
+                }, timeout=60)
+
+        try:
+            with ThreadPoolExecutor(max_workers=attempts) as pool:
+                responses = list(pool.map(attempt, range(attempts)))
+            statuses = Counter(r.status_code for r in responses)
+            print(f"Status codes: {dict(statuses)}")
+
+            if statuses[201] == 1 and set(statuses) <= {201, 400, 409}:
+                print("✅ Exactly one booking won, the rest were rejected cleanly")
+                success_count += 1
+            else:
+                print("❌ Expected exactly one 201 and only 400/409 otherwise")
+
+            winner = next((r.json() for r in responses if r.status_code == 201), None)
+            if winner:
+                self.created_bookings.append(winner['id'])
+
+            export = self.session.get(f"{API_BASE}/booking/export", stream=True)
+            stored = [row for row in map(json.loads, filter(None, export.iter_lines())) if row['kendaraan_id'] == vehicle_id]
+            vehicle = self.session.get(f"{API_BASE}/kendaraan/{vehicle_id}").json()
+            print(f"Stored bookings: {len(stored)}, vehicle status: {vehicle.get('status')}")
+
+            if len(stored) == 1 and vehicle.get('status') == 'Disewa':
+                print("✅ One booking stored and the vehicle is Disewa")
+                success_count += 1
+            else:
+                print("❌ Stored bookings or vehicle status inconsistent")
+        except Exception as e:
+            print(f"❌ Error testing concurrent booking: {str(e)}")
+
+        # A claim that fails after taking the car must hand it back
+        print("\n--- Testing Claim Is Released On Conflict ---")
+        try:
+            self.session.put(f"{API_BASE}/kendaraan/{vehicle_id}", json={"status": "Tersedia"})
+            response = self.session.post(f"{API_BASE}/booking", json={
+                "kendaraan_id": vehicle_id,
+                "nama_penyewa": "Penyewa Bentrok",
+                "no_hp": "081299999999",
+                "tanggal_sewa": (datetime.now() + timedelta(days=201)).isoformat(),
+                "durasi": 1,
+                "confirm_booking": True
+            })
+            vehicle = self.session.get(f"{API_BASE}/kendaraan/{vehicle_id}").json()
+            print(f"Status Code: {response.status_code}, vehicle status: {vehicle.get('status')}")
+
+            if response.status_code == 409 and vehicle.get('status') == 'Tersedia':
+                print("✅ Overlapping booking rejected and vehicle released")
+                success_count += 1
+            else:
+                print("❌ Vehicle not released after a failed reservation")
+        except Exception as e:
+            print(f"❌ Error testing claim release: {str(e)}")
+
+        print(f"\nConcurrent Booking Tests: {success_count}/3 passed")
+        return success_count >= 3
+
+    def read_events(self, events, stop, headers=None, **params):
+        """Collect ``(id, event, data)`` from /api/events until ``stop`` is set"""
+        with requests.Session() as session:
+            with session.get(f"{API_BASE}/events", params=params, headers=headers, stream=True, timeout=(5, 2)) as response:
+                event = {}
+                try:
+                    for line in response.iter_lines(decode_unicode=True):
+                        if line:
+                            field, _, value = line.partition(': ')
+                            event[field] = value
+                        elif 'data' in event:
+                            events.append((int(event['id']), event['event'], json.loads(event['data'])))
+                            event = {}
+                        if stop.is_set():
+                            return
+                except requests.exceptions.ConnectionError:
+                    # Read timeout between events; the test decides when to stop
+                    return
+
+    def test_live_updates(self):
+        """Test that vehicle status and booking changes are pushed over SSE"""
+        print("\n=== Testing Live Updates (SSE) ===")
+
+        success_count = 0
+        response = self.session.post(f"{API_BASE}/kendaraan", json={
+            "nama": "Suzuki Ertiga Live", "merek": "Suzuki", "plat_nomor": "PB 5151 LV",
+            "kategori": "MPV", "harga_harian": 350000, "harga_bulanan": 8500000,
+            "kapasitas": 7, "transmisi": "Manual", "bahan_bakar": "Bensin"
+        })
+        if response.status_code != 201:
+            print(f"❌ Could not create vehicle: {response.text}")
+            return False
+        vehicle_id = response.json()['id']
+        self.created_vehicles.append(vehicle_id)
+
+        print("\n--- Testing Diffs Are Pushed ---")
+        events, stop = [], threading.Event()
+        reader = threading.Thread(target=self.read_events, args=(events, stop))
+        reader.start()
+        try:
+            time.sleep(0.5)  # let the subscription register
+            self.session.put(f"{API_BASE}/kendaraan/{vehicle_id}", json={"status": "Perbaikan"})
+            self.session.put(f"{API_BASE}/kendaraan/{vehicle_id}", json={"deskripsi": "Bukan perubahan status"})
+            self.session.put(f"{API_BASE}/kendaraan/{vehicle_id}", json={"status": "Tersedia"})
+            booking = self.session.post(f"{API_BASE}/booking", json={
+                "kendaraan_id": vehicle_id,
+                "nama_penyewa": "Penyewa Live",
+                "no_hp": "081255556666",
+                "tanggal_sewa": (datetime.now() + timedelta(days=250)).isoformat(),
+                "durasi": 1
+            }).json()
+            self.created_bookings.append(booking['id'])
+
+            deadline = time.time() + 5
+            while time.time() < deadline and len(events) < 3:
+                time.sleep(0.1)
+        finally:
+            stop.set()
+            reader.join(timeout=5)
+
+        mine = [(kind, data) for _, kind, data in events if vehicle_id in (data.get('id'), data.get('kendaraan_id'))]
+        print(f"Events: {mine}")
+        expected = [
+            ('kendaraan', {'aksi': 'ubah', 'id': vehicle_id, 'status': 'Perbaikan'}),
+            ('kendaraan', {'aksi': 'ubah', 'id': vehicle_id, 'status': 'Tersedia'}),
+        ]
+        if mine[:2] == expected and len(mine) == 3 and mine[2][0] == 'booking' and mine[2][1]['id'] == booking['id']:
+            print("✅ Status changes and the new booking arrived as diffs, other edits were not pushed")
+            success_count += 1
+        else:
+            print("❌ Unexpected live events")
+
+        print("\n--- Testing Resume With Last-Event-ID ---")
+        try:
+            if events:
+                replayed, stop = [], threading.Event()
+                reader = threading.Thread(target=self.read_events, args=(replayed, stop),
+                                          kwargs={'headers': {'Last-Event-ID': str(events[0][0])}, 'topik': 'booking'})
+                reader.start()
+                deadline = time.time() + 3
+                while time.time() < deadline and not replayed:
+                    time.sleep(0.1)
+                stop.set()
+                reader.join(timeout=5)
+
+                if replayed and all(kind == 'booking' and event_id > events[0][0] for event_id, kind, _ in replayed):
+                    print(f"✅ Reconnect replayed {len(replayed)} missed booking event(s)")
+                    success_count += 1
+                else:
+                    print(f"❌ Unexpected replay: {replayed}")
+        except Exception as e:
+            print(f"❌ Error testing resume: {str(e)}")
+
+        print("\n--- Testing Invalid Topic ---")
+        try:
+            response = self.session.get(f"{API_BASE}/events", params={"topik": "gallery"})
+            if response.status_code == 400:
+                print(f"✅ Invalid topic rejected: {response.json()['error']}")
+                success_count += 1
+            else:
+                print(f"❌ Expected 400, got {response.status_code}")
+        except Exception as e:
+            print(f"❌ Error testing invalid topic: {str(e)}")
+
+        print(f"\nLive Update Tests: {success_count}/3 passed")
+        return success_count >= 3
+
     def test_gallery_management(self):
         """Test gallery management endpoints"""
         print("\n=== Testing Gallery Management ===")
@@ -352,49 +1079,833 @@ class RinoRentalAPITester:
         print(f"\nGallery Management Tests: {success_count}/3 passed")
         return success_count >= 2
 
-    def test_financial_reports(self):
-        """Test financial reporting endpoints"""
-        print("\n=== Testing Financial Reports ===")
-        
+    def test_conditional_get(self):
+        """Test ETag revalidation on catalog and gallery reads"""
+        print("\n=== Testing Conditional GET ===")
+
         success_count = 0
-        periods = ['1-hari', '7-hari', '1-bulan']
-        
-        for period in periods:
-            print(f"\n--- Testing Financial Report for {period} ---")
+
+        for resource in ['kendaraan', 'gallery']:
+            print(f"\n--- Testing {resource} ETag ---")
             try:
-                response = self.session.get(f"{API_BASE}/laporan-keuangan?periode={period}")
-                print(f"Status Code: {response.status_code}")
-                
-                if response.status_code == 200:
-                    report = response.json()
-                    print(f"✅ Retrieved financial report for {period}")
-                    print(f"   Total Pendapatan: Rp {report.get('total_pendapatan', 0):,}")
-                    print(f"   Total Transaksi: {report.get('total_transaksi', 0)}")
-                    print(f"   Rata-rata per Transaksi: Rp {report.get('rata_rata_per_transaksi', 0):,}")
+                first = self.session.get(f"{API_BASE}/{resource}")
+                etag = first.headers.get('ETag')
+                start = time.perf_counter()
+                repeat = self.session.get(f"{API_BASE}/{resource}", headers={"If-None-Match": etag})
+                repeat_ms = (time.perf_counter() - start) * 1000
+                print(f"ETag: {etag}, repeat: {repeat.status_code} ({len(repeat.content)} bytes in {repeat_ms:.1f} ms)")
+
+                if etag and repeat.status_code == 304:
+                    print(f"✅ {resource} revalidated with 304")
                     success_count += 1
                 else:
-                    print(f"❌ Failed to get financial report for {period}: {response.text}")
+                    print(f"❌ {resource} not revalidated: Expected 304, got {repeat.status_code}")
             except Exception as e:
-                print(f"❌ Error getting financial report for {period}: {str(e)}")
-        
-        # Test default period (no parameter)
-        print("\n--- Testing Default Financial Report ---")
-        try:
-            response = self.session.get(f"{API_BASE}/laporan-keuangan")
-            print(f"Status Code: {response.status_code}")
-            
-            if response.status_code == 200:
+                print(f"❌ Error testing {resource} ETag: {str(e)}")
+
+        # A write must change the tag
+        if self.created_vehicles:
+            print("\n--- Testing ETag Changes After Update ---")
+            try:
+                etag = self.session.get(f"{API_BASE}/kendaraan").headers.get('ETag')
+                self.session.put(f"{API_BASE}/kendaraan/{self.created_vehicles[0]}", json={"deskripsi": "Sudah selesai perbaikan"})
+                response = self.session.get(f"{API_BASE}/kendaraan", headers={"If-None-Match": etag})
+
+                if response.status_code == 200 and response.headers.get('ETag') != etag:
+                    print("✅ Update invalidated the kendaraan ETag")
+                    success_count += 1
+                else:
+                    print(f"❌ Stale ETag still accepted: {response.status_code}")
+            except Exception as e:
+                print(f"❌ Error testing ETag invalidation: {str(e)}")
+
+        # Repeat revalidations read the version from the in-process cache
+        print("\n--- Testing ETag Version Cache ---")
+        try:
+            etag = self.session.get(f"{API_BASE}/kendaraan").headers.get('ETag')
+            before = self.session.get(f"{API_BASE}/cache/stats").json().get('etag_versions', {})
+            statuses = [self.session.get(f"{API_BASE}/kendaraan", headers={"If-None-Match": etag}).status_code for _ in range(5)]
+            after = self.session.get(f"{API_BASE}/cache/stats").json().get('etag_versions', {})
+            hits = after.get('hits', 0) - before.get('hits', 0)
+            print(f"Statuses: {statuses}, version cache hits: {hits}")
+
+            if statuses.count(304) == 5 and hits >= 4:
+                print("✅ Conditional GETs answered from the cached version")
+                success_count += 1
+            else:
+                print("❌ Conditional GETs still read the version from MongoDB")
+        except Exception as e:
+            print(f"❌ Error testing ETag version cache: {str(e)}")
+
+        print(f"\nConditional GET Tests: {success_count}/4 passed")
+        return success_count >= 4
+
+    def test_image_store(self):
+        """Test content-addressed photo storage, thumbnails and caching"""
+        print("\n=== Testing Image Store ===")
+
+        success_count = 0
+        foto = "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDAAYEBQYFBAYGBQYHBwYIChAKCgkJChQODwwQFxQYGBcUFhYaHSUfGhsjHBYWICwgIyYnKSopGR8tMC0oMCUoKSj/2wBDAQcHBwoIChMKChMoGhYaKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCj/wAARCAABAAEDASIAAhEBAxEB/8QAFQABAQAAAAAAAAAAAAAAAAAAAAv/xAAUEAEAAAAAAAAAAAAAAAAAAAAA/8QAFQEBAQAAAAAAAAAAAAAAAAAAAAX/xAAUEQEAAAAAAAAAAAAAAAAAAAAA/9oADAMBAAIRAxEAPwCdABmX/9k="
+
+        # Test upload replaces base64 with short URLs
+        print("\n--- Testing Upload Returns Image URLs ---")
+        urls = []
+        try:
+            for judul in ["Avanza Tampak Depan", "Avanza Tampak Depan (duplikat)"]:
+                response = self.session.post(f"{API_BASE}/gallery", json={"judul": judul, "foto": foto})
+                if response.status_code == 201:
+                    item = response.json()
+                    self.created_gallery.append(item['id'])
+                    urls.append((item['foto'], item.get('foto_thumb')))
+
+            if len(urls) == 2 and urls[0][0].startswith('/api/images/') and urls[0][1]:
+                print(f"✅ Photo stored as {urls[0][0]}")
+                success_count += 1
+            else:
+                print(f"❌ Photo not moved to image store: {urls}")
+        except Exception as e:
+            print(f"❌ Error uploading photo: {str(e)}")
+
+        # Test duplicate uploads share one hash
+        print("\n--- Testing Duplicate Deduplication ---")
+        if len(urls) == 2 and urls[0] == urls[1]:
+            print("✅ Duplicate upload resolved to the same image")
+            success_count += 1
+        else:
+            print(f"❌ Duplicate upload produced different URLs: {urls}")
+
+        # Test image bytes are served with immutable caching
+        if urls:
+            print("\n--- Testing Image Streaming and Caching ---")
+            try:
+                for url in urls[0]:
+                    response = self.session.get(f"{BASE_URL}{url}")
+                    cache_control = response.headers.get('Cache-Control', '')
+                    print(f"{url}: {response.status_code}, {len(response.content)} bytes, {response.headers.get('Content-Type')}")
+
+                    if response.status_code != 200 or 'immutable' not in cache_control:
+                        print(f"❌ Image not served with immutable cache headers: {cache_control}")
+                        break
+                    if response.headers.get('X-Content-Type-Options') != 'nosniff':
+                        print("❌ Image served without X-Content-Type-Options: nosniff")
+                        break
+
+                    revalidate = self.session.get(f"{BASE_URL}{url}", headers={"If-None-Match": response.headers.get('ETag')})
+                    if revalidate.status_code != 304:
+                        print(f"❌ Conditional request not answered with 304: {revalidate.status_code}")
+                        break
+                else:
+                    print("✅ Images streamed with immutable cache headers and 304 revalidation")
+                    success_count += 1
+            except Exception as e:
+                print(f"❌ Error fetching image: {str(e)}")
+
+        # SVG and HTML would run as documents on the API origin
+        print("\n--- Testing Non-Raster Uploads Rejected ---")
+        try:
+            svg = "data:image/svg+xml;base64," + base64.b64encode(b'<svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>').decode()
+            html = "data:text/html;base64," + base64.b64encode(b'<script>alert(1)</script>').decode()
+            statuses = [self.session.post(f"{API_BASE}/gallery", json={"judul": "Bukan Foto", "foto": foto_}).status_code
+                        for foto_ in (svg, html)]
+
+            if statuses == [400, 400]:
+                print("✅ SVG and HTML uploads rejected")
+                success_count += 1
+            else:
+                print(f"❌ Expected 400s, got {statuses}")
+        except Exception as e:
+            print(f"❌ Error testing non-raster uploads: {str(e)}")
+
+        # Identical uploads sent at once must still be stored once
+        print("\n--- Testing Concurrent Identical Uploads ---")
+        try:
+            payload = b'GIF89a' + os.urandom(64)
+            fresh = "data:image/gif;base64," + base64.b64encode(payload).decode()
+
+            def upload(i):
+                return self.session.post(f"{API_BASE}/gallery", json={"judul": f"Serentak {i}", "foto": fresh})
+
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                responses = list(pool.map(upload, range(8)))
+            created = [response.json() for response in responses if response.status_code == 201]
+            self.created_gallery.extend(item['id'] for item in created)
+            urls_seen = {item['foto'] for item in created}
+
+            # With direct database access, also count the stored originals
+            stored = None
+            if MongoClient is not None and len(urls_seen) == 1:
+                db = MongoClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))[os.environ.get('DB_NAME')]
+                image_hash = next(iter(urls_seen)).rsplit('/', 1)[-1]
+                stored = db['images.files'].count_documents({'filename': image_hash})
+            print(f"Uploads: {len(created)}/8 created, distinct URLs: {len(urls_seen)}, stored files: {stored}")
+
+            if len(created) == 8 and len(urls_seen) == 1 and stored in (None, 1):
+                print("✅ Concurrent identical uploads deduplicated")
+                success_count += 1
+            else:
+                print("❌ Concurrent uploads failed or stored duplicates")
+        except Exception as e:
+            print(f"❌ Error testing concurrent uploads: {str(e)}")
+
+        print(f"\nImage Store Tests: {success_count}/5 passed")
+        return success_count >= 5
+
+    def test_financial_reports(self):
+        """Test financial reporting endpoints"""
+        print("\n=== Testing Financial Reports ===")
+        
+        success_count = 0
+        periods = ['1-hari', '7-hari', '1-bulan']
+        
+        for period in periods:
+            print(f"\n--- Testing Financial Report for {period} ---")
+            try:
+                response = self.session.get(f"{API_BASE}/laporan-keuangan?periode={period}")
+                print(f"Status Code: {response.status_code}")
+                
+                if response.status_code == 200:
+                    report = response.json()
+                    print(f"✅ Retrieved financial report for {period}")
+                    print(f"   Total Pendapatan: Rp {report.get('total_pendapatan', 0):,}")
+                    print(f"   Total Transaksi: {report.get('total_transaksi', 0)}")
+                    print(f"   Rata-rata per Transaksi: Rp {report.get('rata_rata_per_transaksi', 0):,}")
+                    success_count += 1
+                else:
+                    print(f"❌ Failed to get financial report for {period}: {response.text}")
+            except Exception as e:
+                print(f"❌ Error getting financial report for {period}: {str(e)}")
+        
+        # Test default period (no parameter)
+        print("\n--- Testing Default Financial Report ---")
+        try:
+            response = self.session.get(f"{API_BASE}/laporan-keuangan")
+            print(f"Status Code: {response.status_code}")
+            
+            if response.status_code == 200:
                 report = response.json()
                 print(f"✅ Retrieved default financial report")
                 print(f"   Period: {report.get('periode', 'unknown')}")
                 success_count += 1
             else:
-                print(f"❌ Failed to get default financial report: {response.text}")
+                print(f"❌ Failed to get default financial report: {response.text}")
+        except Exception as e:
+            print(f"❌ Error getting default financial report: {str(e)}")
+        
+        # Test custom date range with paginated detail
+        print("\n--- Testing Custom Range Financial Report ---")
+        today = datetime.now().date()
+        range_params = {
+            "from": (today - timedelta(days=30)).isoformat(),
+            "to": today.isoformat(),
+            "detail": "true",
+            "limit": 5
+        }
+        try:
+            response = self.session.get(f"{API_BASE}/laporan-keuangan", params=range_params)
+            print(f"Status Code: {response.status_code}")
+
+            if response.status_code == 200:
+                report = response.json()
+                daily_total = sum(day['pendapatan'] for day in report.get('pendapatan_harian', []))
+                if daily_total == report.get('total_pendapatan') and len(report.get('detail_booking', [])) <= 5:
+                    print(f"✅ Custom range report: Rp {report['total_pendapatan']:,} over {len(report['pendapatan_harian'])} days")
+                    success_count += 1
+                else:
+                    print(f"❌ Daily buckets ({daily_total}) do not add up to total ({report.get('total_pendapatan')})")
+            else:
+                print(f"❌ Failed to get custom range report: {response.text}")
+        except Exception as e:
+            print(f"❌ Error getting custom range report: {str(e)}")
+
+        # Test detail_booking is omitted unless requested
+        print("\n--- Testing Report Without Detail ---")
+        try:
+            response = self.session.get(f"{API_BASE}/laporan-keuangan", params={"periode": "1-bulan"})
+            if response.status_code == 200 and 'detail_booking' not in response.json():
+                print(f"✅ Report without detail: {len(response.content):,} bytes")
+                success_count += 1
+            else:
+                print(f"❌ detail_booking returned without being requested")
+        except Exception as e:
+            print(f"❌ Error getting report without detail: {str(e)}")
+
+        # Test invalid range
+        print("\n--- Testing Invalid Range ---")
+        try:
+            response = self.session.get(f"{API_BASE}/laporan-keuangan", params={"from": "2024-02-01", "to": "2024-01-01"})
+            print(f"Status Code: {response.status_code}")
+
+            if response.status_code == 400:
+                print(f"✅ Invalid range rejected: {response.json()['error']}")
+                success_count += 1
+            else:
+                print(f"❌ Invalid range not rejected: Expected 400, got {response.status_code}")
+        except Exception as e:
+            print(f"❌ Error testing invalid range: {str(e)}")
+
+        print(f"\nFinancial Reports Tests: {success_count}/7 passed")
+        return success_count >= 6
+
+    def test_revenue_rollup(self):
+        """Test the daily revenue rollup follows booking status changes"""
+        print("\n=== Testing Revenue Rollup ===")
+
+        if not self.created_bookings:
+            print("❌ No bookings available for rollup test")
+            return False
+
+        success_count = 0
+        booking_id = self.created_bookings[0]
+
+        def report_total():
+            report = self.session.get(f"{API_BASE}/laporan-keuangan", params={"periode": "1-hari"}).json()
+            return report['total_pendapatan'], report['total_transaksi']
+
+        # Rebuild first so rollup matches data written before it existed
+        print("\n--- Testing Rollup Rebuild ---")
+        try:
+            with admin_auth(self.session) as auth:
+                response = self.session.post(f"{API_BASE}/laporan-keuangan/rebuild", headers=auth)
+            print(f"Status Code: {response.status_code}")
+
+            if response.status_code == 200:
+                print(f"✅ Rollup rebuilt: {response.json()['hari']} days")
+                success_count += 1
+            else:
+                print(f"❌ Rollup rebuild failed: {response.text}")
+        except Exception as e:
+            print(f"❌ Error rebuilding rollup: {str(e)}")
+
+        # Confirming a booking adds its price to today's bucket
+        print("\n--- Testing Confirm Booking Updates Rollup ---")
+        try:
+            before_total, before_count = report_total()
+            response = self.session.put(f"{API_BASE}/booking/{booking_id}", json={"status": "Dikonfirmasi"})
+            booking = response.json()
+            after_total, after_count = report_total()
+            print(f"Total: Rp {before_total:,} -> Rp {after_total:,}, transaksi {before_count} -> {after_count}")
+
+            if response.status_code == 200 and after_total - before_total == booking['total_harga'] and after_count == before_count + 1:
+                print("✅ Rollup incremented on confirmation")
+                success_count += 1
+            else:
+                print(f"❌ Rollup not incremented: {response.text}")
+
+            # Cancelling takes it back out
+            self.session.put(f"{API_BASE}/booking/{booking_id}", json={"status": "Dibatalkan"})
+            if report_total() == (before_total, before_count):
+                print("✅ Rollup decremented on cancellation")
+                success_count += 1
+            else:
+                print("❌ Rollup not decremented on cancellation")
+        except Exception as e:
+            print(f"❌ Error testing rollup updates: {str(e)}")
+
+        # Consistency check against a full recomputation
+        print("\n--- Testing Rollup Consistency ---")
+        try:
+            response = self.session.get(f"{API_BASE}/laporan-keuangan/verify")
+            result = response.json()
+            print(f"Days checked: {result.get('hari_diperiksa')}")
+
+            if response.status_code == 200 and result.get('konsisten'):
+                print("✅ Rollup consistent with booking collection")
+                success_count += 1
+            else:
+                print(f"❌ Rollup mismatch: {result.get('selisih')}")
+        except Exception as e:
+            print(f"❌ Error verifying rollup: {str(e)}")
+
+        print(f"\nRevenue Rollup Tests: {success_count}/4 passed")
+        return success_count >= 4
+
+    def test_booking_delete(self):
+        """Test DELETE /api/booking/{id}: revenue, freed dates and 404s"""
+        print("\n=== Testing Booking Delete ===")
+
+        if not self.created_vehicles:
+            print("❌ No vehicles available for booking delete test")
+            return False
+
+        success_count = 0
+        booking_data = {
+            "kendaraan_id": self.created_vehicles[-1],
+            "nama_penyewa": "Maria Wonda",
+            "no_hp": "081355554444",
+            "tanggal_sewa": (datetime.now() + timedelta(days=90)).isoformat(),
+            "durasi": 2,
+            "tipe_sewa": "harian"
+        }
+
+        def report_total():
+            report = self.session.get(f"{API_BASE}/laporan-keuangan", params={"periode": "1-hari"}).json()
+            return report['total_pendapatan'], report['total_transaksi']
+
+        print("\n--- Testing Delete Reverses Revenue ---")
+        booking_id = None
+        try:
+            created = self.session.post(f"{API_BASE}/booking", json=booking_data)
+            booking = created.json()
+            booking_id = booking.get('id')
+            self.session.put(f"{API_BASE}/booking/{booking_id}", json={"status": "Dikonfirmasi"})
+            before = report_total()
+            response = self.session.delete(f"{API_BASE}/booking/{booking_id}")
+            after = report_total()
+            print(f"Status Code: {response.status_code}, report {before} -> {after}")
+
+            expected = (before[0] - booking.get('total_harga', 0), before[1] - 1)
+            if created.status_code == 201 and response.status_code == 200 and after == expected:
+                print(f"✅ Booking deleted: {response.json()['message']}")
+                success_count += 1
+            else:
+                print(f"❌ Delete failed or left revenue behind: {response.text}")
+                if booking_id:
+                    self.created_bookings.append(booking_id)
+        except Exception as e:
+            print(f"❌ Error deleting booking: {str(e)}")
+
+        print("\n--- Testing Deleted Booking Frees Its Dates ---")
+        try:
+            rebooked = self.session.post(f"{API_BASE}/booking", json=booking_data)
+            print(f"Status Code: {rebooked.status_code}")
+            if rebooked.status_code == 201:
+                self.created_bookings.append(rebooked.json()['id'])
+                print("✅ Same dates bookable again")
+                success_count += 1
+            else:
+                print(f"❌ Dates still taken: {rebooked.text}")
+        except Exception as e:
+            print(f"❌ Error rebooking: {str(e)}")
+
+        print("\n--- Testing Delete of Unknown Booking ---")
+        try:
+            again = self.session.delete(f"{API_BASE}/booking/{booking_id or 'non-existent-id'}")
+            print(f"Status Code: {again.status_code}")
+            if again.status_code == 404:
+                print(f"✅ Unknown booking rejected: {again.json()['error']}")
+                success_count += 1
+            else:
+                print(f"❌ Expected 404, got {again.status_code}")
+        except Exception as e:
+            print(f"❌ Error testing unknown booking delete: {str(e)}")
+
+        print(f"\nBooking Delete Tests: {success_count}/3 passed")
+        return success_count >= 3
+
+    def test_bulk_endpoints(self):
+        """Test NDJSON bulk import and bulk status updates with per-row results"""
+        print("\n=== Testing Bulk Endpoints ===")
+
+        success_count = 0
+        vehicle_ids = []
+
+        # One invalid row must not sink the rest of the batch
+        print("\n--- Testing Bulk Kendaraan Import (NDJSON) ---")
+        try:
+            rows = [
+                {
+                    "nama": f"Bulk Xenia {i + 1}",
+                    "merek": "Daihatsu",
+                    "plat_nomor": f"PB {8100 + i} BK",
+                    "kategori": "MPV",
+                    "harga_harian": 300000,
+                    "harga_bulanan": 7500000,
+                    "kapasitas": 7,
+                    "transmisi": "Manual",
+                    "bahan_bakar": "Bensin"
+                }
+                for i in range(3)
+            ]
+            rows.insert(1, {"nama": "Tanpa Merek"})
+            body = "\n".join(json.dumps(row) for row in rows) + "\nbukan json\n"
+
+            response = self.session.post(
+                f"{API_BASE}/kendaraan/bulk",
+                data=body,
+                headers={"Content-Type": "application/x-ndjson"}
+            )
+            print(f"Status Code: {response.status_code}")
+            result = response.json()
+            statuses = [row['status'] for row in result.get('hasil', [])]
+            print(f"Result: {result.get('berhasil')} berhasil, {result.get('gagal')} gagal, {statuses}")
+
+            vehicle_ids = [row['id'] for row in result.get('hasil', []) if row['status'] == 'ok']
+            self.created_vehicles.extend(vehicle_ids)
+
+            if response.status_code == 200 and statuses == ['ok', 'error', 'ok', 'ok', 'error']:
+                print("✅ Bulk import reports each row")
+                success_count += 1
+            else:
+                print(f"❌ Unexpected bulk import result: {response.text}")
+        except Exception as e:
+            print(f"❌ Error testing bulk kendaraan import: {str(e)}")
+
+        print("\n--- Testing Bulk Booking Import (JSON array) ---")
+        booking_ids = []
+        try:
+            rows = [
+                {
+                    "kendaraan_id": vehicle_id,
+                    "nama_penyewa": "Bulk Penyewa",
+                    "no_hp": "081234567890",
+                    "tanggal_sewa": (datetime.now() + timedelta(days=90 + i * 10)).isoformat(),
+                    "durasi": 2,
+                    "total_harga": 600000
+                }
+                for i, vehicle_id in enumerate(vehicle_ids)
+            ]
+            rows.append({**rows[0], "tanggal_sewa": "bukan tanggal"})
+
+            response = self.session.post(f"{API_BASE}/booking/bulk", json=rows)
+            result = response.json()
+            booking_ids = [row['id'] for row in result.get('hasil', []) if row['status'] == 'ok']
+            print(f"Result: {result.get('berhasil')} berhasil, {result.get('gagal')} gagal")
+
+            if response.status_code == 200 and result.get('berhasil') == len(vehicle_ids) and result.get('gagal') == 1:
+                print("✅ Bulk booking import validated rows individually")
+                success_count += 1
+            else:
+                print(f"❌ Unexpected bulk booking result: {response.text}")
+        except Exception as e:
+            print(f"❌ Error testing bulk booking import: {str(e)}")
+
+        print("\n--- Testing Bulk Status Update ---")
+        try:
+            rows = [{"id": booking_id, "status": "Dikonfirmasi"} for booking_id in booking_ids]
+            rows.append({"id": str(uuid.uuid4()), "status": "Dikonfirmasi"})
+            rows.append({"id": booking_ids[0] if booking_ids else "x", "status": "Hilang"})
+
+            response = self.session.post(f"{API_BASE}/booking/bulk-status", json=rows)
+            result = response.json()
+            print(f"Result: {result.get('berhasil')} berhasil, {result.get('gagal')} gagal")
+
+            verify = self.session.get(f"{API_BASE}/laporan-keuangan/verify").json()
+
+            if response.status_code == 200 and result.get('berhasil') == len(booking_ids) and result.get('gagal') == 2 and verify.get('konsisten'):
+                print("✅ Bulk status update applied and rollup stays consistent")
+                success_count += 1
+            else:
+                print(f"❌ Unexpected bulk status result: {response.text}")
+
+            # Cancel again so later revenue assertions start from a clean slate
+            self.session.post(
+                f"{API_BASE}/booking/bulk-status",
+                json=[{"id": booking_id, "status": "Dibatalkan"} for booking_id in booking_ids]
+            )
+        except Exception as e:
+            print(f"❌ Error testing bulk status update: {str(e)}")
+
+        print(f"\nBulk Endpoint Tests: {success_count}/3 passed")
+        return success_count >= 3
+
+    def test_streaming_export(self):
+        """Test the streaming NDJSON/CSV booking and laporan exports"""
+        print("\n=== Testing Streaming Export ===")
+
+        success_count = 0
+
+        print("\n--- Testing NDJSON Export ---")
+        try:
+            response = self.session.get(f"{API_BASE}/booking/export", stream=True)
+            print(f"Status Code: {response.status_code}, Content-Type: {response.headers.get('Content-Type')}")
+            rows = [json.loads(line) for line in response.iter_lines() if line]
+            ids = {row['id'] for row in rows}
+            created = [row['created_at'] for row in rows]
+
+            if (response.status_code == 200 and set(self.created_bookings) <= ids
+                    and created == sorted(created) and all('_id' not in row for row in rows)):
+                print(f"✅ NDJSON export streamed {len(rows)} bookings in created_at order")
+                success_count += 1
+            else:
+                print("❌ NDJSON export incomplete or out of order")
+        except Exception as e:
+            print(f"❌ Error testing NDJSON export: {str(e)}")
+
+        print("\n--- Testing CSV Export With Filters ---")
+        try:
+            today = datetime.now().strftime('%Y-%m-%d')
+            response = self.session.get(
+                f"{API_BASE}/booking/export",
+                params={"format": "csv", "status": "Pending,Dibatalkan", "from": today, "to": today},
+                stream=True
+            )
+            reader = csv.DictReader(io.StringIO(response.content.decode('utf-8')))
+            rows = list(reader)
+            statuses = {row['status'] for row in rows}
+            print(f"Rows: {len(rows)}, statuses: {statuses}")
+
+            if (response.status_code == 200 and 'attachment' in response.headers.get('Content-Disposition', '')
+                    and reader.fieldnames and reader.fieldnames[0] == 'id' and statuses <= {'Pending', 'Dibatalkan'}):
+                print("✅ CSV export honours status and date filters")
+                success_count += 1
+            else:
+                print(f"❌ CSV export unexpected: {reader.fieldnames}")
+        except Exception as e:
+            print(f"❌ Error testing CSV export: {str(e)}")
+
+        # Laporan export must list exactly the bookings behind the report total;
+        # totals include archived bookings, so the export has to as well
+        print("\n--- Testing Laporan Export Matches Report ---")
+        try:
+            report = self.session.get(f"{API_BASE}/laporan-keuangan", params={"periode": "1-bulan"}).json()
+            response = self.session.get(
+                f"{API_BASE}/laporan-keuangan/export", params={"periode": "1-bulan", "arsip": "true"}, stream=True
+            )
+            rows = [json.loads(line) for line in response.iter_lines() if line]
+            total = sum(row['total_harga'] for row in rows)
+            print(f"Report: Rp {report['total_pendapatan']:,} / {report['total_transaksi']}, export: Rp {total:,} / {len(rows)}")
+
+            if response.status_code == 200 and total == report['total_pendapatan'] and len(rows) == report['total_transaksi']:
+                print("✅ Laporan export matches report totals")
+                success_count += 1
+            else:
+                print("❌ Laporan export does not match report")
+        except Exception as e:
+            print(f"❌ Error testing laporan export: {str(e)}")
+
+        print("\n--- Testing Invalid Export Parameters ---")
+        try:
+            bad_format = self.session.get(f"{API_BASE}/booking/export", params={"format": "xlsx"})
+            bad_status = self.session.get(f"{API_BASE}/booking/export", params={"status": "Hilang"})
+
+            if bad_format.status_code == 400 and bad_status.status_code == 400:
+                print("✅ Invalid format and status rejected")
+                success_count += 1
+            else:
+                print(f"❌ Expected 400s, got {bad_format.status_code} and {bad_status.status_code}")
+        except Exception as e:
+            print(f"❌ Error testing invalid export parameters: {str(e)}")
+
+        print(f"\nStreaming Export Tests: {success_count}/4 passed")
+        return success_count >= 4
+
+    def test_archival(self):
+        """Test old Selesai bookings move to booking_archive and stay reachable with arsip=true"""
+        print("\n=== Testing Booking Archival ===")
+
+        if not self.created_vehicles:
+            print("❌ No vehicles available for archival test")
+            return False
+
+        success_count = 0
+        booking_ids = []
+
+        def export_ids(path, **params):
+            response = self.session.get(f"{API_BASE}{path}", params=params, stream=True)
+            return response.status_code, [json.loads(line)['id'] for line in response.iter_lines() if line]
+
+        def report_total():
+            report = self.session.get(f"{API_BASE}/laporan-keuangan", params={"periode": "1-hari"}).json()
+            return report['total_pendapatan'], report['total_transaksi']
+
+        # Rentals that ended about two years ago, well past the archive age
+        print("\n--- Testing Archive Old Completed Bookings ---")
+        try:
+            rows = [
+                {
+                    "kendaraan_id": self.created_vehicles[0],
+                    "nama_penyewa": "Arsip Penyewa",
+                    "no_hp": "081234567890",
+                    "tanggal_sewa": (datetime.now() - timedelta(days=730 + i * 10)).isoformat(),
+                    "durasi": 2,
+                    "status": "Selesai"
+                }
+                for i in range(3)
+            ]
+            imported = self.session.post(f"{API_BASE}/booking/bulk", json=rows).json()
+            booking_ids = [row['id'] for row in imported.get('hasil', []) if row['status'] == 'ok']
+            before = report_total()
+
+            with admin_auth(self.session) as auth:
+                response = self.session.post(f"{API_BASE}/booking/arsip", params={"umur_hari": 365}, headers=auth)
+            result = response.json()
+            print(f"Status Code: {response.status_code}, {result.get('message')}")
+            _, hot_ids = export_ids("/booking/export")
+
+            if (response.status_code == 200 and len(booking_ids) == 3 and result.get('dipindahkan', 0) >= 3
+                    and not set(booking_ids) & set(hot_ids)):
+                print("✅ Old Selesai bookings moved out of the booking collection")
+                success_count += 1
+            else:
+                print(f"❌ Archival did not move the bookings: {response.text}")
+
+            if report_total() == before:
+                print("✅ Report totals unchanged by archival")
+                success_count += 1
+            else:
+                print(f"❌ Report totals changed: {before} -> {report_total()}")
+        except Exception as e:
+            print(f"❌ Error testing archival: {str(e)}")
+
+        print("\n--- Testing Archived Bookings With arsip=true ---")
+        try:
+            status_code, all_ids = export_ids("/booking/export", arsip="true")
+            laporan = self.session.get(
+                f"{API_BASE}/laporan-keuangan", params={"periode": "1-hari", "detail": "true", "limit": 100, "arsip": "true"}
+            ).json()
+            detail_ids = {row['id'] for row in laporan.get('detail_booking', [])}
+            _, laporan_ids = export_ids("/laporan-keuangan/export", periode="1-hari", arsip="true")
+            print(f"Export rows: {len(all_ids)}, laporan detail rows: {len(detail_ids)}")
+
+            if (status_code == 200 and set(booking_ids) <= set(all_ids) and len(all_ids) == len(set(all_ids))
+                    and set(booking_ids) <= set(laporan_ids)
+                    and (laporan.get('detail_next_cursor') or set(booking_ids) <= detail_ids)):
+                print("✅ Archived bookings returned by export and report detail")
+                success_count += 1
+            else:
+                print("❌ Archived bookings missing with arsip=true")
+        except Exception as e:
+            print(f"❌ Error testing arsip=true reads: {str(e)}")
+
+        # Rebuild and verify read the archive too
+        print("\n--- Testing Rollup Rebuild Includes Archive ---")
+        try:
+            before = report_total()
+            with admin_auth(self.session) as auth:
+                self.session.post(f"{API_BASE}/laporan-keuangan/rebuild", headers=auth)
+            verify = self.session.get(f"{API_BASE}/laporan-keuangan/verify").json()
+
+            if verify.get('konsisten') and report_total() == before:
+                print("✅ Rebuilt rollup still counts archived bookings")
+                success_count += 1
+            else:
+                print(f"❌ Rollup mismatch after rebuild: {verify.get('selisih')}")
+        except Exception as e:
+            print(f"❌ Error testing rebuild with archive: {str(e)}")
+
+        print("\n--- Testing Invalid Archive Parameters ---")
+        try:
+            bad_arsip = self.session.get(f"{API_BASE}/booking/export", params={"arsip": "ya"})
+            with admin_auth(self.session) as auth:
+                bad_umur = self.session.post(f"{API_BASE}/booking/arsip", params={"umur_hari": 0}, headers=auth)
+            anonymous = self.session.post(f"{API_BASE}/booking/arsip", params={"umur_hari": 365})
+
+            if bad_arsip.status_code == 400 and bad_umur.status_code == 400 and anonymous.status_code == 401:
+                print("✅ Invalid arsip and umur_hari rejected, anonymous archive refused")
+                success_count += 1
+            else:
+                print(f"❌ Expected 400, 400, 401, got {bad_arsip.status_code}, {bad_umur.status_code} and {anonymous.status_code}")
+        except Exception as e:
+            print(f"❌ Error testing invalid archive parameters: {str(e)}")
+
+        print(f"\nArchival Tests: {success_count}/5 passed")
+        return success_count >= 5
+
+    def fetch_wire(self, path, encoding='identity', **params):
+        """GET ``path`` and return (response, wire bytes, decoded body, parse ms)"""
+        response = self.session.get(f"{API_BASE}{path}", params=params, headers={"Accept-Encoding": encoding}, stream=True)
+        wire = response.raw.read(decode_content=False)
+        start = time.perf_counter()
+        content_encoding = response.headers.get('Content-Encoding')
+        if content_encoding == 'gzip':
+            raw = zlib.decompress(wire, 16 + zlib.MAX_WBITS)
+        elif content_encoding == 'br':
+            raw = brotli.decompress(wire) if brotli else None
+        else:
+            raw = wire
+        body = json.loads(raw) if raw is not None else None
+        # Columnar tables are rebuilt into records so both formats are timed
+        # up to the same result
+        if params.get('format') == 'columnar' and isinstance(body, dict):
+            body = {key: [dict(zip(value['kolom'], row)) for row in value['baris']]
+                    if isinstance(value, dict) and 'kolom' in value else value
+                    for key, value in body.items()}
+        return response, len(wire), body, (time.perf_counter() - start) * 1000
+
+    def test_compression(self):
+        """Test negotiated compression and the columnar format, reporting wire bytes and parse time"""
+        print("\n=== Testing Compression And Columnar Format ===")
+
+        success_count = 0
+        endpoints = [
+            ('/booking', {'limit': 100}),
+            ('/kendaraan', {'limit': 100}),
+            ('/laporan-keuangan', {'periode': '1-bulan', 'detail': 'true', 'limit': 100}),
+        ]
+        variants = [('json', 'identity'), ('json', 'gzip'), ('json', 'br'), ('columnar', 'identity'), ('columnar', 'gzip')]
+
+        print("\n--- Bytes On The Wire ---")
+        print(f"{'endpoint':<20} {'format':<9} {'encoding':<9} {'bytes':>9} {'parse ms':>9}")
+        compressed_ok = True
+        for path, params in endpoints:
+            sizes = {}
+            for fmt, encoding in variants:
+                if encoding == 'br' and brotli is None:
+                    continue
+                query = dict(params, format=fmt) if fmt == 'columnar' else params
+                try:
+                    response, size, _, parse_ms = self.fetch_wire(path, encoding, **query)
+                    sizes[(fmt, encoding)] = (size, response.headers.get('Content-Encoding'))
+                    print(f"{path:<20} {fmt:<9} {encoding:<9} {size:>9,} {parse_ms:>9.2f}")
+                except Exception as e:
+                    print(f"❌ Error fetching {path} as {fmt}/{encoding}: {str(e)}")
+                    compressed_ok = False
+            identity = sizes.get(('json', 'identity'), (0, None))[0]
+            gzipped = sizes.get(('json', 'gzip'))
+            if identity >= 1024 and not (gzipped and gzipped[1] == 'gzip' and gzipped[0] < identity):
+                print(f"❌ {path} was not gzip-compressed")
+                compressed_ok = False
+
+        if compressed_ok:
+            print("✅ Large responses compressed as negotiated")
+            success_count += 1
+
+        print("\n--- Testing Small Responses Stay Uncompressed ---")
+        try:
+            response, _, _, _ = self.fetch_wire('/', 'gzip')
+            if response.headers.get('Content-Encoding') is None and 'Accept-Encoding' in response.headers.get('Vary', ''):
+                print("✅ Small response sent as-is with Vary: Accept-Encoding")
+                success_count += 1
+            else:
+                print(f"❌ Unexpected headers: {dict(response.headers)}")
+        except Exception as e:
+            print(f"❌ Error testing small response: {str(e)}")
+
+        print("\n--- Testing Columnar Round Trip ---")
+        try:
+            _, _, rows, _ = self.fetch_wire('/booking', 'gzip', limit=50)
+            _, _, columnar, _ = self.fetch_wire('/booking', 'gzip', limit=50, format='columnar')
+            restored = [{key: value for key, value in row.items() if value is not None} for row in columnar['data']]
+            expected = [{key: value for key, value in row.items() if value is not None} for row in rows['data']]
+
+            if restored == expected and columnar.get('next_cursor') == rows.get('next_cursor'):
+                print(f"✅ Columnar page of {len(restored)} rows matches the row format")
+                success_count += 1
+            else:
+                print("❌ Columnar rows differ from the row format")
+        except Exception as e:
+            print(f"❌ Error testing columnar round trip: {str(e)}")
+
+        # Empty tables keep the columnar shape, so clients need no special case
+        print("\n--- Testing Empty Columnar Tables ---")
+        try:
+            response = self.session.get(f"{API_BASE}/laporan-keuangan", params={
+                "from": "2000-01-01", "to": "2000-01-01", "detail": "true", "format": "columnar"
+            })
+            body = response.json()
+            empty = {"kolom": [], "baris": []}
+
+            if response.status_code == 200 and body.get('pendapatan_harian') == empty and body.get('detail_booking') == empty:
+                print("✅ Empty report tables returned as kolom/baris")
+                success_count += 1
+            else:
+                print(f"❌ Empty tables not columnar: {response.text[:200]}")
         except Exception as e:
-            print(f"❌ Error getting default financial report: {str(e)}")
-        
-        print(f"\nFinancial Reports Tests: {success_count}/4 passed")
-        return success_count >= 3
+            print(f"❌ Error testing empty columnar tables: {str(e)}")
+
+        print("\n--- Testing Invalid Format ---")
+        try:
+            response = self.session.get(f"{API_BASE}/booking", params={"format": "xml"})
+            if response.status_code == 400:
+                print(f"✅ Invalid format rejected: {response.json()['error']}")
+                success_count += 1
+            else:
+                print(f"❌ Expected 400, got {response.status_code}")
+        except Exception as e:
+            print(f"❌ Error testing invalid format: {str(e)}")
+
+        print(f"\nCompression Tests: {success_count}/5 passed")
+        return success_count >= 5
 
     def test_admin_authentication(self):
         """Test admin authentication endpoints"""
@@ -468,6 +1979,62 @@ class RinoRentalAPITester:
         print(f"\nAdmin Authentication Tests: {success_count}/3 passed")
         return success_count >= 2
 
+    def test_session_cache(self):
+        """Test cached admin session validation and logout invalidation"""
+        print("\n=== Testing Admin Session Cache ===")
+
+        success_count = 0
+
+        try:
+            session = self.session.post(f"{API_BASE}/admin/login", json={"username": "admin", "password": "admin123"}).json()
+            auth = {"Authorization": f"Bearer {session['id']}"}
+
+            print("\n--- Testing Session Validation Hits The Cache ---")
+            before = self.session.get(f"{API_BASE}/cache/stats").json()['admin_sessions']
+            responses = [self.session.get(f"{API_BASE}/admin/session", headers=auth) for _ in range(5)]
+            after = self.session.get(f"{API_BASE}/cache/stats").json()['admin_sessions']
+            print(f"Hits {before['hits']} -> {after['hits']}, misses {before['misses']} -> {after['misses']}")
+
+            if all(r.status_code == 200 and r.json()['id'] == session['id'] for r in responses) and after['hits'] - before['hits'] == 5:
+                print("✅ Session validated from cache without DB round trips")
+                success_count += 1
+            else:
+                print(f"❌ Session validation not served from cache: {[r.status_code for r in responses]}")
+
+            print("\n--- Testing Logout Invalidates Immediately ---")
+            self.session.post(f"{API_BASE}/admin/logout", headers=auth)
+            response = self.session.get(f"{API_BASE}/admin/session", headers=auth)
+            print(f"Status Code after logout: {response.status_code}")
+
+            if response.status_code == 401:
+                print("✅ Logged-out session rejected")
+                success_count += 1
+            else:
+                print("❌ Logged-out session still accepted")
+
+            print("\n--- Testing Missing And Unknown Sessions ---")
+            missing = self.session.get(f"{API_BASE}/admin/session")
+            unknown = self.session.get(f"{API_BASE}/admin/session", headers={"Authorization": f"Bearer {uuid.uuid4()}"})
+
+            if missing.status_code == 401 and unknown.status_code == 401:
+                print("✅ Missing and unknown sessions rejected")
+                success_count += 1
+            else:
+                print(f"❌ Expected 401s, got {missing.status_code} and {unknown.status_code}")
+
+            print("\n--- Testing Hit Ratio Metric ---")
+            metrics = self.session.get(f"{API_BASE}/metrics").text
+            if 'rino_cache_hit_ratio{cache="admin_sessions"}' in metrics:
+                print("✅ Session cache hit ratio exported")
+                success_count += 1
+            else:
+                print("❌ rino_cache_hit_ratio for admin_sessions missing")
+        except Exception as e:
+            print(f"❌ Error testing session cache: {str(e)}")
+
+        print(f"\nAdmin Session Cache Tests: {success_count}/4 passed")
+        return success_count >= 4
+
     def test_statistics(self):
         """Test statistics endpoint"""
         print("\n=== Testing Statistics Endpoint ===")
@@ -491,6 +2058,198 @@ class RinoRentalAPITester:
             print(f"❌ Error getting statistics: {str(e)}")
             return False
 
+    def test_statistics_cache(self):
+        """Test statistics are cached and invalidated by writes"""
+        print("\n=== Testing Statistics Cache ===")
+
+        success_count = 0
+
+        try:
+            first = self.session.get(f"{API_BASE}/statistics")
+            second = self.session.get(f"{API_BASE}/statistics")
+            print(f"X-Cache: {first.headers.get('X-Cache')} -> {second.headers.get('X-Cache')}")
+
+            if second.headers.get('X-Cache') == 'HIT' and first.json() == second.json():
+                print("✅ Repeated statistics call served from cache")
+                success_count += 1
+            else:
+                print("❌ Repeated statistics call not cached")
+
+            # A vehicle write must invalidate the cached counts
+            if self.created_vehicles:
+                self.session.put(f"{API_BASE}/kendaraan/{self.created_vehicles[0]}", json={"status": "Tersedia"})
+                third = self.session.get(f"{API_BASE}/statistics")
+                if third.headers.get('X-Cache') == 'MISS':
+                    print("✅ Vehicle update invalidated statistics cache")
+                    success_count += 1
+                else:
+                    print("❌ Statistics cache not invalidated after vehicle update")
+
+            # One cold request is one miss and one warm request one hit
+            before = self.session.get(f"{API_BASE}/cache/stats").json().get('statistics', {})
+            if self.created_vehicles:
+                self.session.put(f"{API_BASE}/kendaraan/{self.created_vehicles[0]}", json={"status": "Tersedia"})
+            self.session.get(f"{API_BASE}/statistics")
+            self.session.get(f"{API_BASE}/statistics")
+            stats = self.session.get(f"{API_BASE}/cache/stats").json().get('statistics', {})
+            hits = stats.get('hits', 0) - before.get('hits', 0)
+            misses = stats.get('misses', 0) - before.get('misses', 0)
+            print(f"Cache counters: {stats}, this round: {hits} hit(s), {misses} miss(es)")
+            if hits == 1 and misses == (1 if self.created_vehicles else 0):
+                print("✅ Cache hit/miss counters count each request once")
+                success_count += 1
+            else:
+                print("❌ Cache counters wrong")
+        except Exception as e:
+            print(f"❌ Error testing statistics cache: {str(e)}")
+
+        print(f"\nStatistics Cache Tests: {success_count}/3 passed")
+        return success_count >= 2
+
+    def test_query_plans(self):
+        """Explain the queries each route sends and fail on any unlisted COLLSCAN.
+
+        The plans come from GET /api/query-plans, which builds every query
+        with the same helpers as the handlers, so this checks what actually
+        runs instead of a hand-copied version of it.
+        """
+        print("\n=== Testing Query Plans ===")
+
+        try:
+            with admin_auth(self.session) as auth:
+                response = self.session.get(f"{API_BASE}/query-plans", headers=auth)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return False
+        if response.status_code != 200:
+            print(f"❌ Failed to fetch query plans: {response.status_code} {response.text[:200]}")
+            return False
+        plans = response.json()
+
+        failures = []
+        for label, plan in plans.items():
+            if 'error' in plan:
+                print(f"❌ {label}: explain failed - {plan['error']}")
+                failures.append(label)
+            elif plan['collscan'] and plan.get('collscan_reason'):
+                print(f"✅ {label}: COLLSCAN allowed - {plan['collscan_reason']}")
+            elif plan['collscan']:
+                print(f"❌ {label}: COLLSCAN")
+                failures.append(label)
+            else:
+                print(f"✅ {label}: {' <- '.join(dict.fromkeys(plan['stages']))}")
+
+        # The availability join must probe booking on the whole
+        # kendaraan_periode index, dates included, not just kendaraan_id
+        print("\n--- Testing Availability $lookup Plan ---")
+        lookup_label = 'GET /api/ketersediaan ($lookup booking)'
+        probe = plans.get(lookup_label, {})
+        periode = [index for index in probe.get('indexes', []) if index['name'] == 'kendaraan_periode']
+        date_bounds = periode[0]['bounds'].get('tanggal_sewa', []) if periode else []
+        lookups = plans.get('GET /api/ketersediaan', {}).get('lookups', [])
+        print(f"Probe bounds on tanggal_sewa: {date_bounds}, $lookup stats: {lookups}")
+
+        if not date_bounds or date_bounds == ['[MinKey, MaxKey]']:
+            print("❌ $lookup probe does not bound tanggal_sewa on kendaraan_periode")
+            failures.append(lookup_label)
+        elif any(lookup['collection_scans'] for lookup in lookups):
+            print("❌ $lookup into booking ran collection scans")
+            failures.append('GET /api/ketersediaan')
+        else:
+            print("✅ $lookup probes booking with an index range on the dates")
+
+        print(f"\nQuery Plan Tests: {len(plans) + 1 - len(failures)}/{len(plans) + 1} passed")
+        return not failures
+
+    def test_pool_stats(self):
+        """Test MongoDB connection pool metrics"""
+        print("\n=== Testing Connection Pool Metrics ===")
+
+        try:
+            response = self.session.get(f"{API_BASE}/pool/stats")
+            print(f"Status Code: {response.status_code}")
+
+            if response.status_code == 200:
+                pool = response.json()
+                print(f"   Pool size: max {pool['options']['maxPoolSize']}, min {pool['options']['minPoolSize']}")
+                print(f"   Connections: {pool['connections_created']} created, {pool['checked_out']} checked out")
+                print(f"   Checkouts: {pool['checkouts']}, failures: {pool['checkout_failures']}")
+                print(f"   Wait: avg {pool['wait_ms_avg']} ms, max {pool['wait_ms_max']} ms")
+
+                if pool['checkouts'] > 0 and not pool['checkout_failures']:
+                    print("✅ Pool metrics reported without checkout failures")
+                    return True
+                print("❌ Pool has no checkouts or reported checkout failures")
+                return False
+            else:
+                print(f"❌ Failed to get pool metrics: {response.text}")
+                return False
+        except Exception as e:
+            print(f"❌ Error getting pool metrics: {str(e)}")
+            return False
+
+    def scrape_histograms(self):
+        metrics = self.session.get(f"{API_BASE}/metrics")
+        metrics.raise_for_status()
+        return parse_prometheus_histograms(metrics.text, 'rino_http_request_duration_seconds')
+
+    def test_latency_budgets(self, rounds=20):
+        """Check each budgeted read route's p95 over a measured phase.
+
+        The server histograms are cumulative and by now include the stress
+        traffic of earlier tests (concurrent bookings, bulk imports, rebuilds),
+        so the budgets apply only to the samples added between two scrapes
+        taken around a burst of plain reads.
+        """
+        print("\n=== Testing Latency Budgets ===")
+
+        try:
+            response = self.session.get(f"{API_BASE}/kendaraan")
+            server_timing = response.headers.get('Server-Timing', '')
+            print(f"Server-Timing: {server_timing}")
+            if not all(phase in server_timing for phase in ('dispatch', 'db', 'serialize')):
+                print("❌ Server-Timing header missing phases")
+                return False
+
+            paths = {
+                'GET /': '/',
+                'GET /kendaraan': '/kendaraan',
+                'GET /kendaraan/cari': '/kendaraan/cari?q=toyota',
+                'GET /booking': '/booking',
+                'GET /gallery': '/gallery',
+                'GET /statistics': '/statistics',
+                'GET /laporan-keuangan': '/laporan-keuangan?periode=1-bulan',
+            }
+            if self.created_vehicles:
+                paths['GET /kendaraan/{id}'] = f"/kendaraan/{self.created_vehicles[0]}"
+
+            before = self.scrape_histograms()
+            for _ in range(rounds):
+                for path in paths.values():
+                    self.session.get(f"{API_BASE}{path}")
+            histograms = histogram_delta(self.scrape_histograms(), before)
+
+            over_budget = []
+            for (method, route), buckets in sorted(histograms.items()):
+                label = f"{method} {route}"
+                if label not in paths:
+                    continue
+                budget = LATENCY_BUDGETS_MS.get(label, DEFAULT_LATENCY_BUDGET_MS)
+                p95_ms = histogram_quantile(buckets, 0.95) * 1000
+                within = p95_ms <= budget
+                print(f"{'✅' if within else '❌'} {label}: p95 <= {p95_ms:g} ms (budget {budget} ms, n={int(buckets[-1][1])})")
+                if not within:
+                    over_budget.append(label)
+
+            if not over_budget:
+                print("✅ All routes within latency budget")
+                return True
+            print(f"❌ Routes over budget: {', '.join(over_budget)}")
+            return False
+        except Exception as e:
+            print(f"❌ Error checking latency budgets: {str(e)}")
+            return False
+
     def test_error_handling(self):
         """Test error handling for non-existent routes"""
         print("\n=== Testing Error Handling ===")
@@ -526,14 +2285,56 @@ class RinoRentalAPITester:
                 print(f"❌ Non-existent vehicle ID not properly handled: Expected 404, got {response.status_code}")
         except Exception as e:
             print(f"❌ Error testing non-existent vehicle ID: {str(e)}")
-        
-        print(f"\nError Handling Tests: {success_count}/2 passed")
-        return success_count >= 1
+
+        # Writes to unknown ids must not invalidate every client's ETag
+        print("\n--- Testing Writes To Non-existent Vehicle Keep ETag ---")
+        try:
+            etag = self.session.get(f"{API_BASE}/kendaraan").headers.get('ETag')
+            put = self.session.put(f"{API_BASE}/kendaraan/non-existent-id", json={"status": "Tersedia"})
+            delete = self.session.delete(f"{API_BASE}/kendaraan/non-existent-id")
+            after = self.session.get(f"{API_BASE}/kendaraan").headers.get('ETag')
+            print(f"PUT: {put.status_code}, DELETE: {delete.status_code}, ETag: {etag} -> {after}")
+
+            if put.status_code == 404 and delete.status_code == 404 and etag and etag == after:
+                print("✅ 404 writes left the ETag unchanged")
+                success_count += 1
+            else:
+                print("❌ 404 writes changed the ETag or were not rejected")
+        except Exception as e:
+            print(f"❌ Error testing writes to non-existent vehicle: {str(e)}")
+
+        print("\n--- Testing Non-numeric Tariff Rejected ---")
+        try:
+            target = self.created_vehicles[0] if self.created_vehicles else 'non-existent-id'
+            response = self.session.put(f"{API_BASE}/kendaraan/{target}", json={"harga_harian": "murah"})
+            print(f"Status Code: {response.status_code}")
+
+            if response.status_code == 400:
+                print(f"✅ Non-numeric price rejected: {response.json()['error']}")
+                success_count += 1
+            else:
+                print(f"❌ Expected 400, got {response.status_code}")
+        except Exception as e:
+            print(f"❌ Error testing non-numeric tariff: {str(e)}")
+
+        print(f"\nError Handling Tests: {success_count}/4 passed")
+        return success_count >= 3
 
     def cleanup_test_data(self):
         """Clean up test data created during testing"""
         print("\n=== Cleaning Up Test Data ===")
-        
+
+        # Bookings first, so the revenue rollup drops them too
+        for booking_id in self.created_bookings:
+            try:
+                response = self.session.delete(f"{API_BASE}/booking/{booking_id}")
+                if response.status_code == 200:
+                    print(f"✅ Deleted booking: {booking_id}")
+                else:
+                    print(f"❌ Failed to delete booking {booking_id}: {response.text}")
+            except Exception as e:
+                print(f"❌ Error deleting booking {booking_id}: {str(e)}")
+
         # Delete created vehicles
         for vehicle_id in self.created_vehicles:
             try:
@@ -558,11 +2359,30 @@ class RinoRentalAPITester:
         test_results['api_health'] = self.test_api_health()
         test_results['vehicle_crud'] = self.test_vehicle_crud()
         test_results['booking_system'] = self.test_booking_system()
+        test_results['pricing'] = self.test_pricing()
+        test_results['availability'] = self.test_availability()
+        test_results['concurrent_booking'] = self.test_concurrent_booking()
+        test_results['live_updates'] = self.test_live_updates()
+        test_results['pagination'] = self.test_pagination_and_projection()
+        test_results['vehicle_search'] = self.test_vehicle_search()
         test_results['gallery_management'] = self.test_gallery_management()
+        test_results['image_store'] = self.test_image_store()
+        test_results['conditional_get'] = self.test_conditional_get()
         test_results['financial_reports'] = self.test_financial_reports()
+        test_results['revenue_rollup'] = self.test_revenue_rollup()
+        test_results['booking_delete'] = self.test_booking_delete()
+        test_results['bulk_endpoints'] = self.test_bulk_endpoints()
+        test_results['streaming_export'] = self.test_streaming_export()
+        test_results['archival'] = self.test_archival()
+        test_results['compression'] = self.test_compression()
         test_results['admin_authentication'] = self.test_admin_authentication()
+        test_results['session_cache'] = self.test_session_cache()
         test_results['statistics'] = self.test_statistics()
+        test_results['statistics_cache'] = self.test_statistics_cache()
+        test_results['pool_stats'] = self.test_pool_stats()
         test_results['error_handling'] = self.test_error_handling()
+        test_results['query_plans'] = self.test_query_plans()
+        test_results['latency_budgets'] = self.test_latency_budgets()
         
         # Clean up test data
         self.cleanup_test_data()
@@ -590,6 +2410,807 @@ class RinoRentalAPITester:
         
         return test_results
 
+class RinoRentalParallelRegression:
+    """End-to-end checks run concurrently through the async API client.
+
+    Every check creates the fixtures it needs and touches nothing else, so
+    the checks share one connection pool without ordering between them and
+    the run takes about as long as its slowest check. Output is buffered per
+    check and printed once all of them are done. Bookings and vehicles the
+    checks create are recorded and deleted afterwards, bookings first.
+    """
+
+    def __init__(self, concurrency=20):
+        if RinoRentalClient is None:
+            raise RuntimeError("Parallel mode needs httpx (pip install httpx)")
+        self.concurrency = concurrency
+        self.created_vehicles = []
+        self.created_bookings = []
+
+    def vehicle(self, tag, **overrides):
+        return {
+            "nama": f"Toyota Avanza {tag}", "merek": "Toyota", "plat_nomor": f"PB {random.randint(1000, 9999)} PR",
+            "kategori": "MPV", "harga_harian": 350000, "harga_bulanan": 8500000,
+            "kapasitas": 7, "transmisi": "Manual", "bahan_bakar": "Bensin", **overrides
+        }
+
+    def booking(self, vehicle_id, days_ahead, **overrides):
+        return {
+            "kendaraan_id": vehicle_id, "nama_penyewa": "Penyewa Paralel", "no_hp": "081277778888",
+            "tanggal_sewa": (datetime.now() + timedelta(days=days_ahead)).isoformat(), "durasi": 2, **overrides
+        }
+
+    async def new_vehicle(self, api, tag, **overrides):
+        kendaraan = await api.create_kendaraan(self.vehicle(tag, **overrides))
+        self.created_vehicles.append(kendaraan['id'])
+        return kendaraan
+
+    async def new_booking(self, api, booking, **kwargs):
+        created = await api.create_booking(booking, **kwargs)
+        self.created_bookings.append(created['id'])
+        return created
+
+    async def check_health(self, api, log):
+        health = await api.health()
+        log(f"Health: {health}")
+        return health.get('message') == "Rino Rental Sorong API"
+
+    async def check_vehicle_crud(self, api, log):
+        kendaraan = await self.new_vehicle(api, 'CRUD')
+        fetched = await api.get_kendaraan(kendaraan['id'])
+        updated = await api.update_kendaraan(kendaraan['id'], {"status": "Perbaikan"})
+        log(f"Created {kendaraan['id']}, status after update: {updated['status']}")
+        return fetched['nama'] == kendaraan['nama'] and updated['status'] == 'Perbaikan'
+
+    async def check_confirmed_booking_race(self, api, log, attempts=50):
+        kendaraan = await self.new_vehicle(api, 'Race')
+        outcomes = await asyncio.gather(
+            *(self.new_booking(api, self.booking(kendaraan['id'], 300), confirm=True) for _ in range(attempts)),
+            return_exceptions=True
+        )
+        statuses = Counter(o.status if isinstance(o, RinoApiError) else 201 for o in outcomes)
+        vehicle = await api.get_kendaraan(kendaraan['id'])
+        log(f"Status codes: {dict(statuses)}, vehicle: {vehicle['status']}")
+        return statuses[201] == 1 and set(statuses) <= {201, 400, 409} and vehicle['status'] == 'Disewa'
+
+    async def check_pricing(self, api, log):
+        kendaraan = await self.new_vehicle(api, 'Harga', harga_harian=300000)
+        quotes = await api.quote([{"kendaraan_id": kendaraan['id'], "durasi": d} for d in (1, 2, 3)])
+        booking = await self.new_booking(api, self.booking(kendaraan['id'], 320, durasi=3, total_harga=1))
+        log(f"Quotes: {[q['total_harga'] for q in quotes]}, booking total: {booking['total_harga']}")
+        return [q['total_harga'] for q in quotes] == [300000, 600000, 900000] and booking['total_harga'] == 900000
+
+    async def check_overlap(self, api, log):
+        kendaraan = await self.new_vehicle(api, 'Overlap')
+        await self.new_booking(api, self.booking(kendaraan['id'], 340))
+        try:
+            await self.new_booking(api, self.booking(kendaraan['id'], 341))
+        except RinoApiError as e:
+            log(f"Overlapping booking: {e.status} {e.message}")
+            return e.status == 409
+        log("Overlapping booking was accepted")
+        return False
+
+    async def check_search(self, api, log):
+        hasil = await api.search_kendaraan(kategori=['MPV'], sort='harga_terendah', limit=10)
+        prices = [k['harga_harian'] for k in hasil['data']]
+        log(f"Search: {hasil['total']} MPV, first prices {prices[:5]}")
+        return prices == sorted(prices) and all(k['kategori'] == 'MPV' for k in hasil['data'])
+
+    async def check_pagination(self, api, log):
+        seen = [kendaraan['id'] async for kendaraan in api.iter_kendaraan(page_size=25, fields=['nama'])]
+        log(f"Walked {len(seen)} vehicles in pages of 25")
+        return len(seen) == len(set(seen))
+
+    async def check_bulk_and_export(self, api, log):
+        kendaraan = await self.new_vehicle(api, 'Bulk')
+        result = await api.bulk_import_booking([self.booking(kendaraan['id'], 400 + i * 5, durasi=1) for i in range(5)])
+        self.created_bookings.extend(row['id'] for row in result['hasil'] if row['status'] == 'ok')
+        exported = [row async for row in api.export_booking() if row['kendaraan_id'] == kendaraan['id']]
+        log(f"Imported {result['berhasil']}/{result['total']}, exported {len(exported)}")
+        return result['berhasil'] == 5 and len(exported) == 5
+
+    async def check_laporan(self, api, log):
+        laporan, verify = await asyncio.gather(api.laporan_keuangan(periode='1-bulan'), api.verify_laporan())
+        log(f"Pendapatan 1 bulan: {laporan['total_pendapatan']}, rollup konsisten: {verify['konsisten']} "
+            f"({verify['hari_diperiksa']} hari)")
+        return 'total_pendapatan' in laporan and verify['konsisten']
+
+    async def check_admin_session(self, api, log):
+        async with RinoRentalClient(concurrency=2) as admin:
+            session = await admin.login('admin', 'admin123')
+            current = await admin.admin_session()
+            await admin.logout()
+            try:
+                await admin.request('GET', '/admin/session', headers={'Authorization': f"Bearer {session['id']}"})
+            except RinoApiError as e:
+                log(f"Session {current['username']} valid, after logout: {e.status}")
+                return e.status == 401
+        return False
+
+    async def check_live_updates(self, api, log):
+        kendaraan = await self.new_vehicle(api, 'Live')
+        received = []
+
+        async def listen():
+            async for event in api.events(topik=['kendaraan']):
+                if event['data'].get('id') == kendaraan['id']:
+                    received.append(event['data'])
+                    return
+
+        listener = asyncio.create_task(listen())
+        await asyncio.sleep(0.5)
+        await api.update_kendaraan(kendaraan['id'], {"status": "Perbaikan"})
+        try:
+            await asyncio.wait_for(listener, timeout=5)
+        except asyncio.TimeoutError:
+            pass
+        log(f"Live events: {received}")
+        return received == [{'aksi': 'ubah', 'id': kendaraan['id'], 'status': 'Perbaikan'}]
+
+    async def run_check(self, api, name, check):
+        lines = []
+        start = time.perf_counter()
+        try:
+            passed = await check(api, lines.append)
+        except Exception as e:
+            lines.append(f"Error: {type(e).__name__}: {e}")
+            passed = False
+        return name, passed, (time.perf_counter() - start) * 1000, lines
+
+    async def run_async(self):
+        checks = {name[len('check_'):]: getattr(self, name) for name in dir(self) if name.startswith('check_')}
+        print(f"🚀 Running {len(checks)} checks concurrently (concurrency {self.concurrency})")
+        start = time.perf_counter()
+
+        async with RinoRentalClient(BASE_URL, concurrency=self.concurrency) as api:
+            try:
+                results = await asyncio.gather(*(self.run_check(api, name, check) for name, check in checks.items()))
+            finally:
+                await asyncio.gather(*(api.delete_booking(booking_id) for booking_id in self.created_bookings),
+                                     return_exceptions=True)
+                await asyncio.gather(*(api.delete_kendaraan(vehicle_id) for vehicle_id in self.created_vehicles),
+                                     return_exceptions=True)
+
+        for name, passed, elapsed_ms, lines in results:
+            print(f"\n{'✅' if passed else '❌'} {name.replace('_', ' ').title()} ({elapsed_ms:.0f} ms)")
+            for line in lines:
+                print(f"   {line}")
+
+        passed_count = sum(1 for _, passed, _, _ in results if passed)
+        print(f"\nOverall Result: {passed_count}/{len(results)} checks passed in {time.perf_counter() - start:.1f} s")
+        return {name: passed for name, passed, _, _ in results}
+
+    def run(self):
+        return asyncio.run(self.run_async())
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list of samples"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+class RinoRentalLoadTester:
+    """Replay a weighted mix of the functional scenarios from a worker pool.
+
+    Requests are issued open-loop at ``rate`` per second for ``duration``
+    seconds. Latency is measured from each request's scheduled send time,
+    so time spent queued behind busy workers counts too and a slow endpoint
+    shows up as latency instead of silently lowering the offered load.
+    """
+
+    # Scenario name -> relative weight, roughly what the homepage and admin
+    # dashboard generate on a busy day
+    DEFAULT_MIX = {
+        'browse_kendaraan': 40,
+        'detail_kendaraan': 20,
+        'browse_gallery': 10,
+        'buat_booking': 10,
+        'browse_booking': 5,
+        'laporan_keuangan': 5,
+        'statistics': 10,
+    }
+
+    # Enough vehicles and a wide enough booking horizon that random
+    # bookings rarely overlap: buat_booking should measure the create path,
+    # not the 409 shortcut
+    SEED_VEHICLES = 20
+    BOOKING_HORIZON_DAYS = 3650
+    # Share of POST /booking that must return 201 for the run to count
+    MIN_BOOKING_CREATED = 0.9
+
+    def __init__(self, workers=50, rate=100.0, duration=30, mix=None):
+        self.workers = workers
+        self.rate = rate
+        self.duration = duration
+        self.mix = mix or dict(self.DEFAULT_MIX)
+        self.vehicle_ids = []
+        self.booking_ids = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(list)
+        self._statuses = defaultdict(Counter)
+        self._errors = Counter()
+
+    def _session(self):
+        # requests.Session is not thread-safe, so every worker keeps its own
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({
+                'Content-Type': 'application/json',
+                'Accept': 'application/json'
+            })
+            self._local.session = session
+        return session
+
+    def _run_scenario(self, scenario, scheduled):
+        """Worker entry point: run ``scenario`` timed from ``scheduled``"""
+        self._local.scheduled = scheduled
+        try:
+            return getattr(self, scenario)()
+        finally:
+            self._local.scheduled = None
+
+    def _request(self, method, route, path, **kwargs):
+        """Send one request and record its latency under the route label.
+
+        Returns the response, or None when the request failed outright.
+        """
+        # Measure from the scheduled send time, not from when a worker got
+        # to it, so queueing delay is not omitted
+        start = getattr(self._local, 'scheduled', None) or time.perf_counter()
+        self._local.scheduled = None
+        response = None
+        try:
+            response = self._session().request(method, f"{API_BASE}{path}", timeout=30, **kwargs)
+            status = str(response.status_code)
+            failed = response.status_code >= 400
+        except requests.RequestException as e:
+            status = type(e).__name__
+            failed = True
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        label = f"{method} /api{route}"
+        with self._lock:
+            self._latencies[label].append(elapsed_ms)
+            self._statuses[label][status] += 1
+            if failed:
+                self._errors[label] += 1
+        return response
+
+    # --- Scenarios ---
+
+    def browse_kendaraan(self):
+        self._request('GET', '/kendaraan', '/kendaraan')
+
+    def detail_kendaraan(self):
+        vehicle_id = random.choice(self.vehicle_ids)
+        self._request('GET', '/kendaraan/{id}', f"/kendaraan/{vehicle_id}")
+
+    def browse_gallery(self):
+        self._request('GET', '/gallery', '/gallery')
+
+    def buat_booking(self):
+        booking_data = {
+            "kendaraan_id": random.choice(self.vehicle_ids),
+            "nama_penyewa": random.choice(["Budi Santoso", "Siti Rahayu", "Yohanes Kambu", "Maria Wonda"]),
+            "no_hp": f"0812{random.randint(10000000, 99999999)}",
+            "tanggal_sewa": (datetime.now() + timedelta(days=random.randint(1, self.BOOKING_HORIZON_DAYS))).isoformat(),
+            "durasi": random.randint(1, 7),
+            "tipe_sewa": "harian",
+            "dengan_sopir": random.random() < 0.3,
+            "alamat_jemput": "Jl. Ahmad Yani, Sorong",
+            "catatan": "Load test"
+        }
+        response = self._request('POST', '/booking', '/booking', json=booking_data)
+        if response is not None and response.status_code == 201:
+            with self._lock:
+                self.booking_ids.append(response.json()['id'])
+
+    def browse_booking(self):
+        self._request('GET', '/booking', '/booking')
+
+    def laporan_keuangan(self):
+        periode = random.choice(['1-hari', '7-hari', '1-bulan'])
+        self._request('GET', '/laporan-keuangan', f"/laporan-keuangan?periode={periode}")
+
+    def statistics(self):
+        self._request('GET', '/statistics', '/statistics')
+
+    # --- Setup / teardown ---
+
+    def setup(self):
+        """Create the vehicles that detail and booking scenarios point at"""
+        session = self._session()
+        for i in range(self.SEED_VEHICLES):
+            vehicle_data = {
+                "nama": f"Load Test Avanza {i + 1}",
+                "merek": "Toyota",
+                "plat_nomor": f"PB {9000 + i} LT",
+                "kategori": "MPV",
+                "harga_harian": 350000,
+                "harga_bulanan": 8500000,
+                "kapasitas": 7,
+                "transmisi": "Manual",
+                "bahan_bakar": "Bensin",
+                "deskripsi": "Kendaraan untuk load test"
+            }
+            response = session.post(f"{API_BASE}/kendaraan", json=vehicle_data)
+            if response.status_code != 201:
+                raise RuntimeError(f"Failed to seed load test vehicle: {response.text}")
+            self.vehicle_ids.append(response.json()['id'])
+
+    def seed_bookings(self, count, batch_size=5000):
+        """Bulk-load ``count`` historical bookings so reports and lists run
+        against a realistic collection size instead of an empty one"""
+        session = self._session()
+        statuses = ['Pending', 'Dikonfirmasi', 'Selesai', 'Selesai', 'Dibatalkan']
+        seeded = 0
+        for offset in range(0, count, batch_size):
+            lines = []
+            for _ in range(min(batch_size, count - offset)):
+                lines.append(json.dumps({
+                    "kendaraan_id": random.choice(self.vehicle_ids),
+                    "nama_penyewa": "Load Test Seed",
+                    "no_hp": "081200000000",
+                    "tanggal_sewa": (datetime.now() - timedelta(days=random.randint(0, 365))).isoformat(),
+                    "durasi": random.randint(1, 7),
+                    "tipe_sewa": "harian",
+                    "status": random.choice(statuses),
+                    "catatan": "Load test seed"
+                }))
+            response = session.post(
+                f"{API_BASE}/booking/bulk",
+                data="\n".join(lines),
+                headers={"Content-Type": "application/x-ndjson"},
+                timeout=300
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"Failed to seed bookings: {response.text}")
+            result = response.json()
+            self.booking_ids.extend(row['id'] for row in result['hasil'] if row['status'] == 'ok')
+            seeded += result['berhasil']
+        print(f"🌱 Seeded {seeded} bookings")
+        return seeded
+
+    def teardown(self):
+        """Delete the bookings the run created, then the seed vehicles"""
+        def delete(path):
+            try:
+                self._session().delete(f"{API_BASE}{path}", timeout=30)
+            except requests.RequestException:
+                pass
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(delete, [f"/booking/{booking_id}" for booking_id in self.booking_ids]))
+        for vehicle_id in self.vehicle_ids:
+            delete(f"/kendaraan/{vehicle_id}")
+        print(f"🧹 Removed {len(self.booking_ids)} bookings and {len(self.vehicle_ids)} vehicles")
+        self.booking_ids = []
+        self.vehicle_ids = []
+
+    # --- Runner ---
+
+    def run(self, seed_bookings=0):
+        """Run the load mix and return the per-route report as a dict"""
+        print(f"🚀 Load test: {self.rate} req/s for {self.duration}s with {self.workers} workers")
+        self.setup()
+        if seed_bookings:
+            self.seed_bookings(seed_bookings)
+
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        interval = 1.0 / self.rate
+        started_at = datetime.now()
+        start = time.perf_counter()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                sent = 0
+                while True:
+                    next_send = start + sent * interval
+                    if next_send - start >= self.duration:
+                        break
+                    delay = next_send - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    scenario = random.choices(names, weights)[0]
+                    pool.submit(self._run_scenario, scenario, next_send)
+                    sent += 1
+            elapsed = time.perf_counter() - start
+        finally:
+            self.teardown()
+
+        return self.report(started_at, elapsed)
+
+    def check_bookings(self, report):
+        """Whether enough booking requests were created rather than rejected"""
+        statuses = report['routes'].get('POST /api/booking', {}).get('status', {})
+        total = sum(statuses.values())
+        created = statuses.get('201', 0)
+        share = created / total if total else 0.0
+        print(f"{'✅' if share >= self.MIN_BOOKING_CREATED else '❌'} Bookings created: {created}/{total} "
+              f"({share:.0%}, need {self.MIN_BOOKING_CREATED:.0%}), statuses {statuses}")
+        return total == 0 or share >= self.MIN_BOOKING_CREATED
+
+    def report(self, started_at, elapsed):
+        routes = {}
+        for label in sorted(self._latencies):
+            samples = sorted(self._latencies[label])
+            routes[label] = {
+                'count': len(samples),
+                'errors': self._errors[label],
+                'throughput_rps': round(len(samples) / elapsed, 2),
+                'mean_ms': round(sum(samples) / len(samples), 2),
+                'p50_ms': round(percentile(samples, 50), 2),
+                'p95_ms': round(percentile(samples, 95), 2),
+                'p99_ms': round(percentile(samples, 99), 2),
+                'max_ms': round(samples[-1], 2),
+                'status': dict(self._statuses[label])
+            }
+
+        # Pool wait times show whether MongoDB checkouts were the bottleneck
+        try:
+            pool = self._session().get(f"{API_BASE}/pool/stats", timeout=10).json()
+        except (requests.RequestException, ValueError):
+            pool = None
+
+        total = sum(route['count'] for route in routes.values())
+        return {
+            'api_base': API_BASE,
+            'started_at': started_at.isoformat(),
+            'duration_s': round(elapsed, 2),
+            'workers': self.workers,
+            'target_rate_rps': self.rate,
+            'mix': self.mix,
+            'total_requests': total,
+            'total_errors': sum(self._errors.values()),
+            'throughput_rps': round(total / elapsed, 2),
+            'routes': routes,
+            'pool': pool
+        }
+
+
+def make_png(width, height, rng):
+    """RGB noise PNG; noise does not compress, so the file is ~3 bytes per pixel"""
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    raw = b''.join(b'\x00' + rng.randbytes(width * 3) for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw, 6))
+            + chunk(b'IEND', b''))
+
+
+class RinoRentalBenchmark:
+    """Per-route latency and payload benchmark on deterministic datasets.
+
+    Seeding wipes kendaraan, booking, gallery and the revenue rollup, so the
+    server and this script must both use a dedicated database whose name
+    ends in ``_bench``::
+
+        DB_NAME=rino_bench yarn dev
+        DB_NAME=rino_bench python backend_test.py --bench --update-baseline
+        DB_NAME=rino_bench python backend_test.py --bench
+
+    Each size gets that many vehicles and bookings drawn from
+    ``random.Random(seed)``. Two runs with the same seed produce the same
+    rows apart from server-generated ids and timestamps, whose lengths are
+    fixed, so payload sizes are exactly comparable across runs.
+    """
+
+    DEFAULT_SIZES = [1000, 10000, 100000]
+    BATCH_SIZE = 5000
+    # Bump when the generated rows change so stale datasets get reseeded
+    DATASET_VERSION = 2
+
+    # Photo pool (width, height): 60-330 KB, about what phone photos weigh
+    # after the admin form has resized them
+    PHOTO_SIZES = [(192, 108), (240, 160), (256, 192), (288, 216), (320, 240), (330, 330)]
+
+    VEHICLE_MODELS = [
+        # merek, nama, kategori, kapasitas, transmisi, bahan bakar, harga harian
+        ('Toyota', 'Avanza', 'MPV', 7, 'Manual', 'Bensin', 350000),
+        ('Toyota', 'Innova Reborn', 'MPV', 7, 'Otomatis', 'Diesel', 650000),
+        ('Toyota', 'Fortuner', 'SUV', 7, 'Otomatis', 'Diesel', 1200000),
+        ('Toyota', 'Hilux', 'Pick Up', 5, 'Manual', 'Diesel', 900000),
+        ('Daihatsu', 'Xenia', 'MPV', 7, 'Manual', 'Bensin', 325000),
+        ('Daihatsu', 'Terios', 'SUV', 7, 'Manual', 'Bensin', 450000),
+        ('Honda', 'Brio', 'City Car', 5, 'Otomatis', 'Bensin', 300000),
+        ('Mitsubishi', 'Xpander', 'MPV', 7, 'Otomatis', 'Bensin', 450000),
+        ('Mitsubishi', 'Pajero Sport', 'SUV', 7, 'Otomatis', 'Diesel', 1300000),
+        ('Suzuki', 'Ertiga', 'MPV', 7, 'Manual', 'Bensin', 350000),
+    ]
+    FIRST_NAMES = ['Budi', 'Siti', 'Yohanes', 'Maria', 'Agus', 'Dewi', 'Markus', 'Fransiska', 'Andi', 'Rahmawati', 'Petrus', 'Nur']
+    LAST_NAMES = ['Santoso', 'Wanma', 'Rumbiak', 'Kambu', 'Saragih', 'Hidayat', 'Mambrasar', 'Sihombing', 'Yikwa', 'Siregar']
+    STREETS = ['Jl. Ahmad Yani', 'Jl. Basuki Rahmat', 'Jl. Sam Ratulangi', 'Jl. Frans Kaisiepo', 'Jl. Jenderal Sudirman', 'Jl. Pramuka']
+    VEHICLE_STATUSES = {'Tersedia': 70, 'Disewa': 20, 'Perbaikan': 10}
+    BOOKING_STATUSES = {'Selesai': 55, 'Dikonfirmasi': 20, 'Pending': 15, 'Dibatalkan': 10}
+
+    def __init__(self, sizes=None, iterations=20, warmup=3, seed=42,
+                 p95_threshold=0.2, payload_threshold=0.05, noise_floor_ms=5.0):
+        self.sizes = sizes or list(self.DEFAULT_SIZES)
+        self.iterations = iterations
+        self.warmup = warmup
+        self.seed = seed
+        self.p95_threshold = p95_threshold
+        self.payload_threshold = payload_threshold
+        self.noise_floor_ms = noise_floor_ms
+        self.session = requests.Session()
+        self.session.headers.update({'Accept': 'application/json'})
+
+        if MongoClient is None:
+            raise RuntimeError("Benchmark mode needs pymongo to reset and seed the database")
+        db_name = os.environ.get('DB_NAME') or ''
+        if not db_name.endswith('_bench'):
+            raise RuntimeError(f"Refusing to wipe database '{db_name}': benchmark DB_NAME must end in _bench")
+        self.db = MongoClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))[db_name]
+
+    # --- Dataset ---
+
+    def _choice(self, rng, weights):
+        return rng.choices(list(weights), list(weights.values()))[0]
+
+    def _bulk(self, route, rows):
+        """POST rows as NDJSON in batches and return the new ids in row order"""
+        ids = []
+        rows = list(rows)
+        for offset in range(0, len(rows), self.BATCH_SIZE):
+            batch = rows[offset:offset + self.BATCH_SIZE]
+            response = self.session.post(
+                f"{API_BASE}{route}",
+                data="\n".join(json.dumps(row) for row in batch),
+                headers={'Content-Type': 'application/x-ndjson'},
+                timeout=600
+            )
+            result = response.json() if response.status_code == 200 else {}
+            if result.get('gagal', 1):
+                raise RuntimeError(f"Seeding {route} failed: {response.text[:500]}")
+            ids.extend(row['id'] for row in result['hasil'])
+        return ids
+
+    def _seed_photos(self, rng):
+        photos = []
+        for i, (width, height) in enumerate(self.PHOTO_SIZES):
+            data_url = 'data:image/png;base64,' + base64.b64encode(make_png(width, height, rng)).decode()
+            response = self.session.post(f"{API_BASE}/gallery", json={
+                'judul': f"Armada Rino Rental {i + 1}",
+                'deskripsi': 'Foto armada di pool Sorong',
+                'foto': data_url
+            }, timeout=120)
+            if response.status_code != 201:
+                raise RuntimeError(f"Seeding photo failed: {response.text}")
+            photos.append(response.json()['foto'])
+        return photos
+
+    def _vehicle(self, rng, i, photos):
+        merek, nama, kategori, kapasitas, transmisi, bahan_bakar, harga = rng.choice(self.VEHICLE_MODELS)
+        return {
+            'nama': f"{merek} {nama}",
+            'merek': merek,
+            'plat_nomor': f"PB {1000 + i % 9000} {chr(65 + i // 9000 % 26)}{chr(65 + rng.randrange(26))}",
+            'kategori': kategori,
+            'harga_harian': harga,
+            'harga_bulanan': harga * 25,
+            'kapasitas': kapasitas,
+            'transmisi': transmisi,
+            'bahan_bakar': bahan_bakar,
+            'status': self._choice(rng, self.VEHICLE_STATUSES),
+            'deskripsi': f"{merek} {nama} {rng.randint(2018, 2024)}, AC dingin, siap pakai di Sorong dan sekitarnya",
+            'foto': rng.choice(photos)
+        }
+
+    def _booking(self, rng, vehicle_ids, today):
+        tipe_sewa = 'bulanan' if rng.random() < 0.1 else 'harian'
+        durasi = rng.randint(1, 3) if tipe_sewa == 'bulanan' else rng.randint(1, 14)
+        tanggal_sewa = today - timedelta(days=rng.randint(-30, 365))
+        return {
+            'kendaraan_id': rng.choice(vehicle_ids),
+            'nama_penyewa': f"{rng.choice(self.FIRST_NAMES)} {rng.choice(self.LAST_NAMES)}",
+            'no_hp': f"08{rng.randint(1100000000, 9999999999)}",
+            'email': '' if rng.random() < 0.4 else f"penyewa{rng.randint(1, 99999)}@gmail.com",
+            'tanggal_sewa': tanggal_sewa.isoformat(),
+            'durasi': durasi,
+            'tipe_sewa': tipe_sewa,
+            'dengan_sopir': rng.random() < 0.3,
+            'alamat_jemput': f"{rng.choice(self.STREETS)} No. {rng.randint(1, 200)}, Sorong",
+            'status': self._choice(rng, self.BOOKING_STATUSES)
+        }
+
+    def seed(self, size):
+        """Reset the database to the dataset for ``size`` unless it is already there"""
+        meta = {'_id': 'dataset', 'size': size, 'seed': self.seed, 'version': self.DATASET_VERSION}
+        if (self.db.benchmark_meta.find_one({'_id': 'dataset'}) == meta
+                and self.db.kendaraan.count_documents({}) == size
+                and self.db.booking.count_documents({}) == size):
+            print(f"♻️  Reusing seeded dataset of {size:,}")
+            return
+
+        print(f"🌱 Seeding {size:,} vehicles and {size:,} bookings")
+        start = time.perf_counter()
+        # delete_many keeps the indexes the server provisioned at startup
+        for name in ('kendaraan', 'booking', 'gallery', 'pendapatan_harian', 'benchmark_meta'):
+            self.db[name].delete_many({})
+
+        rng = random.Random(f"{self.seed}:{size}")
+        # A fixed time of day keeps generated dates identical for runs on the same day
+        today = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0)
+        photos = self._seed_photos(rng)
+        vehicle_ids = self._bulk('/kendaraan/bulk', (self._vehicle(rng, i, photos) for i in range(size)))
+        bookings = [self._booking(rng, vehicle_ids, today) for _ in range(size)]
+        booking_ids = self._bulk('/booking/bulk', bookings)
+
+        # The API stamps created_at with the import time; spread it over the
+        # days before each rental so reports cover a realistic history
+        updates = []
+        for booking_id, booking in zip(booking_ids, bookings):
+            created_at = datetime.fromisoformat(booking['tanggal_sewa']) - timedelta(days=rng.randint(0, 14), minutes=rng.randint(0, 1439))
+            updates.append(UpdateOne({'id': booking_id}, {'$set': {'created_at': min(created_at, datetime.now())}}))
+        for offset in range(0, len(updates), self.BATCH_SIZE):
+            self.db.booking.bulk_write(updates[offset:offset + self.BATCH_SIZE], ordered=False)
+
+        with admin_auth(self.session) as auth:
+            response = self.session.post(f"{API_BASE}/laporan-keuangan/rebuild", headers=auth, timeout=600)
+        if response.status_code != 200:
+            raise RuntimeError(f"Rollup rebuild failed: {response.text}")
+
+        self.db.benchmark_meta.insert_one(meta)
+        print(f"   seeded in {time.perf_counter() - start:.1f}s")
+
+    # --- Measurement ---
+
+    def routes(self):
+        """Route label -> (path, query params). Labels are the baseline keys."""
+        sample = self.session.get(f"{API_BASE}/kendaraan", params={'limit': 1, 'fields': 'id'}).json()['data'][0]['id']
+        tomorrow = datetime.now() + timedelta(days=1)
+        window = {'from': tomorrow.strftime('%Y-%m-%d'), 'to': (tomorrow + timedelta(days=2)).strftime('%Y-%m-%d')}
+        return {
+            'GET /kendaraan': ('/kendaraan', None),
+            'GET /kendaraan?limit=20': ('/kendaraan', {'limit': 20}),
+            'GET /kendaraan?limit=20&fields': ('/kendaraan', {'limit': 20, 'fields': 'nama,merek,harga_harian,foto_thumb,status'}),
+            'GET /kendaraan/{id}': (f'/kendaraan/{sample}', None),
+            'GET /kendaraan/cari?q': ('/kendaraan/cari', {'q': 'avanza keluarga'}),
+            'GET /kendaraan/cari?kategori&harga': ('/kendaraan/cari', {'kategori': 'MPV', 'transmisi': 'Manual', 'harga_max': 400000}),
+            'GET /ketersediaan': ('/ketersediaan', window),
+            'GET /booking?limit=20': ('/booking', {'limit': 20}),
+            'GET /booking/export?periode=1-bulan': ('/booking/export', {'periode': '1-bulan'}),
+            'GET /gallery': ('/gallery', None),
+            'GET /statistics': ('/statistics', None),
+            'GET /laporan-keuangan?periode=1-bulan': ('/laporan-keuangan', {'periode': '1-bulan'}),
+            'GET /laporan-keuangan?detail=true': ('/laporan-keuangan', {'periode': '1-bulan', 'detail': 'true', 'limit': 20}),
+        }
+
+    def measure(self, path, params):
+        url = f"{API_BASE}{path}"
+        for _ in range(self.warmup):
+            self.session.get(url, params=params, timeout=300)
+
+        latencies = []
+        for _ in range(self.iterations):
+            start = time.perf_counter()
+            response = self.session.get(url, params=params, timeout=300)
+            body = response.content
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {path} returned {response.status_code}: {response.text[:200]}")
+
+        latencies.sort()
+        return {
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'max_ms': round(latencies[-1], 2),
+            'bytes': len(body)
+        }
+
+    def run(self):
+        results = {}
+        for size in self.sizes:
+            print(f"\n=== Benchmark: {size:,} rows ===")
+            self.seed(size)
+            results[str(size)] = {}
+            for label, (path, params) in self.routes().items():
+                results[str(size)][label] = stats = self.measure(path, params)
+                print(f"{label:<42} p50 {stats['p50_ms']:>9.2f} ms  p95 {stats['p95_ms']:>9.2f} ms  {stats['bytes']:>12,} B")
+
+        return {
+            'api_base': API_BASE,
+            'recorded_at': datetime.now().isoformat(),
+            'seed': self.seed,
+            'iterations': self.iterations,
+            'results': results
+        }
+
+    def compare(self, report, baseline):
+        """Return a line per route whose p95 or payload regressed past the thresholds"""
+        regressions = []
+        for size, routes in report['results'].items():
+            for label, current in routes.items():
+                base = baseline.get('results', {}).get(size, {}).get(label)
+                if not base:
+                    continue
+                # The absolute floor keeps 2 ms -> 3 ms jitter from failing the run
+                p95_limit = max(base['p95_ms'] * (1 + self.p95_threshold), base['p95_ms'] + self.noise_floor_ms)
+                if current['p95_ms'] > p95_limit:
+                    regressions.append(f"[{size}] {label}: p95 {base['p95_ms']} ms -> {current['p95_ms']} ms")
+                if current['bytes'] > base['bytes'] * (1 + self.payload_threshold):
+                    regressions.append(f"[{size}] {label}: payload {base['bytes']:,} B -> {current['bytes']:,} B")
+        return regressions
+
+
+def parse_mix(value):
+    """Parse a scenario mix such as ``browse_kendaraan=60,buat_booking=40``"""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in RinoRentalLoadTester.DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown scenario: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
 if __name__ == "__main__":
-    tester = RinoRentalAPITester()
-    results = tester.run_all_tests()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Rino Rental Sorong backend API tests")
+    parser.add_argument('--load', action='store_true', help="run the concurrent load test instead of the functional tests")
+    parser.add_argument('--parallel', action='store_true', help="run the independent regression checks concurrently (needs httpx)")
+    parser.add_argument('--concurrency', type=int, default=20, help="requests in flight in parallel mode")
+    parser.add_argument('--workers', type=int, default=50, help="worker threads for load mode")
+    parser.add_argument('--rate', type=float, default=100.0, help="requests per second offered in load mode")
+    parser.add_argument('--duration', type=float, default=30, help="load test duration in seconds")
+    parser.add_argument('--mix', type=parse_mix, help="scenario weights, e.g. browse_kendaraan=60,buat_booking=40")
+    parser.add_argument('--output', help="write the load test JSON report to this file")
+    parser.add_argument('--seed-bookings', type=int, default=0, help="bulk-import this many historical bookings before the load test")
+    parser.add_argument('--bench', action='store_true', help="run the seeded per-route benchmark (needs a *_bench database)")
+    parser.add_argument('--bench-sizes', type=lambda v: [int(size) for size in v.split(',')], help="dataset sizes, default 1000,10000,100000")
+    parser.add_argument('--iterations', type=int, default=20, help="measured requests per route in benchmark mode")
+    parser.add_argument('--seed', type=int, default=42, help="random seed for the benchmark datasets")
+    parser.add_argument('--baseline', default='benchmark_baseline.json', help="benchmark baseline file")
+    parser.add_argument('--update-baseline', action='store_true', help="write this run as the new baseline instead of comparing")
+    parser.add_argument('--p95-threshold', type=float, default=0.2, help="allowed relative p95 increase over the baseline")
+    parser.add_argument('--payload-threshold', type=float, default=0.05, help="allowed relative payload size increase over the baseline")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark = RinoRentalBenchmark(
+            sizes=args.bench_sizes, iterations=args.iterations, seed=args.seed,
+            p95_threshold=args.p95_threshold, payload_threshold=args.payload_threshold
+        )
+        report = benchmark.run()
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+
+        if args.update_baseline or not os.path.exists(args.baseline):
+            with open(args.baseline, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"\n📄 Baseline written to {args.baseline}")
+        else:
+            with open(args.baseline) as f:
+                regressions = benchmark.compare(report, json.load(f))
+            if regressions:
+                print(f"\n🚨 {len(regressions)} regression(s) against {args.baseline}:")
+                for line in regressions:
+                    print(f"  {line}")
+                sys.exit(1)
+            print(f"\n🎉 No regressions against {args.baseline}")
+    elif args.parallel:
+        results = RinoRentalParallelRegression(concurrency=args.concurrency).run()
+        sys.exit(0 if all(results.values()) else 1)
+    elif args.load:
+        load_tester = RinoRentalLoadTester(workers=args.workers, rate=args.rate, duration=args.duration, mix=args.mix)
+        report = load_tester.run(seed_bookings=args.seed_bookings)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"📄 Load test report written to {args.output}")
+        else:
+            print(json.dumps(report, indent=2))
+        sys.exit(0 if load_tester.check_bookings(report) else 1)
+    else:
+        tester = RinoRentalAPITester()
+        results = tester.run_all_tests()
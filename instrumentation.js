@@ -0,0 +1,13 @@
+// Next.js calls register() once when the server starts
+export async function register() {
+  if (process.env.NEXT_RUNTIME !== 'nodejs') return
+
+  const { warmUp } = await import('@/lib/mongo')
+  try {
+    const ms = await warmUp()
+    console.log(`MongoDB pool warmed up in ${ms}ms`)
+  } catch (error) {
+    // The first request will retry the connection
+    console.error('MongoDB warm-up failed:', error)
+  }
+}
@@ -0,0 +1,91 @@
+// Archival of completed bookings into `booking_archive`
+//
+// Selesai bookings that ended more than ARCHIVE_AFTER_DAYS ago are moved out
+// of `booking`, so list queries, counts and the double-booking check only
+// touch the working set. The daily revenue rollup is not changed by a
+// move, so report totals stay the same; rebuilds and verification read
+// both collections. Report detail and exports include the archive when
+// asked with `?arsip=true`.
+
+import { ApiError } from '@/lib/errors'
+import { MongoBulkWriteError } from 'mongodb'
+
+export const ARCHIVE_COLLECTION = 'booking_archive'
+
+// Only finished bookings are archived; Dibatalkan ones hold no revenue and
+// nothing else reads them, but they stay hot so they remain editable
+export const ARCHIVED_STATUSES = ['Selesai']
+
+const ARCHIVE_AFTER_DAYS = parseInt(process.env.ARCHIVE_AFTER_DAYS || '365')
+const ARCHIVE_BATCH_SIZE = parseInt(process.env.ARCHIVE_BATCH_SIZE || '1000')
+const DAY_MS = 24 * 60 * 60 * 1000
+
+// Bookings eligible for archiving when they ended before `cutoff`
+export function archiveFilter(cutoff) {
+  return { status: { $in: ARCHIVED_STATUSES }, tanggal_selesai: { $lt: cutoff } }
+}
+
+// `?arsip=true` on report and export endpoints
+export function includeArchive(searchParams) {
+  const value = searchParams.get('arsip')
+  if (value === null || value === 'false') return false
+  if (value === 'true') return true
+  throw new ApiError('Parameter arsip harus true atau false')
+}
+
+// The booking collections a read should cover
+export function bookingSources(db, withArchive) {
+  const booking = db.collection('booking')
+  return withArchive ? [booking, db.collection(ARCHIVE_COLLECTION)] : booking
+}
+
+// Aggregation stage that appends matching archived bookings to a pipeline
+// over `booking`
+export function unionArchive(match) {
+  return { $unionWith: { coll: ARCHIVE_COLLECTION, pipeline: [{ $match: match }] } }
+}
+
+// Copies keep their _id, so a batch retried after a crash between the
+// insert and the delete hits duplicate keys, which are expected here
+async function copyToArchive(archive, docs) {
+  try {
+    await archive.insertMany(docs, { ordered: false })
+  } catch (error) {
+    const writeErrors = error instanceof MongoBulkWriteError ? [].concat(error.writeErrors || []) : null
+    if (!writeErrors || writeErrors.some(({ code }) => code !== 11000)) throw error
+  }
+}
+
+// Move eligible bookings in batches: copy, then delete the originals that
+// still match. A booking edited between the two steps stays hot and its
+// copy is dropped again, so no booking ends up in both collections.
+export async function archiveBookings(db, { olderThanDays = ARCHIVE_AFTER_DAYS, batchSize = ARCHIVE_BATCH_SIZE, now = new Date() } = {}) {
+  if (!Number.isInteger(olderThanDays) || olderThanDays < 1) {
+    throw new ApiError('Parameter umur_hari harus bilangan bulat positif')
+  }
+
+  const booking = db.collection('booking')
+  const archive = db.collection(ARCHIVE_COLLECTION)
+  const cutoff = new Date(now.getTime() - olderThanDays * DAY_MS)
+  const filter = archiveFilter(cutoff)
+  let moved = 0
+
+  for (;;) {
+    const batch = await booking.find(filter).sort({ tanggal_selesai: 1 }).limit(batchSize).toArray()
+    if (batch.length === 0) break
+
+    await copyToArchive(archive, batch)
+    const ids = batch.map(({ _id }) => _id)
+    const { deletedCount } = await booking.deleteMany({ _id: { $in: ids }, ...filter })
+
+    if (deletedCount < ids.length) {
+      const stillHot = await booking.find({ _id: { $in: ids } }, { projection: { _id: 1 } }).toArray()
+      await archive.deleteMany({ _id: { $in: stillHot.map(({ _id }) => _id) } })
+    }
+
+    moved += deletedCount
+    if (batch.length < batchSize) break
+  }
+
+  return { dipindahkan: moved, batas: cutoff }
+}
@@ -0,0 +1,150 @@
+// Date-range availability for kendaraan
+//
+// Every booking stores `tanggal_selesai` next to `tanggal_sewa`, so both the
+// double-booking check and the availability search are range scans on the
+// { kendaraan_id, tanggal_sewa, tanggal_selesai } index.
+
+import { ApiError } from '@/lib/errors'
+import { startOfLocalDay } from '@/lib/laporan'
+
+// Bookings in these states no longer hold the vehicle
+export const RELEASED_STATUSES = ['Dibatalkan']
+
+// The one vehicle status that takes new bookings. The availability search
+// filters on it too, so it never lists a car the booking endpoints reject.
+export const BOOKABLE_STATUS = 'Tersedia'
+
+const DATE_PATTERN = /^\d{4}-\d{2}-\d{2}$/
+
+// Matches MongoDB $dateAdd: adding months clamps to the last day of the month
+function addMonths(date, months) {
+  const result = new Date(date)
+  const day = result.getUTCDate()
+  result.setUTCDate(1)
+  result.setUTCMonth(result.getUTCMonth() + months)
+  const lastDay = new Date(Date.UTC(result.getUTCFullYear(), result.getUTCMonth() + 1, 0)).getUTCDate()
+  result.setUTCDate(Math.min(day, lastDay))
+  return result
+}
+
+export function tanggalSelesai(tanggalSewa, durasi, tipeSewa) {
+  const start = new Date(tanggalSewa)
+  if (tipeSewa === 'bulanan') return addMonths(start, durasi)
+  return new Date(start.getTime() + durasi * 24 * 60 * 60 * 1000)
+}
+
+// Same computation as an aggregation expression, for pipeline updates
+export const TANGGAL_SELESAI_EXPR = {
+  $dateAdd: {
+    startDate: '$tanggal_sewa',
+    unit: { $cond: [{ $eq: ['$tipe_sewa', 'bulanan'] }, 'month', 'day'] },
+    amount: '$durasi'
+  }
+}
+
+// Filter for bookings of a vehicle that overlap the half-open [start, end)
+export function overlapFilter(kendaraanId, start, end) {
+  return {
+    kendaraan_id: kendaraanId,
+    tanggal_sewa: { $lt: end },
+    tanggal_selesai: { $gt: start },
+    status: { $nin: RELEASED_STATUSES }
+  }
+}
+
+export async function hasOverlap(db, kendaraanId, start, end, excludeId, { session } = {}) {
+  const filter = overlapFilter(kendaraanId, start, end)
+  if (excludeId) filter.id = { $ne: excludeId }
+
+  const conflict = await db.collection('booking')
+    .findOne(filter, { projection: { _id: 1 }, session })
+  return !!conflict
+}
+
+// True when a status change makes a released booking hold its vehicle
+// again, which needs the same overlap check as a new booking
+export function reactivates(before, after) {
+  return RELEASED_STATUSES.includes(before.status) && !RELEASED_STATUSES.includes(after.status)
+}
+
+// Per-row check for bulk status updates. Rows reactivated earlier in the
+// same batch are not written yet, so they are compared in memory as well.
+export function reactivationCheck(db) {
+  const reactivated = []
+  return async (before, after) => {
+    if (!reactivates(before, after)) return null
+
+    const clash = reactivated.some(other =>
+      other.kendaraan_id === after.kendaraan_id &&
+      other.tanggal_sewa < after.tanggal_selesai &&
+      other.tanggal_selesai > after.tanggal_sewa
+    ) || await hasOverlap(db, after.kendaraan_id, after.tanggal_sewa, after.tanggal_selesai, after.id)
+    if (clash) return 'Kendaraan sudah dibooking pada tanggal tersebut'
+
+    reactivated.push(after)
+    return null
+  }
+}
+
+// Parse `?from=&to=` (inclusive WIT dates) into a [start, end) window
+export function parseWindow(searchParams) {
+  const from = searchParams.get('from')
+  const to = searchParams.get('to') || from
+
+  if (!from || !DATE_PATTERN.test(from) || !DATE_PATTERN.test(to)) {
+    throw new ApiError('Parameter from dan to wajib berformat YYYY-MM-DD')
+  }
+
+  const start = startOfLocalDay(from)
+  const end = startOfLocalDay(to, 1)
+  if (isNaN(start.getTime()) || isNaN(end.getTime()) || start >= end) {
+    throw new ApiError('Rentang tanggal tidak valid')
+  }
+  return { start, end }
+}
+
+// Bookable vehicles with no active booking overlapping the window. The $lookup
+// joins on kendaraan_id with localField/foreignField and matches the dates
+// as plain range predicates (not $expr), so each probe into `booking` is
+// the same index range scan as the double-booking check.
+export function availabilityPipeline({ start, end }, projection) {
+  const { kendaraan_id: _, ...periode } = overlapFilter(null, start, end)
+  return [
+    { $match: { status: BOOKABLE_STATUS } },
+    {
+      $lookup: {
+        from: 'booking',
+        localField: 'id',
+        foreignField: 'kendaraan_id',
+        pipeline: [
+          { $match: periode },
+          { $limit: 1 },
+          { $project: { _id: 1 } }
+        ],
+        as: 'bentrok'
+      }
+    },
+    { $match: { bentrok: { $size: 0 } } },
+    { $sort: { created_at: -1, id: -1 } },
+    // Inclusion projections drop `bentrok` already and cannot mix in an exclusion
+    { $project: Object.values(projection).includes(1) ? projection : { ...projection, bentrok: 0 } }
+  ]
+}
+
+export async function findAvailable(db, window, projection) {
+  return db.collection('kendaraan').aggregate(availabilityPipeline(window, projection)).toArray()
+}
+
+let backfilled
+
+// Fill `tanggal_selesai` on bookings written before it existed. Runs once
+// per process from connectToMongo.
+export function backfillTanggalSelesai(db) {
+  if (!backfilled) {
+    backfilled = db.collection('booking').updateMany(
+      { tanggal_selesai: { $exists: false } },
+      [{ $set: { tanggal_selesai: TANGGAL_SELESAI_EXPR } }]
+    )
+  }
+  return backfilled
+}
@@ -0,0 +1,195 @@
+// Bulk import and bulk status updates from spreadsheet exports
+//
+// Rows arrive as a JSON array or NDJSON, are validated with the same rules
+// as the single-row endpoints and written with one unordered bulkWrite.
+// Every row gets its own entry in `hasil`, so one bad row never sinks the
+// rest of the batch.
+
+import { MongoBulkWriteError } from 'mongodb'
+import { ApiError } from '@/lib/errors'
+import { storeImage } from '@/lib/images'
+import { applyRevenueChanges } from '@/lib/laporan'
+import { loadTariffs } from '@/lib/pricing'
+import { validateKendaraan, validateBooking, buildKendaraan, buildBooking } from '@/lib/records'
+
+export const MAX_BULK_ROWS = parseInt(process.env.BULK_MAX_ROWS || '10000')
+
+function parseLine(line) {
+  try {
+    return JSON.parse(line)
+  } catch {
+    return null
+  }
+}
+
+// Parse the request body into rows. Unparseable NDJSON lines become `null`
+// and are reported per row.
+export async function readRows(request) {
+  const contentType = request.headers.get('content-type') || ''
+  const text = await request.text()
+  let rows
+
+  if (contentType.includes('ndjson') || contentType.includes('jsonl')) {
+    rows = text.split('\n').filter(line => line.trim()).map(parseLine)
+  } else {
+    try {
+      rows = JSON.parse(text)
+    } catch {
+      throw new ApiError('Body harus berupa JSON array atau NDJSON')
+    }
+    if (!Array.isArray(rows)) {
+      throw new ApiError('Body harus berupa JSON array atau NDJSON')
+    }
+  }
+
+  if (rows.length === 0) {
+    throw new ApiError('Tidak ada data untuk diproses')
+  }
+  if (rows.length > MAX_BULK_ROWS) {
+    throw new ApiError(`Maksimal ${MAX_BULK_ROWS} baris per permintaan`, 413)
+  }
+  return rows
+}
+
+function isRecord(row) {
+  return row !== null && typeof row === 'object' && !Array.isArray(row)
+}
+
+// Run the queued operations unordered and return write errors keyed by the
+// row index each operation came from
+async function runBulkWrite(collection, queued) {
+  if (queued.length === 0) return new Map()
+
+  try {
+    await collection.bulkWrite(queued.map(({ op }) => op), { ordered: false })
+    return new Map()
+  } catch (error) {
+    if (!(error instanceof MongoBulkWriteError)) throw error
+    const writeErrors = [].concat(error.writeErrors || [])
+    return new Map(writeErrors.map(({ index, errmsg }) => [queued[index].row, errmsg]))
+  }
+}
+
+function summarize(results) {
+  const gagal = results.filter(result => result.status === 'error').length
+  return { total: results.length, berhasil: results.length - gagal, gagal, hasil: results }
+}
+
+async function bulkInsert(db, collectionName, rows, validate, build) {
+  const results = new Array(rows.length)
+  const queued = []
+
+  for (let row = 0; row < rows.length; row++) {
+    const body = rows[row]
+    const error = isRecord(body) ? validate(body) : 'Baris bukan objek JSON yang valid'
+    if (error) {
+      results[row] = { index: row, status: 'error', error }
+      continue
+    }
+
+    try {
+      const document = await build(body)
+      queued.push({ row, op: { insertOne: { document } }, document })
+    } catch (buildError) {
+      if (!(buildError instanceof ApiError)) throw buildError
+      results[row] = { index: row, status: 'error', error: buildError.message }
+    }
+  }
+
+  const writeErrors = await runBulkWrite(db.collection(collectionName), queued)
+  const inserted = []
+
+  for (const { row, document } of queued) {
+    if (writeErrors.has(row)) {
+      results[row] = { index: row, status: 'error', error: writeErrors.get(row) }
+    } else {
+      results[row] = { index: row, status: 'ok', id: document.id }
+      inserted.push(document)
+    }
+  }
+
+  return { ...summarize(results), inserted }
+}
+
+export function importKendaraan(db, rows) {
+  return bulkInsert(db, 'kendaraan', rows, validateKendaraan,
+    async (body) => buildKendaraan(body, await storeImage(db, body.foto)))
+}
+
+export async function importBooking(db, rows) {
+  // Prices come from the tariff table, fetched once for the whole batch
+  const tariffs = await loadTariffs(db, rows.filter(row => isRecord(row) && row.kendaraan_id).map(row => row.kendaraan_id))
+  const result = await bulkInsert(db, 'booking', rows, validateBooking, (body) => {
+    const tariff = tariffs.get(body.kendaraan_id)
+    if (!tariff) throw new ApiError('Kendaraan tidak ditemukan', 404)
+    return buildBooking(body, tariff, { status: body.status || 'Pending' })
+  })
+
+  await applyRevenueChanges(db, result.inserted.map(booking => [null, booking]))
+  return result
+}
+
+// Rows of `{ id, status }`. Current documents are read in one query so
+// missing ids are reported per row and booking revenue can be adjusted.
+// `checkChange(before, after)` may reject a row with an error message.
+export async function bulkUpdateStatus(db, collectionName, rows, statuses, { checkChange } = {}) {
+  const results = new Array(rows.length)
+  const candidates = []
+
+  rows.forEach((body, row) => {
+    if (!isRecord(body) || !body.id) {
+      results[row] = { index: row, status: 'error', error: 'Field wajib tidak diisi: id' }
+    } else if (!statuses.includes(body.status)) {
+      results[row] = { index: row, status: 'error', error: `Status tidak valid, gunakan: ${statuses.join(', ')}` }
+    } else {
+      candidates.push({ row, id: body.id, status: body.status })
+    }
+  })
+
+  const current = await db.collection(collectionName)
+    .find(
+      { id: { $in: candidates.map(({ id }) => id) } },
+      // Booking dates and kendaraan_id feed the live update diffs
+      { projection: { _id: 0, id: 1, status: 1, total_harga: 1, created_at: 1, kendaraan_id: 1, tanggal_sewa: 1, tanggal_selesai: 1 } }
+    )
+    .toArray()
+  const byId = new Map(current.map(doc => [doc.id, doc]))
+
+  const queued = []
+  const now = new Date()
+  for (const { row, id, status } of candidates) {
+    const before = byId.get(id)
+    if (!before) {
+      results[row] = { index: row, status: 'error', error: 'Data tidak ditemukan', id }
+      continue
+    }
+    const after = { ...before, status, updated_at: now }
+    const error = checkChange && await checkChange(before, after)
+    if (error) {
+      results[row] = { index: row, status: 'error', error, id }
+      continue
+    }
+    queued.push({
+      row,
+      before,
+      after,
+      op: { updateOne: { filter: { id }, update: { $set: { status, updated_at: now } } } }
+    })
+    // A later row for the same id starts from this row's result
+    byId.set(id, after)
+  }
+
+  const writeErrors = await runBulkWrite(db.collection(collectionName), queued)
+  const changes = []
+
+  for (const { row, before, after } of queued) {
+    if (writeErrors.has(row)) {
+      results[row] = { index: row, status: 'error', error: writeErrors.get(row), id: before.id }
+    } else {
+      results[row] = { index: row, status: 'ok', id: before.id }
+      changes.push([before, after])
+    }
+  }
+
+  return { ...summarize(results), changes }
+}
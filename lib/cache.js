@@ -0,0 +1,165 @@
+// Small in-process caches with TTL and LRU eviction
+//
+// Every cache registers itself by name so its hit/miss counters can be
+// reported from one place.
+//
+// Loads that race an invalidation must not store what they read. clear()
+// bumps a cache-wide generation; delete(key) only marks that key, so
+// dropping one entry never discards the in-flight loads of other keys.
+
+const registry = new Map()
+
+export class TtlCache {
+  constructor(name, { ttl, maxEntries = Infinity }) {
+    this.name = name
+    this.ttl = ttl
+    this.maxEntries = maxEntries
+    this.entries = new Map()
+    this.pending = new Map()
+    this.generation = 0
+    // key -> sequence number of its last delete(), kept while loads run
+    this.sequence = 0
+    this.deletedAt = new Map()
+    this.loading = 0
+    this.hits = 0
+    this.misses = 0
+    this.evictions = 0
+    registry.set(name, this)
+  }
+
+  get(key) {
+    const entry = this.entries.get(key)
+    if (entry && entry.expiresAt > Date.now()) {
+      // Re-insert so Map order doubles as LRU order
+      this.entries.delete(key)
+      this.entries.set(key, entry)
+      this.hits++
+      return entry.value
+    }
+    if (entry) {
+      this.entries.delete(key)
+      this.evictions++
+    }
+    this.misses++
+    return undefined
+  }
+
+  // Whether a fresh entry exists, without touching counters or LRU order
+  has(key) {
+    const entry = this.entries.get(key)
+    return entry !== undefined && entry.expiresAt > Date.now()
+  }
+
+  set(key, value, ttl = this.ttl) {
+    this.entries.delete(key)
+    this.entries.set(key, { value, expiresAt: Date.now() + ttl })
+    while (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value)
+      this.evictions++
+    }
+    return value
+  }
+
+  // Snapshot taken when a load starts, checked before storing its result
+  beginLoad() {
+    this.loading++
+    return { generation: this.generation, sequence: this.sequence }
+  }
+
+  endLoad() {
+    // With nothing in flight no load can be older than a delete
+    if (--this.loading === 0) this.deletedAt.clear()
+  }
+
+  invalidatedSince(key, { generation, sequence }) {
+    return generation !== this.generation || (this.deletedAt.get(key) || 0) > sequence
+  }
+
+  // Return the cached value or load it once, sharing the in-flight promise
+  // between concurrent callers. A null or undefined result is returned but
+  // not stored, so lookups of unknown keys cannot push real entries out.
+  async getOrLoad(key, loader) {
+    const cached = this.get(key)
+    if (cached !== undefined) return cached
+
+    if (!this.pending.has(key)) {
+      const load = this.beginLoad()
+      const promise = Promise.resolve()
+        .then(loader)
+        .then(value => {
+          // Do not store a value that was loaded before an invalidation
+          if (value != null && !this.invalidatedSince(key, load)) this.set(key, value)
+          return value
+        })
+        .finally(() => {
+          if (this.pending.get(key) === promise) this.pending.delete(key)
+          this.endLoad()
+        })
+      this.pending.set(key, promise)
+    }
+    return this.pending.get(key)
+  }
+
+  // Batch variant of getOrLoad: `loader` receives the keys that missed and
+  // resolves to a Map of the values it found. Keys it leaves out are not
+  // cached, so lookups of unknown ids cannot push real entries out.
+  async getManyOrLoad(keys, loader) {
+    const found = new Map()
+    const missing = []
+    for (const key of new Set(keys)) {
+      const cached = this.get(key)
+      if (cached !== undefined) found.set(key, cached)
+      else missing.push(key)
+    }
+    if (missing.length === 0) return found
+
+    const load = this.beginLoad()
+    try {
+      for (const [key, value] of await loader(missing)) {
+        if (!this.invalidatedSince(key, load)) this.set(key, value)
+        found.set(key, value)
+      }
+    } finally {
+      this.endLoad()
+    }
+    return found
+  }
+
+  delete(key) {
+    this.entries.delete(key)
+    this.pending.delete(key)
+    if (this.loading > 0) this.deletedAt.set(key, ++this.sequence)
+  }
+
+  clear() {
+    this.entries.clear()
+    this.pending.clear()
+    this.generation++
+  }
+
+  // Drop expired entries; called opportunistically by callers that care
+  purgeExpired() {
+    const now = Date.now()
+    for (const [key, entry] of this.entries) {
+      if (entry.expiresAt <= now) {
+        this.entries.delete(key)
+        this.evictions++
+      }
+    }
+  }
+
+  stats() {
+    const lookups = this.hits + this.misses
+    return {
+      size: this.entries.size,
+      hits: this.hits,
+      misses: this.misses,
+      evictions: this.evictions,
+      hit_ratio: lookups > 0 ? Math.round((this.hits / lookups) * 1000) / 1000 : 0
+    }
+  }
+}
+
+export function cacheStats() {
+  return Object.fromEntries([...registry].map(([name, cache]) => [name, cache.stats()]))
+}
@@ -0,0 +1,58 @@
+// Compact columnar JSON for list and report responses
+//
+// `?format=columnar` turns every array of records in a response into
+// `{ kolom: [...keys], baris: [[...values], ...] }`, so each key is sent
+// once instead of once per row. Fields a row lacks come back as null.
+
+import { ApiError } from '@/lib/errors'
+
+export const RESPONSE_FORMATS = ['json', 'columnar']
+
+export function parseResponseFormat(searchParams) {
+  const format = searchParams.get('format') || 'json'
+  if (!RESPONSE_FORMATS.includes(format)) {
+    throw new ApiError(`Parameter format tidak valid, gunakan: ${RESPONSE_FORMATS.join(', ')}`)
+  }
+  return format
+}
+
+function isRecord(value) {
+  return value !== null && typeof value === 'object' && !Array.isArray(value) && !(value instanceof Date)
+}
+
+// Fields that hold the rows of list and report bodies. They are converted
+// even when empty, so a client can always read `kolom` and `baris`.
+const TABLE_FIELDS = ['data', 'detail_booking', 'pendapatan_harian']
+
+function isTable(value, known = false) {
+  return Array.isArray(value) && (known || value.length > 0) && value.every(isRecord)
+}
+
+export function toColumnar(rows) {
+  const kolom = []
+  const seen = new Set()
+  for (const row of rows) {
+    for (const key of Object.keys(row)) {
+      if (!seen.has(key)) {
+        seen.add(key)
+        kolom.push(key)
+      }
+    }
+  }
+  return { kolom, baris: rows.map(row => kolom.map(key => row[key] ?? null)) }
+}
+
+// Tables at the top level or one level down (data, detail_booking,
+// pendapatan_harian) are converted; everything else passes through
+export function columnarBody(body) {
+  if (isTable(body, true)) return toColumnar(body)
+  if (!isRecord(body)) return body
+  return Object.fromEntries(Object.entries(body).map(([key, value]) => [
+    key,
+    isTable(value, TABLE_FIELDS.includes(key)) ? toColumnar(value) : value
+  ]))
+}
+
+export function formatBody(format, body) {
+  return format === 'columnar' ? columnarBody(body) : body
+}
@@ -0,0 +1,8 @@
+// Errors that handleRoute turns into a JSON `{ error }` response with the
+// given status instead of a generic 500
+export class ApiError extends Error {
+  constructor(message, status = 400) {
+    super(message)
+    this.status = status
+  }
+}
@@ -0,0 +1,67 @@
+// Per-collection versions and strong ETags for conditional GETs
+//
+// Write handlers bump the version of the collection they touch. Reads tag
+// their response with the version and the query string, so a repeat visit
+// with a matching If-None-Match is answered with 304 before any query runs.
+//
+// Versions live in MongoDB (`etag_versions`, one small document per
+// collection) rather than in process memory, so a write on one instance
+// changes the tags every instance hands out. Each instance keeps the
+// versions it read for ETAG_VERSION_TTL_MS, so conditional GETs are
+// answered without a round trip. Its own writes drop the cached version at
+// once; writes on other instances do so through the change-stream feed
+// when it runs (lib/events.js), and within the TTL otherwise.
+
+import { createHash, randomBytes } from 'crypto'
+import { NextResponse } from 'next/server'
+import { TtlCache } from '@/lib/cache'
+
+export const VERSION_COLLECTION = 'etag_versions'
+
+const versionCache = new TtlCache('etag_versions', {
+  ttl: parseInt(process.env.ETAG_VERSION_TTL_MS || '1000')
+})
+
+// Called by the change-stream feed when another instance bumps a version
+export function forgetVersion(collection) {
+  versionCache.delete(collection)
+}
+
+// A random token instead of a counter: tags never repeat, even if the
+// version documents are lost and recreated
+export async function bumpVersion(db, collection) {
+  await db.collection(VERSION_COLLECTION).updateOne(
+    { _id: collection },
+    { $set: { version: randomBytes(6).toString('hex'), updated_at: new Date() } },
+    { upsert: true }
+  )
+  versionCache.delete(collection)
+}
+
+// Read the tag before querying: a write racing the query then yields a tag
+// that no longer matches, never a current tag on stale data
+export async function collectionEtag(db, collection, request) {
+  const { pathname, search } = new URL(request.url)
+  const query = createHash('sha1').update(pathname + search).digest('base64url').slice(0, 16)
+  const version = await versionCache.getOrLoad(collection, async () => {
+    const current = await db.collection(VERSION_COLLECTION).findOne({ _id: collection }, { projection: { version: 1 } })
+    return current?.version || '0'
+  })
+  return `"${collection}-${version}-${query}"`
+}
+
+export function isNotModified(request, etag) {
+  const header = request.headers.get('if-none-match')
+  if (!header) return false
+  // Weak comparison: compressed responses carry the tag as W/"..."
+  return header.trim() === '*' || header.split(',').some(tag => tag.trim().replace(/^W\//, '') === etag)
+}
+
+export function notModified(etag) {
+  return new NextResponse(null, { status: 304, headers: withEtag({}, etag) })
+}
+
+// Clients must revalidate, but may reuse their copy when the tag matches
+export function withEtag(headers, etag) {
+  return { ...headers, 'ETag': etag, 'Cache-Control': 'no-cache' }
+}
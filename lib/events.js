@@ -0,0 +1,205 @@
+// Live updates for GET /api/events (Server-Sent Events)
+//
+// Every change to a vehicle's status or to a booking is published on one
+// in-process bus as a small diff. On a replica set the bus is fed by a
+// MongoDB change stream, so writes made by any instance reach every
+// client. On a standalone mongod (no change streams) the write handlers
+// publish their own changes instead, which covers a single instance.
+//
+// The bus keeps the last LIVE_REPLAY_EVENTS events, so a client that
+// reconnects with Last-Event-ID receives what it missed; when the gap is
+// older than the buffer it is told to reload instead.
+
+import { ApiError } from '@/lib/errors'
+import { connectToMongo, supportsTransactions } from '@/lib/mongo'
+import { VERSION_COLLECTION, forgetVersion } from '@/lib/etag'
+
+const REPLAY_EVENTS = parseInt(process.env.LIVE_REPLAY_EVENTS || '500')
+const HEARTBEAT_MS = parseInt(process.env.LIVE_HEARTBEAT_MS || '25000')
+// Clients further behind than this are dropped; EventSource reconnects and
+// catches up from the replay buffer
+const MAX_BUFFERED_BYTES = 256 * 1024
+
+export const LIVE_TOPICS = ['kendaraan', 'booking']
+
+const BOOKING_FIELDS = ['id', 'kendaraan_id', 'status', 'tanggal_sewa', 'tanggal_selesai']
+
+// Shared across the bundles Next.js builds, like the MongoDB client
+const feed = globalThis._liveFeed || (globalThis._liveFeed = {
+  sequence: 0,
+  recent: [],
+  subscribers: new Set(),
+  source: 'lokal',
+  starting: null,
+  published: 0
+})
+
+function publish(event) {
+  const entry = { id: ++feed.sequence, ...event }
+  feed.recent.push(entry)
+  if (feed.recent.length > REPLAY_EVENTS) feed.recent.shift()
+  feed.published++
+  for (const subscriber of feed.subscribers) subscriber(entry)
+}
+
+function kendaraanDiff(aksi, doc) {
+  return { topik: 'kendaraan', aksi, data: aksi === 'hapus' ? { id: doc.id } : { id: doc.id, status: doc.status } }
+}
+
+function bookingDiff(aksi, doc) {
+  return { topik: 'booking', aksi, data: Object.fromEntries(BOOKING_FIELDS.map(field => [field, doc[field] ?? null])) }
+}
+
+// Called by write handlers after a successful write. With a change stream
+// running the stream reports the write, so these are no-ops.
+export function kendaraanChanged(aksi, docs) {
+  if (feed.source === 'change-stream') return
+  for (const doc of [].concat(docs)) publish(kendaraanDiff(aksi, doc))
+}
+
+export function bookingChanged(aksi, docs) {
+  if (feed.source === 'change-stream') return
+  for (const doc of [].concat(docs)) publish(bookingDiff(aksi, doc))
+}
+
+// Map a change event to a diff. Vehicle updates that leave `status` alone
+// (prices, photos, descriptions) are not live data and are skipped.
+function fromChange(change) {
+  const topik = change.ns.coll
+  const aksi = { insert: 'tambah', update: 'ubah', replace: 'ubah', delete: 'hapus' }[change.operationType]
+  // Deletes carry the document only when pre-images are enabled
+  const doc = aksi === 'hapus' ? change.fullDocumentBeforeChange : change.fullDocument
+  if (!doc) return null
+
+  if (topik === 'kendaraan') {
+    const fields = change.updateDescription?.updatedFields
+    if (change.operationType === 'update' && !('status' in fields)) return null
+    return kendaraanDiff(aksi, doc)
+  }
+  return bookingDiff(aksi, doc)
+}
+
+async function openChangeStream(db) {
+  // Pre-images let delete events name the deleted id (MongoDB 6.0+).
+  // Without them delete events are skipped and the vehicle drops out on
+  // the client's next reload.
+  await Promise.all(LIVE_TOPICS.map(coll =>
+    db.command({ collMod: coll, changeStreamPreAndPostImages: { enabled: true } }).catch(() => {})
+  ))
+
+  // ETag version bumps ride along, so cached versions (lib/etag.js) drop
+  // as soon as any instance writes
+  const stream = db.watch([
+    { $match: { 'ns.coll': { $in: [...LIVE_TOPICS, VERSION_COLLECTION] }, operationType: { $in: ['insert', 'update', 'replace', 'delete'] } } }
+  ], { fullDocument: 'updateLookup', fullDocumentBeforeChange: 'whenAvailable' })
+
+  stream.on('change', change => {
+    if (change.ns.coll === VERSION_COLLECTION) return forgetVersion(change.documentKey._id)
+    const event = fromChange(change)
+    if (event) publish(event)
+  })
+  // The driver resumes on transient errors by itself; anything that ends
+  // the stream puts this instance back on handler-published events
+  stream.on('error', error => {
+    console.error('Change stream failed, falling back to local events:', error)
+    feed.source = 'lokal'
+    stream.close().catch(() => {})
+  })
+  feed.source = 'change-stream'
+}
+
+// Start the change stream once per process when the deployment has one
+export function ensureFeed() {
+  if (!feed.starting) {
+    feed.starting = connectToMongo()
+      .then(async db => {
+        if (await supportsTransactions(db)) await openChangeStream(db)
+      })
+      .catch(error => {
+        console.error('Live updates use local events only:', error)
+      })
+  }
+  return feed.starting
+}
+
+// `?topik=kendaraan,booking`, both by default
+export function parseTopics(searchParams) {
+  const value = searchParams.get('topik')
+  if (!value) return LIVE_TOPICS
+  const topics = value.split(',').map(topic => topic.trim()).filter(Boolean)
+  if (topics.length === 0 || topics.some(topic => !LIVE_TOPICS.includes(topic))) {
+    throw new ApiError(`Parameter topik tidak valid, gunakan: ${LIVE_TOPICS.join(', ')}`)
+  }
+  return topics
+}
+
+function encodeEvent({ id, topik, aksi, data }) {
+  return `id: ${id}\nevent: ${topik}\ndata: ${JSON.stringify({ aksi, ...data })}\n\n`
+}
+
+// Events after `lastEventId`, or null when the buffer no longer reaches
+// back that far
+function replaySince(lastEventId) {
+  const last = parseInt(lastEventId)
+  if (isNaN(last) || last >= feed.sequence) return []
+  const oldest = feed.recent[0]?.id ?? feed.sequence + 1
+  if (last < oldest - 1) return null
+  return feed.recent.filter(event => event.id > last)
+}
+
+// SSE stream for `topics`. Resumes from Last-Event-ID when possible,
+// otherwise sends a `reset` event so the client reloads its list once.
+export function liveStream(topics, lastEventId, signal) {
+  const encoder = new TextEncoder()
+  let cleanup = () => {}
+
+  return new ReadableStream({
+    start(controller) {
+      const send = text => controller.enqueue(encoder.encode(text))
+      const wanted = event => topics.includes(event.topik)
+
+      send(`retry: 3000\n\n`)
+      if (lastEventId !== null) {
+        const missed = replaySince(lastEventId)
+        if (missed === null) send(`id: ${feed.sequence}\nevent: reset\ndata: {}\n\n`)
+        else missed.filter(wanted).forEach(event => send(encodeEvent(event)))
+      }
+
+      const subscriber = event => {
+        if (!wanted(event)) return
+        if (controller.desiredSize < -MAX_BUFFERED_BYTES) {
+          cleanup()
+          controller.close()
+          return
+        }
+        send(encodeEvent(event))
+      }
+      // Comment lines keep proxies from closing an idle connection
+      const heartbeat = setInterval(() => send(': ping\n\n'), HEARTBEAT_MS)
+
+      feed.subscribers.add(subscriber)
+      cleanup = () => {
+        clearInterval(heartbeat)
+        feed.subscribers.delete(subscriber)
+        signal?.removeEventListener('abort', onAbort)
+      }
+      const onAbort = () => {
+        cleanup()
+        try { controller.close() } catch {}
+      }
+      signal?.addEventListener('abort', onAbort)
+    },
+    cancel() {
+      cleanup()
+    }
+  }, new ByteLengthQueuingStrategy({ highWaterMark: 0 }))
+}
+
+export function liveStats() {
+  return {
+    source: feed.source,
+    clients: feed.subscribers.size,
+    published: feed.published,
+    last_event_id: feed.sequence
+  }
+}
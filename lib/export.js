@@ -0,0 +1,170 @@
+// Streaming NDJSON/CSV export
+//
+// Rows are pulled from the Mongo cursor only when the response stream asks
+// for more, so a slow client holds at most one driver batch plus one chunk
+// in memory regardless of how many rows the export covers.
+
+import { ApiError } from '@/lib/errors'
+import { resolveRange, localDate } from '@/lib/laporan'
+import { BOOKING_STATUSES } from '@/lib/records'
+
+export const EXPORT_FORMATS = {
+  ndjson: 'application/x-ndjson; charset=utf-8',
+  csv: 'text/csv; charset=utf-8'
+}
+
+export const BOOKING_EXPORT_COLUMNS = [
+  'id', 'kendaraan_id', 'nama_penyewa', 'no_hp', 'email', 'tanggal_sewa',
+  'tanggal_selesai', 'durasi', 'tipe_sewa', 'dengan_sopir', 'status',
+  'total_harga', 'created_at'
+]
+
+// Chronological, on the same indexes as the list endpoints (reverse scan)
+const EXPORT_SORT = { created_at: 1, id: 1 }
+
+// Driver batch and response chunk sizes; together they bound memory use
+const BATCH_SIZE = 1000
+const CHUNK_BYTES = 64 * 1024
+
+export function parseFormat(searchParams) {
+  const format = searchParams.get('format') || 'ndjson'
+  if (!EXPORT_FORMATS[format]) {
+    throw new ApiError(`Format tidak valid, gunakan: ${Object.keys(EXPORT_FORMATS).join(', ')}`)
+  }
+  return format
+}
+
+// `?status=Dikonfirmasi,Selesai` plus the laporan date parameters
+// (`from`/`to` or `periode`) on created_at. Without any date parameter the
+// export covers all bookings.
+export function exportFilter(searchParams, baseFilter = {}) {
+  const filter = { ...baseFilter }
+
+  const status = searchParams.get('status')
+  if (status) {
+    const statuses = status.split(',').map(s => s.trim()).filter(Boolean)
+    const invalid = statuses.filter(s => !BOOKING_STATUSES.includes(s))
+    if (invalid.length > 0) {
+      throw new ApiError(`Status tidak valid: ${invalid.join(', ')}`)
+    }
+    filter.status = { $in: statuses }
+  }
+
+  if (['from', 'to', 'periode'].some(name => searchParams.has(name))) {
+    const { start, end } = resolveRange(searchParams)
+    if (start || end) {
+      filter.created_at = {}
+      if (start) filter.created_at.$gte = start
+      if (end) filter.created_at.$lt = end
+    }
+  }
+
+  return filter
+}
+
+function csvValue(value) {
+  if (value === undefined || value === null) return ''
+  const text = value instanceof Date ? value.toISOString() : String(value)
+  return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text
+}
+
+function csvRow(values) {
+  return values.map(csvValue).join(',') + '\r\n'
+}
+
+// Oldest first, matching EXPORT_SORT
+function before(a, b) {
+  const byDate = a.created_at - b.created_at
+  return byDate < 0 || (byDate === 0 && a.id < b.id)
+}
+
+// Merge already sorted cursors into one `next()`. Each cursor keeps at most
+// one driver batch in memory, so merging booking with booking_archive does
+// not need a blocking $sort over both.
+function mergedCursor(cursors) {
+  if (cursors.length === 1) return cursors[0]
+  let heads = null
+
+  return {
+    async next() {
+      if (!heads) heads = await Promise.all(cursors.map(cursor => cursor.next()))
+      let pick = -1
+      heads.forEach((doc, i) => {
+        if (doc && (pick < 0 || before(doc, heads[pick]))) pick = i
+      })
+      if (pick < 0) return null
+      const doc = heads[pick]
+      heads[pick] = await cursors[pick].next()
+      return doc
+    },
+    close() {
+      return Promise.all(cursors.map(cursor => cursor.close()))
+    }
+  }
+}
+
+function encoderFor(format, columns) {
+  if (format === 'csv') {
+    return {
+      header: csvRow(columns),
+      row: (doc) => csvRow(columns.map(column => doc[column]))
+    }
+  }
+  return { header: '', row: (doc) => JSON.stringify(doc) + '\n' }
+}
+
+// Build a pull-based stream over `collection.find(filter)`. Each pull fills
+// one chunk of about CHUNK_BYTES; the stream only pulls again once the
+// consumer has drained its queue below the high-water mark. Pass several
+// collections to export them as one chronological stream.
+export function exportStream(collections, filter, { format = 'ndjson', columns = BOOKING_EXPORT_COLUMNS } = {}) {
+  const projection = { _id: 0 }
+  // created_at and id drive the merge order, CSV rows still list `columns`
+  if (format === 'csv') [...columns, 'created_at', 'id'].forEach(column => { projection[column] = 1 })
+
+  const cursor = mergedCursor([].concat(collections).map(collection => collection
+    .find(filter, { projection })
+    .sort(EXPORT_SORT)
+    .batchSize(BATCH_SIZE)))
+  const encoder = new TextEncoder()
+  const { header, row } = encoderFor(format, columns)
+  let pending = header
+
+  return new ReadableStream({
+    async pull(controller) {
+      try {
+        while (pending.length < CHUNK_BYTES) {
+          const doc = await cursor.next()
+          if (!doc) {
+            if (pending) controller.enqueue(encoder.encode(pending))
+            controller.close()
+            await cursor.close()
+            return
+          }
+          pending += row(doc)
+        }
+        controller.enqueue(encoder.encode(pending))
+        pending = ''
+      } catch (error) {
+        await cursor.close().catch(() => {})
+        controller.error(error)
+      }
+    },
+    // Client went away: release the server-side cursor now instead of
+    // waiting for it to time out
+    async cancel() {
+      await cursor.close()
+    }
+  }, new ByteLengthQueuingStrategy({ highWaterMark: CHUNK_BYTES }))
+}
+
+export function exportResponse(stream, format, name) {
+  const extension = format === 'csv' ? 'csv' : 'ndjson'
+  return new Response(stream, {
+    headers: {
+      'Content-Type': EXPORT_FORMATS[format],
+      'Content-Disposition': `attachment; filename="${name}-${localDate(new Date())}.${extension}"`,
+      'Cache-Control': 'no-store'
+    }
+  })
+}
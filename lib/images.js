@@ -0,0 +1,181 @@
+// Content-addressed image store backed by GridFS
+//
+// Uploaded data URLs are decoded once, stored under their SHA-256 hash and
+// replaced in the document by short `/api/images/{hash}` URLs. Identical
+// uploads resolve to the same hash and are stored only once.
+//
+// Only raster formats are accepted. Files are served from the API origin,
+// so anything a browser could run as a document (SVG, HTML) must never be
+// stored, and legacy files of other types are served as downloads.
+
+import { createHash } from 'crypto'
+import { Readable } from 'stream'
+import { GridFSBucket } from 'mongodb'
+import { ApiError } from '@/lib/errors'
+
+const BUCKET_NAME = 'images'
+const THUMB_WIDTH = 480
+const IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+const IMAGE_TYPES = ['image/jpeg', 'image/png', 'image/webp', 'image/gif']
+
+const DATA_URL_PATTERN = /^data:([\w.+-]+\/[\w.+-]+);base64,(.*)$/s
+const HASH_PATTERN = /^[a-f0-9]{64}$/
+const IMAGE_URL_PATTERN = /^\/api\/images\/([a-f0-9]{64})$/
+
+let sharpModule
+
+// sharp is optional: without it thumbnails fall back to the original bytes
+async function loadSharp() {
+  if (sharpModule === undefined) {
+    try {
+      sharpModule = (await import('sharp')).default
+    } catch {
+      sharpModule = null
+    }
+  }
+  return sharpModule
+}
+
+function bucket(db) {
+  return new GridFSBucket(db, { bucketName: BUCKET_NAME })
+}
+
+export function isDataUrl(value) {
+  return typeof value === 'string' && value.startsWith('data:')
+}
+
+export function imageUrl(hash, variant) {
+  return variant ? `/api/images/${hash}/${variant}` : `/api/images/${hash}`
+}
+
+function decodeDataUrl(dataUrl) {
+  const match = DATA_URL_PATTERN.exec(dataUrl)
+  if (!match) {
+    throw new ApiError('Format foto tidak valid, gunakan data URL gambar base64')
+  }
+  if (!IMAGE_TYPES.includes(match[1].toLowerCase())) {
+    throw new ApiError(`Tipe foto tidak didukung, gunakan: ${IMAGE_TYPES.join(', ')}`)
+  }
+  return { contentType: match[1].toLowerCase(), buffer: Buffer.from(match[2], 'base64') }
+}
+
+async function makeThumbnail(buffer, contentType) {
+  const sharp = await loadSharp()
+  if (!sharp) return { buffer, contentType }
+
+  try {
+    const thumb = await sharp(buffer)
+      .rotate()
+      .resize({ width: THUMB_WIDTH, withoutEnlargement: true })
+      .webp({ quality: 75 })
+      .toBuffer()
+    return { buffer: thumb, contentType: 'image/webp' }
+  } catch (error) {
+    console.error('Thumbnail error:', error)
+    return { buffer, contentType }
+  }
+}
+
+async function exists(db, filename) {
+  const file = await db.collection(`${BUCKET_NAME}.files`)
+    .findOne({ filename }, { projection: { _id: 1 } })
+  return !!file
+}
+
+// `images.files` has a unique index on filename (see lib/indexes.js), so
+// when two identical uploads race the second insert fails with a duplicate
+// key. That is a dedupe hit: drop its chunks and keep the stored copy.
+function upload(db, filename, buffer, contentType) {
+  const stream = bucket(db).openUploadStream(filename, { metadata: { content_type: contentType } })
+  return new Promise((resolve, reject) => {
+    Readable.from([buffer])
+      .pipe(stream)
+      .on('finish', resolve)
+      .on('error', reject)
+  }).catch(async (error) => {
+    if (error?.code !== 11000) throw error
+    await db.collection(`${BUCKET_NAME}.chunks`).deleteMany({ files_id: stream.id })
+  })
+}
+
+// Raster images render inline; any other stored type (uploads from before
+// the type check) is sandboxed and downloaded instead of rendered
+function safetyHeaders(contentType) {
+  const headers = { 'X-Content-Type-Options': 'nosniff' }
+  if (!IMAGE_TYPES.includes(contentType)) {
+    headers['Content-Security-Policy'] = "default-src 'none'; sandbox"
+    headers['Content-Disposition'] = 'attachment'
+  }
+  return headers
+}
+
+// Store a data URL and return the `foto`/`foto_thumb` URLs for the document.
+// Values that are already URLs (or empty) are passed through unchanged; a
+// URL of an image already in the store keeps pointing at its thumbnail.
+export async function storeImage(db, foto) {
+  if (!isDataUrl(foto)) {
+    const stored = IMAGE_URL_PATTERN.exec(foto || '')
+    if (stored) return { foto, foto_thumb: imageUrl(stored[1], 'thumb') }
+    return { foto: foto || '', foto_thumb: foto || '' }
+  }
+
+  const { contentType, buffer } = decodeDataUrl(foto)
+  const hash = createHash('sha256').update(buffer).digest('hex')
+
+  if (!(await exists(db, hash))) {
+    const thumb = await makeThumbnail(buffer, contentType)
+    await upload(db, `${hash}/thumb`, thumb.buffer, thumb.contentType)
+    // The original goes last so its presence means both variants exist
+    await upload(db, hash, buffer, contentType)
+  }
+
+  return { foto: imageUrl(hash), foto_thumb: imageUrl(hash, 'thumb') }
+}
+
+// Stream an image out of GridFS. Content never changes for a given hash, so
+// browsers and CDNs may cache it forever.
+export async function imageResponse(db, hash, variant, ifNoneMatch) {
+  if (!HASH_PATTERN.test(hash) || (variant && variant !== 'thumb')) {
+    return null
+  }
+
+  const filename = variant ? `${hash}/${variant}` : hash
+  const etag = `"${filename.replace('/', '-')}"`
+  if (ifNoneMatch === etag) {
+    return new Response(null, {
+      status: 304,
+      headers: { 'Cache-Control': IMMUTABLE_CACHE, 'ETag': etag, 'X-Content-Type-Options': 'nosniff' }
+    })
+  }
+
+  const file = await db.collection(`${BUCKET_NAME}.files`).findOne({ filename })
+  if (!file) return null
+
+  const contentType = file.metadata?.content_type || 'application/octet-stream'
+  const stream = bucket(db).openDownloadStream(file._id)
+  return new Response(Readable.toWeb(stream), {
+    status: 200,
+    headers: {
+      'Content-Type': contentType,
+      'Content-Length': String(file.length),
+      'Cache-Control': IMMUTABLE_CACHE,
+      'ETag': etag,
+      ...safetyHeaders(contentType)
+    }
+  })
+}
+
+// Move inline base64 photos of existing documents into the store
+export async function migrateInlinePhotos(db, collectionName) {
+  const cursor = db.collection(collectionName)
+    .find({ foto: { $regex: '^data:' } }, { projection: { _id: 1, foto: 1 } })
+
+  let migrated = 0
+  for await (const doc of cursor) {
+    const urls = await storeImage(db, doc.foto)
+    await db.collection(collectionName).updateOne({ _id: doc._id }, { $set: urls })
+    migrated++
+  }
+  return migrated
+}
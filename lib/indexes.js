@@ -0,0 +1,73 @@
+// Index provisioning, run once per process from connectToMongo
+//
+// Each entry lists the indexes a handler relies on. createIndexes is
+// idempotent, so running this against an already provisioned database is a
+// cheap no-op.
+
+export const INDEXES = {
+  kendaraan: [
+    { key: { id: 1 }, name: 'id_unique', unique: true },
+    // List endpoints sort by created_at with id as tiebreaker
+    { key: { created_at: -1, id: -1 }, name: 'created_at_id' },
+    // Statistics group and availability search filter on status
+    { key: { status: 1 }, name: 'status' },
+    // Catalog search. No stemmer exists for Indonesian, so the text index
+    // matches whole words without language-specific stop words.
+    {
+      key: { nama: 'text', merek: 'text', deskripsi: 'text' },
+      name: 'catalog_text',
+      weights: { nama: 10, merek: 5, deskripsi: 1 },
+      default_language: 'none'
+    },
+    // Search filters: equality on kategori/transmisi, then the price range
+    { key: { kategori: 1, transmisi: 1, harga_harian: 1 }, name: 'kategori_transmisi_harga' },
+    // Price-only ranges and the harga_terendah/harga_tertinggi sorts
+    { key: { harga_harian: 1, id: 1 }, name: 'harga_harian' }
+  ],
+  booking: [
+    { key: { id: 1 }, name: 'id_unique', unique: true },
+    { key: { created_at: -1, id: -1 }, name: 'created_at_id' },
+    // Revenue aggregation and laporan detail: status $in + created_at range
+    { key: { status: 1, created_at: -1, id: -1 }, name: 'status_created_at' },
+    // Double-booking check and availability $lookup
+    { key: { kendaraan_id: 1, tanggal_sewa: 1, tanggal_selesai: 1 }, name: 'kendaraan_periode' },
+    // Archival job: Selesai bookings that ended before the cutoff
+    { key: { status: 1, tanggal_selesai: 1 }, name: 'status_tanggal_selesai' }
+  ],
+  // Same reads as `booking` when a report or export asks for ?arsip=true
+  booking_archive: [
+    { key: { id: 1 }, name: 'id_unique', unique: true },
+    { key: { created_at: -1, id: -1 }, name: 'created_at_id' },
+    { key: { status: 1, created_at: -1, id: -1 }, name: 'status_created_at' }
+  ],
+  gallery: [
+    { key: { id: 1 }, name: 'id_unique', unique: true },
+    { key: { created_at: -1, id: -1 }, name: 'created_at_id' }
+  ],
+  // GridFS files of the image store are named by content hash; a unique
+  // filename turns concurrent identical uploads into one stored copy
+  'images.files': [
+    { key: { filename: 1 }, name: 'filename_unique', unique: true }
+  ],
+  admin_sessions: [
+    { key: { id: 1 }, name: 'id_unique', unique: true },
+    // MongoDB removes sessions once expires_at has passed
+    { key: { expires_at: 1 }, name: 'expires_at_ttl', expireAfterSeconds: 0 }
+  ]
+}
+
+let provisioning
+
+export function ensureIndexes(db) {
+  if (!provisioning) {
+    provisioning = Promise.all(Object.entries(INDEXES).map(async ([collection, indexes]) => {
+      try {
+        await db.collection(collection).createIndexes(indexes)
+      } catch (error) {
+        // A conflicting legacy index should not take the API down
+        console.error(`Index error on ${collection}:`, error)
+      }
+    }))
+  }
+  return provisioning
+}
@@ -0,0 +1,265 @@
+// Financial report (laporan keuangan) computed inside MongoDB
+
+import { ApiError } from '@/lib/errors'
+import { unionArchive } from '@/lib/archive'
+
+// Rino Rental operates in Sorong, so days are bucketed in WIT (UTC+9, no DST)
+export const TIMEZONE = 'Asia/Jayapura'
+const TZ_OFFSET = '+09:00'
+const TZ_OFFSET_MS = 9 * 60 * 60 * 1000
+const DAY_MS = 24 * 60 * 60 * 1000
+
+// Only these booking states count as revenue
+export const REVENUE_STATUSES = ['Dikonfirmasi', 'Selesai']
+
+const DATE_PATTERN = /^\d{4}-\d{2}-\d{2}$/
+
+// Local calendar date (YYYY-MM-DD) in WIT for a Date
+export function localDate(date) {
+  return new Date(date.getTime() + TZ_OFFSET_MS).toISOString().slice(0, 10)
+}
+
+// Midnight WIT of a YYYY-MM-DD date, `days` days later
+export function startOfLocalDay(ymd, days = 0) {
+  return new Date(new Date(`${ymd}T00:00:00${TZ_OFFSET}`).getTime() + days * DAY_MS)
+}
+
+function parseDateParam(value, name) {
+  if (!DATE_PATTERN.test(value) || isNaN(startOfLocalDay(value).getTime())) {
+    throw new ApiError(`Parameter ${name} harus berformat YYYY-MM-DD`)
+  }
+  return value
+}
+
+function monthAgo(ymd) {
+  const [year, month, day] = ymd.split('-').map(Number)
+  const date = new Date(Date.UTC(year, month - 2, day))
+  return date.toISOString().slice(0, 10)
+}
+
+// Resolve `?from=&to=` (inclusive local dates) or one of the preset
+// `periode` values into a half-open [start, end) range. Unknown periode
+// values keep the historical behaviour of reporting over all bookings.
+export function resolveRange(searchParams, now = new Date()) {
+  const from = searchParams.get('from')
+  const to = searchParams.get('to')
+
+  if (from || to) {
+    const start = from ? startOfLocalDay(parseDateParam(from, 'from')) : null
+    const end = to ? startOfLocalDay(parseDateParam(to, 'to'), 1) : null
+    if (start && end && start >= end) {
+      throw new ApiError('Parameter from harus sebelum atau sama dengan to')
+    }
+    return { periode: 'kustom', start, end }
+  }
+
+  const periode = searchParams.get('periode') || '1-hari' // 1-hari, 7-hari, 1-bulan
+  const today = localDate(now)
+
+  switch (periode) {
+    case '1-hari':
+      return { periode, start: startOfLocalDay(today), end: startOfLocalDay(today, 1) }
+    // Ranges cover whole WIT days (today included) so they can be answered
+    // from the daily rollup
+    case '7-hari':
+      return { periode, start: startOfLocalDay(today, -6), end: startOfLocalDay(today, 1) }
+    case '1-bulan':
+      return { periode, start: startOfLocalDay(monthAgo(today)), end: startOfLocalDay(today, 1) }
+    default:
+      return { periode, start: null, end: null }
+  }
+}
+
+export function revenueFilter({ start, end }) {
+  const filter = { status: { $in: REVENUE_STATUSES } }
+  if (start || end) {
+    filter.created_at = {}
+    if (start) filter.created_at.$gte = start
+    if (end) filter.created_at.$lt = end
+  }
+  return filter
+}
+
+// Daily revenue buckets, sorted by date. Totals are derived from these few
+// rows instead of shipping every booking back to Node. Archived bookings
+// still count, matching the rollup.
+export async function pendapatanHarian(db, range) {
+  const filter = revenueFilter(range)
+  const buckets = await db.collection('booking').aggregate([
+    { $match: filter },
+    unionArchive(filter),
+    {
+      $group: {
+        _id: { $dateToString: { format: '%Y-%m-%d', date: '$created_at', timezone: TIMEZONE } },
+        pendapatan: { $sum: { $ifNull: ['$total_harga', 0] } },
+        transaksi: { $sum: 1 }
+      }
+    },
+    { $sort: { _id: 1 } }
+  ]).toArray()
+
+  return buckets.map(({ _id, pendapatan, transaksi }) => ({ tanggal: _id, pendapatan, transaksi }))
+}
+
+export function summarize(periode, range, harian) {
+  const totalPendapatan = harian.reduce((sum, day) => sum + day.pendapatan, 0)
+  const totalTransaksi = harian.reduce((sum, day) => sum + day.transaksi, 0)
+
+  return {
+    periode,
+    dari: range.start,
+    sampai: range.end,
+    total_pendapatan: totalPendapatan,
+    total_transaksi: totalTransaksi,
+    rata_rata_per_transaksi: totalTransaksi > 0 ? Math.round(totalPendapatan / totalTransaksi) : 0,
+    pendapatan_harian: harian
+  }
+}
+
+// Daily revenue rollup
+//
+// `pendapatan_harian` holds one document per WIT day ({ _id: 'YYYY-MM-DD' })
+// that is kept current with $inc whenever a booking enters or leaves a
+// revenue state, so reports read a handful of small documents instead of
+// scanning `booking`.
+
+export const ROLLUP_COLLECTION = 'pendapatan_harian'
+
+function contribution(booking) {
+  if (!booking || !REVENUE_STATUSES.includes(booking.status)) {
+    return { pendapatan: 0, transaksi: 0 }
+  }
+  return { pendapatan: Number(booking.total_harga) || 0, transaksi: 1 }
+}
+
+// Apply the revenue difference between two versions of a booking. Pass
+// `before = null` for inserts and `after = null` for deletes.
+export function applyRevenueChange(db, before, after) {
+  return applyRevenueChanges(db, [[before, after]])
+}
+
+// Batch form of applyRevenueChange: deltas are summed per day and written
+// with one bulkWrite
+export async function applyRevenueChanges(db, changes) {
+  const perDay = new Map()
+
+  for (const [before, after] of changes) {
+    const booking = after || before
+    const old = contribution(before)
+    const current = contribution(after)
+    const pendapatan = current.pendapatan - old.pendapatan
+    const transaksi = current.transaksi - old.transaksi
+    if (pendapatan === 0 && transaksi === 0) continue
+
+    const tanggal = localDate(new Date(booking.created_at))
+    const delta = perDay.get(tanggal) || { pendapatan: 0, transaksi: 0 }
+    delta.pendapatan += pendapatan
+    delta.transaksi += transaksi
+    perDay.set(tanggal, delta)
+  }
+
+  if (perDay.size === 0) return
+
+  const now = new Date()
+  await db.collection(ROLLUP_COLLECTION).bulkWrite([...perDay].map(([tanggal, delta]) => ({
+    updateOne: {
+      filter: { _id: tanggal },
+      update: { $inc: delta, $set: { updated_at: now } },
+      upsert: true
+    }
+  })), { ordered: false })
+}
+
+export function rollupFilter({ start, end }) {
+  const filter = {}
+  if (start || end) {
+    filter._id = {}
+    if (start) filter._id.$gte = localDate(start)
+    if (end) filter._id.$lt = localDate(end)
+  }
+  return filter
+}
+
+export async function rollupHarian(db, range) {
+  const days = await db.collection(ROLLUP_COLLECTION)
+    .find(rollupFilter(range))
+    .sort({ _id: 1 })
+    .toArray()
+
+  return days
+    .filter(day => day.transaksi > 0)
+    .map(({ _id, pendapatan, transaksi }) => ({ tanggal: _id, pendapatan, transaksi }))
+}
+
+// Recompute the whole rollup from `booking` and `booking_archive` and
+// replace the collection
+export async function rebuildRollup(db) {
+  const filter = revenueFilter({})
+  await db.collection('booking').aggregate([
+    { $match: filter },
+    unionArchive(filter),
+    {
+      $group: {
+        _id: { $dateToString: { format: '%Y-%m-%d', date: '$created_at', timezone: TIMEZONE } },
+        pendapatan: { $sum: { $ifNull: ['$total_harga', 0] } },
+        transaksi: { $sum: 1 }
+      }
+    },
+    { $set: { updated_at: '$$NOW' } },
+    { $out: ROLLUP_COLLECTION }
+  ]).toArray()
+
+  return db.collection(ROLLUP_COLLECTION).countDocuments()
+}
+
+let rollupChecked
+
+// Build the rollup on a deployment that has revenue bookings but no rollup
+// yet (e.g. right after upgrading), so reports do not read Rp 0 until
+// someone calls the rebuild endpoint. Runs once per process from
+// connectToMongo.
+export function ensureRollup(db) {
+  if (!rollupChecked) {
+    rollupChecked = (async () => {
+      const filter = revenueFilter({})
+      const [rollupDay, revenueBooking] = await Promise.all([
+        db.collection(ROLLUP_COLLECTION).findOne({}, { projection: { _id: 1 } }),
+        db.collection('booking').findOne(filter, { projection: { _id: 1 } })
+      ])
+      if (!rollupDay && revenueBooking) await rebuildRollup(db)
+    })().catch((error) => {
+      // Retry on the next connect attempt
+      rollupChecked = null
+      throw error
+    })
+  }
+  return rollupChecked
+}
+
+// Compare the rollup against a full recomputation and list mismatching days
+export async function verifyRollup(db) {
+  const [expected, actual] = await Promise.all([
+    pendapatanHarian(db, {}),
+    rollupHarian(db, {})
+  ])
+
+  const byDate = new Map()
+  for (const day of expected) byDate.set(day.tanggal, { tanggal: day.tanggal, booking: day, rollup: null })
+  for (const day of actual) {
+    const entry = byDate.get(day.tanggal) || { tanggal: day.tanggal, booking: null, rollup: null }
+    entry.rollup = day
+    byDate.set(day.tanggal, entry)
+  }
+
+  const selisih = [...byDate.values()].filter(({ booking, rollup }) =>
+    !booking || !rollup ||
+    booking.pendapatan !== rollup.pendapatan ||
+    booking.transaksi !== rollup.transaksi
+  )
+
+  return {
+    konsisten: selisih.length === 0,
+    hari_diperiksa: byDate.size,
+    selisih
+  }
+}
@@ -0,0 +1,109 @@
+// In-process request metrics in Prometheus text format
+
+import { cacheStats } from '@/lib/cache'
+import { liveStats } from '@/lib/events'
+import { poolStats } from '@/lib/mongo'
+
+// Upper bounds in seconds, Prometheus convention
+const BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5]
+
+class Histogram {
+  constructor() {
+    this.counts = new Array(BUCKETS.length).fill(0)
+    this.count = 0
+    this.sum = 0
+  }
+
+  observe(seconds) {
+    for (let i = 0; i < BUCKETS.length; i++) {
+      if (seconds <= BUCKETS[i]) this.counts[i]++
+    }
+    this.count++
+    this.sum += seconds
+  }
+}
+
+const histograms = new Map()
+const responses = new Map()
+
+export function observeRequest(method, route, status, durationMs) {
+  const key = `${method} ${route}`
+  if (!histograms.has(key)) histograms.set(key, { method, route, histogram: new Histogram() })
+  histograms.get(key).histogram.observe(durationMs / 1000)
+
+  const statusKey = `${key} ${status}`
+  const entry = responses.get(statusKey) || { method, route, status, count: 0 }
+  entry.count++
+  responses.set(statusKey, entry)
+}
+
+function labels(values) {
+  return Object.entries(values)
+    .map(([name, value]) => `${name}="${String(value).replace(/\\/g, '\\\\').replace(/"/g, '\\"')}"`)
+    .join(',')
+}
+
+export function renderPrometheus() {
+  const lines = []
+
+  lines.push('# HELP rino_http_request_duration_seconds API request latency by route')
+  lines.push('# TYPE rino_http_request_duration_seconds histogram')
+  for (const { method, route, histogram } of histograms.values()) {
+    BUCKETS.forEach((le, i) => {
+      lines.push(`rino_http_request_duration_seconds_bucket{${labels({ method, route, le })}} ${histogram.counts[i]}`)
+    })
+    lines.push(`rino_http_request_duration_seconds_bucket{${labels({ method, route, le: '+Inf' })}} ${histogram.count}`)
+    lines.push(`rino_http_request_duration_seconds_sum{${labels({ method, route })}} ${histogram.sum}`)
+    lines.push(`rino_http_request_duration_seconds_count{${labels({ method, route })}} ${histogram.count}`)
+  }
+
+  lines.push('# HELP rino_http_responses_total API responses by route and status')
+  lines.push('# TYPE rino_http_responses_total counter')
+  for (const { method, route, status, count } of responses.values()) {
+    lines.push(`rino_http_responses_total{${labels({ method, route, status })}} ${count}`)
+  }
+
+  const pool = poolStats()
+  lines.push('# TYPE rino_mongo_pool_checkouts_total counter')
+  lines.push(`rino_mongo_pool_checkouts_total ${pool.checkouts}`)
+  lines.push('# TYPE rino_mongo_pool_checkout_failures_total counter')
+  for (const [reason, count] of Object.entries(pool.checkout_failures)) {
+    lines.push(`rino_mongo_pool_checkout_failures_total{${labels({ reason })}} ${count}`)
+  }
+  lines.push('# TYPE rino_mongo_pool_checked_out gauge')
+  lines.push(`rino_mongo_pool_checked_out ${pool.checked_out}`)
+  lines.push('# TYPE rino_mongo_pool_waiting gauge')
+  lines.push(`rino_mongo_pool_waiting ${pool.waiting}`)
+  lines.push('# TYPE rino_mongo_pool_wait_seconds_total counter')
+  lines.push(`rino_mongo_pool_wait_seconds_total ${pool.wait_ms_total / 1000}`)
+
+  const caches = Object.entries(cacheStats())
+  lines.push('# TYPE rino_cache_hits_total counter')
+  for (const [cache, stats] of caches) {
+    lines.push(`rino_cache_hits_total{${labels({ cache })}} ${stats.hits}`)
+  }
+  lines.push('# TYPE rino_cache_misses_total counter')
+  for (const [cache, stats] of caches) {
+    lines.push(`rino_cache_misses_total{${labels({ cache })}} ${stats.misses}`)
+  }
+  lines.push('# TYPE rino_cache_evictions_total counter')
+  for (const [cache, stats] of caches) {
+    lines.push(`rino_cache_evictions_total{${labels({ cache })}} ${stats.evictions}`)
+  }
+  lines.push('# TYPE rino_cache_entries gauge')
+  for (const [cache, stats] of caches) {
+    lines.push(`rino_cache_entries{${labels({ cache })}} ${stats.size}`)
+  }
+  lines.push('# TYPE rino_cache_hit_ratio gauge')
+  for (const [cache, stats] of caches) {
+    lines.push(`rino_cache_hit_ratio{${labels({ cache })}} ${stats.hit_ratio}`)
+  }
+
+  const live = liveStats()
+  lines.push('# TYPE rino_live_clients gauge')
+  lines.push(`rino_live_clients{${labels({ source: live.source })}} ${live.clients}`)
+  lines.push('# TYPE rino_live_events_total counter')
+  lines.push(`rino_live_events_total ${live.published}`)
+
+  return lines.join('\n') + '\n'
+}
@@ -0,0 +1,131 @@
+// MongoDB connection pool
+//
+// The client is kept on globalThis so the warm-up in instrumentation.js and
+// the route handlers share one pool even though Next.js bundles them
+// separately.
+
+import { MongoClient } from 'mongodb'
+import { ensureIndexes } from '@/lib/indexes'
+import { backfillTanggalSelesai } from '@/lib/availability'
+import { ensureRollup } from '@/lib/laporan'
+
+function intEnv(name, fallback) {
+  const value = parseInt(process.env[name])
+  return isNaN(value) ? fallback : value
+}
+
+export function poolOptions() {
+  return {
+    maxPoolSize: intEnv('MONGO_MAX_POOL_SIZE', 50),
+    minPoolSize: intEnv('MONGO_MIN_POOL_SIZE', 5),
+    maxIdleTimeMS: intEnv('MONGO_MAX_IDLE_TIME_MS', 60000),
+    waitQueueTimeoutMS: intEnv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000),
+    serverSelectionTimeoutMS: intEnv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000),
+    connectTimeoutMS: intEnv('MONGO_CONNECT_TIMEOUT_MS', 10000)
+  }
+}
+
+const pool = globalThis._mongoPoolStats || (globalThis._mongoPoolStats = {
+  connections_created: 0,
+  connections_closed: 0,
+  checkouts: 0,
+  checkout_failures: {},
+  checked_out: 0,
+  waiting: 0,
+  wait_ms_total: 0,
+  wait_ms_max: 0,
+  clears: 0
+})
+
+// Start times of checkouts still waiting for a connection. The wait queue
+// is FIFO, so completions pair up with the oldest pending start.
+const waitStarts = []
+
+function finishWait(event) {
+  const startedAt = waitStarts.shift()
+  pool.waiting = waitStarts.length
+  const waited = event.durationMS ?? (startedAt ? Date.now() - startedAt : 0)
+  pool.wait_ms_total += waited
+  pool.wait_ms_max = Math.max(pool.wait_ms_max, waited)
+}
+
+function instrumentPool(client) {
+  client.on('connectionCreated', () => { pool.connections_created++ })
+  client.on('connectionClosed', () => { pool.connections_closed++ })
+  client.on('connectionPoolCleared', () => { pool.clears++ })
+  client.on('connectionCheckOutStarted', () => {
+    waitStarts.push(Date.now())
+    pool.waiting = waitStarts.length
+  })
+  client.on('connectionCheckedOut', (event) => {
+    finishWait(event)
+    pool.checkouts++
+    pool.checked_out++
+  })
+  client.on('connectionCheckOutFailed', (event) => {
+    finishWait(event)
+    pool.checkout_failures[event.reason] = (pool.checkout_failures[event.reason] || 0) + 1
+  })
+  client.on('connectionCheckedIn', () => { pool.checked_out-- })
+}
+
+export function connectToMongo() {
+  if (!globalThis._mongoDb) {
+    const client = new MongoClient(process.env.MONGO_URL, poolOptions())
+    instrumentPool(client)
+    globalThis._mongoClient = client
+
+    globalThis._mongoDb = client.connect()
+      .then(async () => {
+        const db = client.db(process.env.DB_NAME)
+        // Idempotent provisioning, done once before the first query
+        await Promise.all([ensureIndexes(db), backfillTanggalSelesai(db), ensureRollup(db)])
+        return db
+      })
+      .catch((error) => {
+        // Let the next request retry instead of caching the failure
+        globalThis._mongoDb = null
+        client.close().catch(() => {})
+        throw error
+      })
+  }
+  return globalThis._mongoDb
+}
+
+// The client behind connectToMongo(), for sessions and transactions
+export function mongoClient() {
+  return globalThis._mongoClient
+}
+
+let transactionSupport
+
+// Transactions need a replica set or sharded cluster; a standalone mongod
+// (the usual local setup) rejects them
+export function supportsTransactions(db) {
+  if (!transactionSupport) {
+    transactionSupport = db.command({ hello: 1 })
+      .then(hello => Boolean(hello.setName) || hello.msg === 'isdbgrid')
+      .catch(() => false)
+  }
+  return transactionSupport
+}
+
+// Connect and ping ahead of the first request. With minPoolSize > 0 the
+// driver also opens the minimum number of connections in the background.
+export async function warmUp() {
+  const startedAt = Date.now()
+  const db = await connectToMongo()
+  await db.command({ ping: 1 })
+  return Date.now() - startedAt
+}
+
+export function poolStats() {
+  const failures = Object.values(pool.checkout_failures).reduce((sum, count) => sum + count, 0)
+  const attempts = pool.checkouts + failures
+  return {
+    options: poolOptions(),
+    ...pool,
+    checkout_failures: { ...pool.checkout_failures },
+    wait_ms_avg: attempts > 0 ? Math.round((pool.wait_ms_total / attempts) * 100) / 100 : 0
+  }
+}
@@ -0,0 +1,125 @@
+// Keyset pagination and field projection for list endpoints
+
+import { ApiError } from '@/lib/errors'
+
+export const DEFAULT_LIMIT = 20
+export const MAX_LIMIT = 100
+
+// Sort used by every list endpoint. `id` breaks ties between documents
+// created in the same millisecond so the cursor is always unambiguous.
+export const LIST_SORT = { created_at: -1, id: -1 }
+
+export class ListQueryError extends ApiError {}
+
+export function encodeCursor(doc) {
+  const payload = JSON.stringify({ c: new Date(doc.created_at).toISOString(), i: doc.id })
+  return Buffer.from(payload).toString('base64url')
+}
+
+export function decodeCursor(cursor) {
+  try {
+    const { c, i } = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'))
+    const createdAt = new Date(c)
+    if (typeof i !== 'string' || isNaN(createdAt.getTime())) {
+      throw new Error('malformed cursor')
+    }
+    return { created_at: createdAt, id: i }
+  } catch {
+    throw new ListQueryError('Cursor tidak valid')
+  }
+}
+
+// Build a Mongo projection from `fields=nama,harga_harian` (inclusion) or
+// `fields=-foto,-deskripsi` (exclusion). `id` and `created_at` are always
+// kept on inclusion projections because the cursor is built from them.
+export function parseFields(fields) {
+  const projection = { _id: 0 }
+  if (!fields) return projection
+
+  const names = fields.split(',').map(f => f.trim()).filter(Boolean)
+  const excluded = names.filter(f => f.startsWith('-'))
+
+  if (excluded.length > 0 && excluded.length !== names.length) {
+    throw new ListQueryError('Parameter fields tidak boleh mencampur inklusi dan eksklusi')
+  }
+
+  if (excluded.length > 0) {
+    for (const name of excluded) {
+      const field = name.slice(1)
+      if (field === 'id' || field === 'created_at') continue
+      projection[field] = 0
+    }
+    return projection
+  }
+
+  for (const name of names) projection[name] = 1
+  projection.id = 1
+  projection.created_at = 1
+  return projection
+}
+
+export function parseListOptions(searchParams) {
+  const rawLimit = searchParams.get('limit')
+  const cursor = searchParams.get('cursor')
+  let limit = DEFAULT_LIMIT
+
+  if (rawLimit !== null) {
+    limit = parseInt(rawLimit)
+    if (isNaN(limit) || limit < 1) {
+      throw new ListQueryError('Parameter limit tidak valid')
+    }
+    limit = Math.min(limit, MAX_LIMIT)
+  }
+
+  return {
+    // Without limit/cursor the endpoint keeps returning the full array
+    paginated: rawLimit !== null || cursor !== null,
+    limit,
+    after: cursor ? decodeCursor(cursor) : null,
+    projection: parseFields(searchParams.get('fields'))
+  }
+}
+
+// Newest first, matching LIST_SORT
+function compareListOrder(a, b) {
+  const byDate = new Date(b.created_at) - new Date(a.created_at)
+  if (byDate !== 0) return byDate
+  return a.id < b.id ? 1 : a.id > b.id ? -1 : 0
+}
+
+// Run a list query. Returns the plain array for unpaginated requests and
+// `{ data, next_cursor }` otherwise. `collections` may be an array (e.g.
+// booking plus booking_archive): each is queried on its own index and the
+// results are merged in LIST_SORT order.
+export async function findPage(collections, filter, options) {
+  const { paginated, limit, after, projection } = options
+  const sources = [].concat(collections)
+
+  const query = paginated && after
+    ? {
+        $and: [filter, {
+          $or: [
+            { created_at: { $lt: after.created_at } },
+            { created_at: after.created_at, id: { $lt: after.id } }
+          ]
+        }]
+      }
+    : filter
+
+  // Fetch one extra document to know whether another page exists
+  const results = await Promise.all(sources.map(collection => {
+    const cursor = collection.find(query, { projection }).sort(LIST_SORT)
+    return (paginated ? cursor.limit(limit + 1) : cursor).toArray()
+  }))
+  const docs = results.length === 1 ? results[0] : results.flat().sort(compareListOrder)
+
+  if (!paginated) return docs
+
+  const hasMore = docs.length > limit
+  const data = hasMore ? docs.slice(0, limit) : docs
+
+  return {
+    data,
+    next_cursor: hasMore ? encodeCursor(data[data.length - 1]) : null
+  }
+}
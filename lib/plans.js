@@ -0,0 +1,127 @@
+// Query plans for GET /api/query-plans
+//
+// Every entry builds its query with the same helpers the handler uses, so
+// the plans describe what the API actually sends rather than a hand-copied
+// version of it. Full-collection rebuild/verify aggregations are left out.
+// A COLLSCAN is a regression unless the entry is listed in
+// ALLOWED_COLLSCANS with the reason no index can help.
+
+import { LIST_SORT, DEFAULT_LIMIT } from '@/lib/pagination'
+import { overlapFilter, availabilityPipeline } from '@/lib/availability'
+import { resolveRange, revenueFilter, rollupFilter, ROLLUP_COLLECTION } from '@/lib/laporan'
+import { parseSearch, searchPipeline } from '@/lib/search'
+import { ARCHIVE_COLLECTION, archiveFilter } from '@/lib/archive'
+import { STATUS_COUNT_PIPELINE } from '@/lib/records'
+
+const SAMPLE_ID = '00000000-0000-0000-0000-000000000000'
+const DAY_MS = 24 * 60 * 60 * 1000
+// Query string of the homepage catalog (app/page.js) before any input
+const HOMEPAGE_SEARCH = 'limit=24&offset=0&cocok=awalan'
+
+export const ALLOWED_COLLSCANS = {
+  'GET /api/kendaraan/cari (beranda)':
+    'No filter: the total and facet counts cover the whole catalog, so every vehicle is read whichever index is used',
+  'GET /api/kendaraan/cari?cocok=awalan&q=':
+    'Word-prefix regexes (\\bterm, case-insensitive) are not anchored at the start of the field, so no index bounds apply'
+}
+
+function explainCommand(db, command) {
+  return db.command({ explain: command, verbosity: 'queryPlanner' })
+}
+
+function listPage(collection, filter = {}) {
+  return collection.find(filter, { projection: { _id: 0 } }).sort(LIST_SORT).limit(DEFAULT_LIMIT + 1)
+}
+
+function searchPlan(db, query) {
+  const pipeline = searchPipeline(parseSearch(new URLSearchParams(query)))
+  return db.collection('kendaraan').aggregate(pipeline).explain('queryPlanner')
+}
+
+function queries(db) {
+  const kendaraan = db.collection('kendaraan')
+  const booking = db.collection('booking')
+  const now = new Date()
+  const window = { start: now, end: new Date(now.getTime() + 3 * DAY_MS) }
+  const bulanIni = resolveRange(new URLSearchParams({ periode: '1-bulan' }), now)
+
+  return {
+    'GET /api/kendaraan': () => listPage(kendaraan).explain('queryPlanner'),
+    'GET /api/kendaraan/{id}': () => kendaraan.find({ id: SAMPLE_ID }).explain('queryPlanner'),
+    'PUT /api/kendaraan/{id}': () => explainCommand(db, {
+      findAndModify: 'kendaraan', query: { id: SAMPLE_ID }, update: { $set: { status: 'Tersedia' } }
+    }),
+    'DELETE /api/kendaraan/{id}': () => explainCommand(db, {
+      delete: 'kendaraan', deletes: [{ q: { id: SAMPLE_ID }, limit: 1 }]
+    }),
+    'GET /api/kendaraan/cari?q=': () => searchPlan(db, 'q=avanza&kategori=MPV'),
+    'GET /api/kendaraan/cari (beranda)': () => searchPlan(db, HOMEPAGE_SEARCH),
+    'GET /api/kendaraan/cari?cocok=awalan&q=': () => searchPlan(db, `${HOMEPAGE_SEARCH}&q=ava`),
+    'GET /api/kendaraan/cari?cocok=awalan&kategori=': () => searchPlan(db, `${HOMEPAGE_SEARCH}&q=ava&kategori=MPV`),
+    'GET /api/kendaraan/cari?kategori=&transmisi=': () => searchPlan(db, 'kategori=MPV&transmisi=Manual&harga_max=400000'),
+    'GET /api/kendaraan/cari?sort=harga_terendah': () => searchPlan(db, 'harga_min=300000&sort=harga_terendah'),
+    'GET /api/booking': () => listPage(booking).explain('queryPlanner'),
+    'POST /api/booking (overlap)': () => booking.find(overlapFilter(SAMPLE_ID, window.start, window.end)).limit(1).explain('queryPlanner'),
+    'PUT /api/booking/{id}': () => explainCommand(db, {
+      findAndModify: 'booking', query: { id: SAMPLE_ID }, update: { $set: { status: 'Selesai' } }
+    }),
+    'DELETE /api/booking/{id}': () => explainCommand(db, {
+      findAndModify: 'booking', query: { id: SAMPLE_ID }, remove: true
+    }),
+    'POST /api/booking/arsip': () => booking.find(archiveFilter(now)).sort({ tanggal_selesai: 1 }).limit(1000).explain('queryPlanner'),
+    'GET /api/gallery': () => db.collection('gallery').find({}, { projection: { _id: 0 } }).sort(LIST_SORT).explain('queryPlanner'),
+    'GET /api/ketersediaan': () => kendaraan.aggregate(availabilityPipeline(window, { _id: 0 })).explain('executionStats'),
+    // What the $lookup runs for each vehicle: the foreignField equality
+    // plus its sub-pipeline $match
+    'GET /api/ketersediaan ($lookup booking)': () => booking.find(overlapFilter(SAMPLE_ID, window.start, window.end)).limit(1).explain('queryPlanner'),
+    'GET /api/laporan-keuangan': () => db.collection(ROLLUP_COLLECTION).find(rollupFilter(bulanIni)).sort({ _id: 1 }).explain('queryPlanner'),
+    'GET /api/laporan-keuangan?detail=true': () => listPage(booking, revenueFilter(bulanIni)).explain('queryPlanner'),
+    'GET /api/laporan-keuangan?detail=true&arsip=true': () => listPage(db.collection(ARCHIVE_COLLECTION), revenueFilter(bulanIni)).explain('queryPlanner'),
+    'GET /api/statistics': () => kendaraan.aggregate(STATUS_COUNT_PIPELINE).explain('queryPlanner'),
+    'GET /api/admin/session (cache miss)': () => db.collection('admin_sessions').find({ id: SAMPLE_ID }, { projection: { _id: 0 } }).limit(1).explain('queryPlanner'),
+    'POST /api/admin/logout': () => explainCommand(db, {
+      delete: 'admin_sessions', deletes: [{ q: { id: SAMPLE_ID }, limit: 1 }]
+    })
+  }
+}
+
+// Stage names, index scans and $lookup statistics of an explain result,
+// skipping rejected plans
+function summarize(explain) {
+  const summary = { stages: [], indexes: [], lookups: [] }
+
+  const walk = (node) => {
+    if (Array.isArray(node)) return node.forEach(walk)
+    if (!node || typeof node !== 'object') return
+
+    if (typeof node.stage === 'string') summary.stages.push(node.stage)
+    if (node.stage === 'IXSCAN') summary.indexes.push({ name: node.indexName, bounds: node.indexBounds })
+    if (node.$lookup) {
+      summary.lookups.push({
+        from: node.$lookup.from,
+        indexes_used: node.indexesUsed || [],
+        collection_scans: node.collectionScans ?? null
+      })
+    }
+    for (const [key, value] of Object.entries(node)) {
+      if (key !== 'rejectedPlans') walk(value)
+    }
+  }
+  walk(explain)
+
+  summary.collscan = summary.stages.includes('COLLSCAN')
+  return summary
+}
+
+export async function explainQueries(db) {
+  const entries = await Promise.all(Object.entries(queries(db)).map(async ([label, explain]) => {
+    try {
+      const summary = summarize(await explain())
+      if (summary.collscan && ALLOWED_COLLSCANS[label]) summary.collscan_reason = ALLOWED_COLLSCANS[label]
+      return [label, summary]
+    } catch (error) {
+      return [label, { error: error.message }]
+    }
+  }))
+  return Object.fromEntries(entries)
+}
@@ -0,0 +1,115 @@
+// Server-side booking prices from a cached tariff table
+//
+// `total_harga` is derived from the vehicle's harga_harian/harga_bulanan,
+// the rental length and the driver option, never taken from the client.
+// Tariffs are cached per vehicle id; PUT /api/kendaraan/{id} drops the
+// entry when a price changes, other instances pick it up after the TTL.
+
+import { ApiError } from '@/lib/errors'
+import { TtlCache } from '@/lib/cache'
+
+export const TIPE_SEWA = ['harian', 'bulanan']
+export const TARIFF_FIELDS = ['harga_harian', 'harga_bulanan']
+// Booking fields that change the price of an existing booking
+export const PRICE_FIELDS = ['kendaraan_id', 'durasi', 'tipe_sewa', 'dengan_sopir']
+
+export const MAX_QUOTE_ITEMS = parseInt(process.env.QUOTE_MAX_ITEMS || '500')
+
+// Driver fee per rental day; a monthly rental counts as 30 days
+const TARIF_SOPIR_HARIAN = parseInt(process.env.TARIF_SOPIR_HARIAN || '250000')
+const DAYS_PER_MONTH = 30
+
+export const tariffCache = new TtlCache('tarif', {
+  ttl: parseInt(process.env.TARIF_CACHE_TTL_MS || '600000'),
+  maxEntries: parseInt(process.env.TARIF_CACHE_MAX_ENTRIES || '5000')
+})
+
+// Resolves to a Map of kendaraan id -> { harga_harian, harga_bulanan };
+// every cache miss is fetched in one query
+export function loadTariffs(db, kendaraanIds) {
+  return tariffCache.getManyOrLoad(kendaraanIds, async (missing) => {
+    const rows = await db.collection('kendaraan')
+      .find({ id: { $in: missing } }, { projection: { _id: 0, id: 1, harga_harian: 1, harga_bulanan: 1 } })
+      .toArray()
+    return new Map(rows.map(({ id, ...tariff }) => [id, tariff]))
+  })
+}
+
+export async function tariffFor(db, kendaraanId) {
+  const tariff = (await loadTariffs(db, [kendaraanId])).get(kendaraanId)
+  if (!tariff) throw new ApiError('Kendaraan tidak ditemukan', 404)
+  return tariff
+}
+
+// Returns the Indonesian error message for the tariff fields present in a
+// vehicle write, or null
+export function validateTariff(body) {
+  const invalid = TARIFF_FIELDS.filter(field => {
+    if (!(field in body)) return false
+    const value = Number(body[field])
+    return !Number.isInteger(value) || value < 1
+  })
+  return invalid.length > 0 ? `${invalid.join(', ')} harus bilangan bulat positif` : null
+}
+
+// Returns the Indonesian error message for a pricing input, or null
+export function validatePricing({ durasi, tipe_sewa: tipeSewa }) {
+  const days = Number(durasi)
+  if (!Number.isInteger(days) || days < 1) {
+    return 'durasi harus bilangan bulat positif'
+  }
+  if (tipeSewa && !TIPE_SEWA.includes(tipeSewa)) {
+    return `tipe_sewa tidak valid, gunakan: ${TIPE_SEWA.join(', ')}`
+  }
+  return null
+}
+
+export function priceBooking(tariff, { durasi, tipe_sewa: tipeSewa = 'harian', dengan_sopir: denganSopir = false }) {
+  const days = parseInt(durasi)
+  const bulanan = tipeSewa === 'bulanan'
+  const hargaSewa = (bulanan ? tariff.harga_bulanan : tariff.harga_harian) * days
+  const biayaSopir = denganSopir ? TARIF_SOPIR_HARIAN * days * (bulanan ? DAYS_PER_MONTH : 1) : 0
+
+  return {
+    harga_sewa: hargaSewa,
+    biaya_sopir: biayaSopir,
+    total_harga: hargaSewa + biayaSopir
+  }
+}
+
+// Price many `{ kendaraan_id, durasi, tipe_sewa, dengan_sopir }` items with
+// one tariff lookup. Each item gets its own entry, like the bulk endpoints.
+export async function quote(db, items) {
+  if (!Array.isArray(items) || items.length === 0) {
+    throw new ApiError('Body harus berupa JSON array yang tidak kosong')
+  }
+  if (items.length > MAX_QUOTE_ITEMS) {
+    throw new ApiError(`Maksimal ${MAX_QUOTE_ITEMS} item per permintaan`, 413)
+  }
+
+  const isItem = item => item !== null && typeof item === 'object' && item.kendaraan_id
+  const tariffs = await loadTariffs(db, items.filter(isItem).map(item => item.kendaraan_id))
+
+  return items.map((item, index) => {
+    if (!isItem(item)) {
+      return { index, status: 'error', error: 'Field wajib tidak diisi: kendaraan_id' }
+    }
+    const error = validatePricing(item)
+    if (error) return { index, status: 'error', error }
+
+    const tariff = tariffs.get(item.kendaraan_id)
+    if (!tariff) return { index, status: 'error', error: 'Kendaraan tidak ditemukan' }
+
+    const tipeSewa = item.tipe_sewa || 'harian'
+    const denganSopir = Boolean(item.dengan_sopir)
+    return {
+      index,
+      status: 'ok',
+      kendaraan_id: item.kendaraan_id,
+      durasi: parseInt(item.durasi),
+      tipe_sewa: tipeSewa,
+      dengan_sopir: denganSopir,
+      ...priceBooking(tariff, { durasi: item.durasi, tipe_sewa: tipeSewa, dengan_sopir: denganSopir })
+    }
+  })
+}
@@ -0,0 +1,91 @@
+// Validation and document construction shared by single and bulk writes
+
+import { v4 as uuidv4 } from 'uuid'
+import { tanggalSelesai } from '@/lib/availability'
+import { validatePricing, validateTariff, priceBooking } from '@/lib/pricing'
+
+export const KENDARAAN_REQUIRED = ['nama', 'merek', 'plat_nomor', 'kategori', 'harga_harian', 'harga_bulanan', 'kapasitas', 'transmisi', 'bahan_bakar']
+export const BOOKING_REQUIRED = ['kendaraan_id', 'nama_penyewa', 'no_hp', 'tanggal_sewa', 'durasi']
+
+export const KENDARAAN_STATUSES = ['Tersedia', 'Disewa', 'Perbaikan']
+export const BOOKING_STATUSES = ['Pending', 'Dikonfirmasi', 'Selesai', 'Dibatalkan']
+
+// Vehicle count per status for the dashboard. Sorting first lets the
+// status index cover the group instead of a COLLSCAN.
+export const STATUS_COUNT_PIPELINE = [
+  { $sort: { status: 1 } },
+  { $group: { _id: '$status', count: { $sum: 1 } } }
+]
+
+// Returns the Indonesian error message for a row, or null when it is valid
+export function validateKendaraan(body) {
+  const missingFields = KENDARAAN_REQUIRED.filter(field => !body[field])
+  if (missingFields.length > 0) {
+    return `Field wajib tidak diisi: ${missingFields.join(', ')}`
+  }
+  return validateTariff(body)
+}
+
+export function validateBooking(body) {
+  const missingFields = BOOKING_REQUIRED.filter(field => !body[field])
+  if (missingFields.length > 0) {
+    return `Field wajib tidak diisi: ${missingFields.join(', ')}`
+  }
+  if (isNaN(new Date(body.tanggal_sewa).getTime())) {
+    return 'tanggal_sewa tidak valid'
+  }
+  const pricingError = validatePricing(body)
+  if (pricingError) return pricingError
+  if (body.status && !BOOKING_STATUSES.includes(body.status)) {
+    return `Status tidak valid, gunakan: ${BOOKING_STATUSES.join(', ')}`
+  }
+  return null
+}
+
+// `fotoUrls` comes from storeImage so the document never holds base64
+export function buildKendaraan(body, fotoUrls) {
+  return {
+    id: uuidv4(),
+    nama: body.nama,
+    merek: body.merek,
+    plat_nomor: body.plat_nomor,
+    kategori: body.kategori,
+    harga_harian: parseInt(body.harga_harian),
+    harga_bulanan: parseInt(body.harga_bulanan),
+    kapasitas: parseInt(body.kapasitas),
+    transmisi: body.transmisi,
+    bahan_bakar: body.bahan_bakar,
+    status: body.status || 'Tersedia',
+    deskripsi: body.deskripsi || '',
+    ...fotoUrls,
+    created_at: new Date(),
+    updated_at: new Date()
+  }
+}
+
+// `tariff` comes from loadTariffs; the client's total_harga is ignored
+export function buildBooking(body, tariff, { status = 'Pending' } = {}) {
+  const tanggalSewa = new Date(body.tanggal_sewa)
+  const durasi = parseInt(body.durasi)
+  const tipeSewa = body.tipe_sewa || 'harian' // harian/bulanan
+  const denganSopir = Boolean(body.dengan_sopir)
+
+  return {
+    id: uuidv4(),
+    kendaraan_id: body.kendaraan_id,
+    nama_penyewa: body.nama_penyewa,
+    no_hp: body.no_hp,
+    email: body.email || '',
+    tanggal_sewa: tanggalSewa,
+    tanggal_selesai: tanggalSelesai(tanggalSewa, durasi, tipeSewa),
+    durasi,
+    tipe_sewa: tipeSewa,
+    dengan_sopir: denganSopir,
+    alamat_jemput: body.alamat_jemput || '',
+    catatan: body.catatan || '',
+    status,
+    total_harga: priceBooking(tariff, { durasi, tipe_sewa: tipeSewa, dengan_sopir: denganSopir }).total_harga,
+    created_at: new Date(),
+    updated_at: new Date()
+  }
+}
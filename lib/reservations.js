@@ -0,0 +1,115 @@
+// Booking creation with an atomic vehicle claim
+//
+// A confirmed booking claims its vehicle with one conditional
+// findOneAndUpdate on `status: 'Tersedia'`, so of any number of concurrent
+// requests for the same car exactly one can win. On a replica set the claim,
+// the overlap check and the insert share a transaction. On a standalone
+// mongod the claim is handed back if the insert does not go through.
+
+import { ApiError } from '@/lib/errors'
+import { BOOKABLE_STATUS, hasOverlap } from '@/lib/availability'
+import { bumpVersion } from '@/lib/etag'
+import { applyRevenueChange } from '@/lib/laporan'
+import { mongoClient, supportsTransactions } from '@/lib/mongo'
+import { tariffFor } from '@/lib/pricing'
+import { buildBooking } from '@/lib/records'
+
+const OVERLAP_MESSAGE = 'Kendaraan sudah dibooking pada tanggal tersebut'
+
+// Only reached when a claim fails, to tell a missing car from a busy one
+async function unavailable(db, kendaraanId) {
+  const kendaraan = await db.collection('kendaraan')
+    .findOne({ id: kendaraanId }, { projection: { _id: 1 } })
+  return kendaraan
+    ? new ApiError('Kendaraan tidak tersedia', 400)
+    : new ApiError('Kendaraan tidak ditemukan', 404)
+}
+
+function claim(db, kendaraanId, stamp, session) {
+  return db.collection('kendaraan').findOneAndUpdate(
+    { id: kendaraanId, status: BOOKABLE_STATUS },
+    { $set: { status: 'Disewa', updated_at: stamp } },
+    { projection: { _id: 1 }, session }
+  )
+}
+
+async function reserveInTransaction(db, booking) {
+  const session = mongoClient().startSession()
+  try {
+    // withTransaction retries write conflicts; a retried loser then finds
+    // the car already Disewa and fails the claim
+    await session.withTransaction(async () => {
+      const stamp = new Date()
+      if (!(await claim(db, booking.kendaraan_id, stamp, session))) {
+        throw await unavailable(db, booking.kendaraan_id)
+      }
+      if (await hasOverlap(db, booking.kendaraan_id, booking.tanggal_sewa, booking.tanggal_selesai, null, { session })) {
+        throw new ApiError(OVERLAP_MESSAGE, 409)
+      }
+      await db.collection('booking').insertOne(booking, { session })
+    })
+  } finally {
+    await session.endSession()
+  }
+}
+
+async function reserveWithCompensation(db, booking) {
+  const stamp = new Date()
+  const [claimed, overlap] = await Promise.all([
+    claim(db, booking.kendaraan_id, stamp),
+    hasOverlap(db, booking.kendaraan_id, booking.tanggal_sewa, booking.tanggal_selesai)
+  ])
+  if (!claimed) throw await unavailable(db, booking.kendaraan_id)
+  // Without a transaction the claim is visible on its own, and so is a
+  // hand-back, so each gets a new kendaraan ETag version
+  await bumpVersion(db, 'kendaraan')
+
+  try {
+    if (overlap) throw new ApiError(OVERLAP_MESSAGE, 409)
+    await db.collection('booking').insertOne(booking)
+  } catch (error) {
+    // Hand the car back, unless something else changed it since our claim
+    const { modifiedCount } = await db.collection('kendaraan').updateOne(
+      { id: booking.kendaraan_id, status: 'Disewa', updated_at: stamp },
+      { $set: { status: BOOKABLE_STATUS, updated_at: new Date() } }
+    )
+    if (modifiedCount > 0) await bumpVersion(db, 'kendaraan')
+    throw error
+  }
+}
+
+// Pending bookings do not take the car, so the vehicle and overlap checks
+// are independent reads and run together
+async function createPending(db, booking) {
+  const [kendaraan, overlap] = await Promise.all([
+    db.collection('kendaraan').findOne({ id: booking.kendaraan_id }, { projection: { _id: 0, status: 1 } }),
+    hasOverlap(db, booking.kendaraan_id, booking.tanggal_sewa, booking.tanggal_selesai)
+  ])
+
+  if (!kendaraan) throw new ApiError('Kendaraan tidak ditemukan', 404)
+  if (kendaraan.status !== BOOKABLE_STATUS) throw new ApiError('Kendaraan tidak tersedia', 400)
+  if (overlap) throw new ApiError(OVERLAP_MESSAGE, 409)
+
+  await db.collection('booking').insertOne(booking)
+}
+
+// Create a booking from a validated request body. The price comes from the
+// tariff table, which also rejects unknown vehicles before any write. With
+// `confirm_booking` the vehicle is claimed (set to Disewa) atomically with
+// the insert. Returns `{ booking, claimed }`.
+export async function createBooking(db, body) {
+  const booking = buildBooking(body, await tariffFor(db, body.kendaraan_id))
+  const claimed = Boolean(body.confirm_booking)
+
+  if (!claimed) {
+    await createPending(db, booking)
+  } else if (await supportsTransactions(db)) {
+    await reserveInTransaction(db, booking)
+  } else {
+    await reserveWithCompensation(db, booking)
+  }
+
+  await applyRevenueChange(db, null, booking)
+  const { _id, ...cleanBooking } = booking
+  return { booking: cleanBooking, claimed }
+}
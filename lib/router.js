@@ -0,0 +1,74 @@
+// Compiled route table for the catch-all API route
+//
+// Templates are compiled into one segment trie per HTTP method. Dispatch
+// walks the path segments Next.js already split for us (at most three), so
+// its cost does not grow with the number of routes and no strings are
+// built per request. Literal segments take precedence over parameters.
+
+const PARAM_PATTERN = /^\{(\w+)\}$/
+const NO_PARAMS = Object.freeze({})
+
+function createNode() {
+  return { children: new Map(), param: null, route: null }
+}
+
+export class Router {
+  constructor() {
+    this.roots = new Map()
+    this.routes = []
+  }
+
+  // `template` doubles as the metric label, e.g. "/kendaraan/{id}". Handlers
+  // that never touch MongoDB pass `{ db: false }` so they skip connecting;
+  // `{ admin: true }` requires a valid admin session before the handler runs.
+  add(method, template, handler, { db = true, admin = false } = {}) {
+    if (!this.roots.has(method)) this.roots.set(method, createNode())
+    let node = this.roots.get(method)
+
+    for (const segment of template.split('/').filter(Boolean)) {
+      const name = PARAM_PATTERN.exec(segment)?.[1]
+      if (name) {
+        if (node.param && node.param.name !== name) {
+          throw new Error(`Route ${template} conflicts with {${node.param.name}}`)
+        }
+        node.param = node.param || { name, node: createNode() }
+        node = node.param.node
+      } else {
+        if (!node.children.has(segment)) node.children.set(segment, createNode())
+        node = node.children.get(segment)
+      }
+    }
+
+    if (node.route) throw new Error(`Duplicate route ${method} ${template}`)
+    node.route = { method, template, handler, db, admin }
+    this.routes.push(node.route)
+    return this
+  }
+
+  get(template, handler, options) { return this.add('GET', template, handler, options) }
+  post(template, handler, options) { return this.add('POST', template, handler, options) }
+  put(template, handler, options) { return this.add('PUT', template, handler, options) }
+  delete(template, handler, options) { return this.add('DELETE', template, handler, options) }
+
+  // Returns `{ route, params }` or null. `segments` is the catch-all path
+  // array Next.js passes in, e.g. ['kendaraan', '42'].
+  match(method, segments) {
+    let node = this.roots.get(method)
+    if (!node) return null
+
+    let params = NO_PARAMS
+    for (const segment of segments) {
+      const next = node.children.get(segment)
+      if (next) {
+        node = next
+      } else if (node.param) {
+        if (params === NO_PARAMS) params = {}
+        params[node.param.name] = segment
+        node = node.param.node
+      } else {
+        return null
+      }
+    }
+    return node.route ? { route: node.route, params } : null
+  }
+}
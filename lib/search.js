@@ -0,0 +1,149 @@
+// Catalog search: full-text over nama/merek/deskripsi plus facet filters
+//
+// One aggregation answers the page, the total and the facet counts. The
+// leading $match carries every filter, so it runs on the text index (when
+// `q` is given) or on the compound catalog indexes; the $facet stages then
+// only see the matching vehicles. Facet counts therefore describe the
+// current result set (drill-down), not the whole catalog.
+//
+// The text index matches whole words only, which suits a submitted query
+// but not as-you-type input ("Ava" should find "Avanza"). `?cocok=awalan`
+// matches every term as a word prefix of nama/merek instead. Those regexes
+// cannot use an index, which is fine for a fleet-sized collection.
+
+import { ApiError } from '@/lib/errors'
+import { DEFAULT_LIMIT, MAX_LIMIT, LIST_SORT, parseFields } from '@/lib/pagination'
+import { KENDARAAN_STATUSES } from '@/lib/records'
+
+export const SEARCH_FACETS = ['kategori', 'transmisi', 'bahan_bakar', 'kapasitas', 'status']
+export const MATCH_MODES = ['kata', 'awalan']
+
+const PREFIX_FIELDS = ['nama', 'merek']
+const MAX_PREFIX_TERMS = 5
+
+const SORTS = {
+  terbaru: LIST_SORT,
+  harga_terendah: { harga_harian: 1, id: 1 },
+  harga_tertinggi: { harga_harian: -1, id: 1 }
+}
+
+function listParam(searchParams, name) {
+  const value = searchParams.get(name)
+  return value ? value.split(',').map(v => v.trim()).filter(Boolean) : []
+}
+
+function intParam(searchParams, name) {
+  const value = searchParams.get(name)
+  if (value === null || value === '') return null
+  const number = parseInt(value)
+  if (isNaN(number) || number < 0) {
+    throw new ApiError(`Parameter ${name} tidak valid`)
+  }
+  return number
+}
+
+function escapeRegex(text) {
+  return text.replace(/[.*+?^${}()|[\]\\]/g, '\\$&')
+}
+
+// Every term must start a word in one of PREFIX_FIELDS
+function prefixFilter(q) {
+  const terms = q.split(/\s+/).slice(0, MAX_PREFIX_TERMS)
+  return terms.map(term => ({
+    $or: PREFIX_FIELDS.map(field => ({ [field]: { $regex: `\\b${escapeRegex(term)}`, $options: 'i' } }))
+  }))
+}
+
+// `?q=&cocok=kata|awalan&kategori=MPV,SUV&transmisi=&bahan_bakar=&kapasitas=7&status=
+//  &harga_min=&harga_max=&sort=&limit=&offset=&fields=`
+export function parseSearch(searchParams) {
+  const filter = {}
+  const q = (searchParams.get('q') || '').trim()
+  const cocok = searchParams.get('cocok') || 'kata'
+  if (!MATCH_MODES.includes(cocok)) {
+    throw new ApiError(`Parameter cocok tidak valid, gunakan: ${MATCH_MODES.join(', ')}`)
+  }
+  const textSearch = Boolean(q) && cocok === 'kata'
+  if (textSearch) filter.$text = { $search: q }
+  else if (q) filter.$and = prefixFilter(q)
+
+  for (const facet of ['kategori', 'transmisi', 'bahan_bakar']) {
+    const values = listParam(searchParams, facet)
+    if (values.length > 0) filter[facet] = { $in: values }
+  }
+
+  const kapasitas = listParam(searchParams, 'kapasitas').map(Number)
+  if (kapasitas.some(isNaN)) throw new ApiError('Parameter kapasitas tidak valid')
+  if (kapasitas.length > 0) filter.kapasitas = { $in: kapasitas }
+
+  const status = listParam(searchParams, 'status')
+  if (status.some(s => !KENDARAAN_STATUSES.includes(s))) {
+    throw new ApiError(`Status tidak valid, gunakan: ${KENDARAAN_STATUSES.join(', ')}`)
+  }
+  if (status.length > 0) filter.status = { $in: status }
+
+  const hargaMin = intParam(searchParams, 'harga_min')
+  const hargaMax = intParam(searchParams, 'harga_max')
+  if (hargaMin !== null || hargaMax !== null) {
+    filter.harga_harian = {}
+    if (hargaMin !== null) filter.harga_harian.$gte = hargaMin
+    if (hargaMax !== null) filter.harga_harian.$lte = hargaMax
+  }
+
+  const sortName = searchParams.get('sort') || (textSearch ? 'relevan' : 'terbaru')
+  if (sortName !== 'relevan' && !SORTS[sortName]) {
+    throw new ApiError(`Parameter sort tidak valid, gunakan: relevan, ${Object.keys(SORTS).join(', ')}`)
+  }
+  if (sortName === 'relevan' && !textSearch) {
+    throw new ApiError('Urutan relevan membutuhkan parameter q dengan cocok=kata')
+  }
+  const sort = sortName === 'relevan'
+    ? { score: { $meta: 'textScore' }, ...LIST_SORT }
+    : SORTS[sortName]
+
+  const limit = Math.min(intParam(searchParams, 'limit') || DEFAULT_LIMIT, MAX_LIMIT)
+  const offset = intParam(searchParams, 'offset') || 0
+
+  return { filter, sort, limit, offset, projection: parseFields(searchParams.get('fields')) }
+}
+
+export function searchPipeline({ filter, sort, limit, offset, projection }) {
+  const facetStages = Object.fromEntries(SEARCH_FACETS.map(facet => [
+    facet,
+    [{ $sortByCount: `$${facet}` }]
+  ]))
+
+  return [
+    { $match: filter },
+    {
+      $facet: {
+        data: [{ $sort: sort }, { $skip: offset }, { $limit: limit }, { $project: projection }],
+        total: [{ $count: 'jumlah' }],
+        harga: [{ $group: { _id: null, min: { $min: '$harga_harian' }, max: { $max: '$harga_harian' } } }],
+        ...facetStages
+      }
+    }
+  ]
+}
+
+export async function searchKendaraan(db, options) {
+  const { offset, limit } = options
+  const [result] = await db.collection('kendaraan').aggregate(searchPipeline(options)).toArray()
+
+  const total = result.total[0]?.jumlah || 0
+  const facets = Object.fromEntries(SEARCH_FACETS.map(facet => [
+    facet,
+    result[facet].map(({ _id, count }) => ({ nilai: _id, jumlah: count }))
+  ]))
+  const { min = null, max = null } = result.harga[0] || {}
+
+  return {
+    data: result.data,
+    total,
+    offset,
+    limit,
+    next_offset: offset + result.data.length < total ? offset + result.data.length : null,
+    facets,
+    harga: { min, max }
+  }
+}
@@ -0,0 +1,79 @@
+// Admin sessions with an in-process LRU/TTL cache in front of admin_sessions
+//
+// Validating a session on every admin call would otherwise cost a MongoDB
+// read per request. Logout on this instance drops the entry immediately;
+// on other instances a session lives at most SESSION_CACHE_TTL_MS longer.
+
+import { v4 as uuidv4 } from 'uuid'
+import { ApiError } from '@/lib/errors'
+import { TtlCache } from '@/lib/cache'
+
+const SESSION_TTL_MS = 24 * 60 * 60 * 1000
+
+export const sessionCache = new TtlCache('admin_sessions', {
+  ttl: parseInt(process.env.SESSION_CACHE_TTL_MS || '300000'),
+  maxEntries: parseInt(process.env.SESSION_CACHE_MAX_ENTRIES || '1000')
+})
+
+function expired(session, now = new Date()) {
+  return new Date(session.expires_at) <= now
+}
+
+export async function createSession(db, username) {
+  const session = {
+    id: uuidv4(),
+    username,
+    login_time: new Date(),
+    expires_at: new Date(Date.now() + SESSION_TTL_MS)
+  }
+
+  await db.collection('admin_sessions').insertOne(session)
+  const { _id, ...cleanSession } = session
+
+  // Logins are rare, a good moment to sweep sessions that ran out
+  sessionCache.purgeExpired()
+  sessionCache.set(session.id, cleanSession)
+  return cleanSession
+}
+
+// Returns the session, or null when it does not exist or has expired.
+// getOrLoad does not store null, so unknown ids are never cached and
+// random tokens cannot flush real sessions out of the LRU; only an expired
+// session that was cached needs dropping.
+export async function validateSession(db, sessionId) {
+  if (!sessionId) return null
+
+  const session = await sessionCache.getOrLoad(sessionId, () =>
+    db.collection('admin_sessions').findOne({ id: sessionId }, { projection: { _id: 0 } })
+  )
+
+  if (!session) return null
+  if (expired(session)) {
+    sessionCache.delete(sessionId)
+    return null
+  }
+  return session
+}
+
+// Delete from MongoDB first: a validation racing the logout then either
+// reads nothing or is discarded by the per-key invalidation below
+export async function endSession(db, sessionId) {
+  const result = await db.collection('admin_sessions').deleteOne({ id: sessionId })
+  sessionCache.delete(sessionId)
+  return result.deletedCount > 0
+}
+
+// `Authorization: Bearer <session id>`
+export function sessionIdFrom(request) {
+  const header = request.headers.get('authorization') || ''
+  const [scheme, token] = header.split(' ')
+  return scheme === 'Bearer' && token ? token.trim() : null
+}
+
+export async function requireAdmin(request, db) {
+  const session = await validateSession(db, sessionIdFrom(request))
+  if (!session) {
+    throw new ApiError('Sesi admin tidak valid atau sudah berakhir', 401)
+  }
+  return session
+}
@@ -0,0 +1,130 @@
+// Per-request timing for the Server-Timing header
+//
+// handleRoute runs each request inside an AsyncLocalStorage context holding
+// a RequestTiming. The db wrapper and json() record into whatever request
+// is current, so handlers and lib modules need no extra parameters.
+
+import { AsyncLocalStorage } from 'async_hooks'
+import { NextResponse } from 'next/server'
+
+const storage = new AsyncLocalStorage()
+
+export class RequestTiming {
+  constructor() {
+    this.startedAt = performance.now()
+    this.totals = { db: 0, serialize: 0, compress: 0 }
+    this.active = { db: 0, compress: 0 }
+    this.phaseStart = {}
+  }
+
+  // Overlapping DB calls (Promise.all) count once: the clock runs while at
+  // least one is in flight
+  begin(phase) {
+    if (this.active[phase]++ === 0) this.phaseStart[phase] = performance.now()
+  }
+
+  end(phase) {
+    if (--this.active[phase] === 0) this.totals[phase] += performance.now() - this.phaseStart[phase]
+  }
+
+  track(phase, promise) {
+    this.begin(phase)
+    return promise.finally(() => this.end(phase))
+  }
+
+  measure(phase, fn) {
+    const start = performance.now()
+    try {
+      return fn()
+    } finally {
+      this.totals[phase] += performance.now() - start
+    }
+  }
+
+  elapsed() {
+    return performance.now() - this.startedAt
+  }
+
+  header() {
+    const total = this.elapsed()
+    const { db, serialize, compress } = this.totals
+    const dispatch = Math.max(0, total - db - serialize - compress)
+    return [
+      `dispatch;dur=${dispatch.toFixed(2)}`,
+      `db;dur=${db.toFixed(2)}`,
+      `serialize;dur=${serialize.toFixed(2)}`,
+      `compress;dur=${compress.toFixed(2)}`,
+      `total;dur=${total.toFixed(2)}`
+    ].join(', ')
+  }
+}
+
+export function withTiming(timing, fn) {
+  return storage.run(timing, fn)
+}
+
+export function currentTiming() {
+  return storage.getStore()
+}
+
+// NextResponse.json with the JSON.stringify cost booked as `serialize`
+export function json(body, init) {
+  const timing = currentTiming()
+  return timing ? timing.measure('serialize', () => NextResponse.json(body, init)) : NextResponse.json(body, init)
+}
+
+const CURSOR_RESULT_METHODS = new Set(['toArray', 'next', 'tryNext', 'hasNext'])
+
+function trackResult(result) {
+  const timing = currentTiming()
+  if (timing && result && typeof result.then === 'function') return timing.track('db', result)
+  return result
+}
+
+function timedCursor(cursor) {
+  const proxy = new Proxy(cursor, {
+    get(target, prop) {
+      const value = Reflect.get(target, prop, target)
+      if (typeof value !== 'function') return value
+      return (...args) => {
+        const result = value.apply(target, args)
+        // Builder methods (sort, limit, project...) return the cursor itself
+        if (result === target) return proxy
+        return CURSOR_RESULT_METHODS.has(prop) ? trackResult(result) : result
+      }
+    }
+  })
+  return proxy
+}
+
+function timedCollection(collection) {
+  return new Proxy(collection, {
+    get(target, prop) {
+      const value = Reflect.get(target, prop, target)
+      if (typeof value !== 'function') return value
+      return (...args) => {
+        const result = value.apply(target, args)
+        if (result && typeof result.toArray === 'function' && typeof result.then !== 'function') {
+          return timedCursor(result)
+        }
+        return trackResult(result)
+      }
+    }
+  })
+}
+
+// Wrap a Db so collection operations are booked as `db` time
+export function timedDb(db) {
+  return new Proxy(db, {
+    get(target, prop) {
+      const value = Reflect.get(target, prop, target)
+      if (prop === 'collection') {
+        return (...args) => timedCollection(value.apply(target, args))
+      }
+      if (prop === 'command') {
+        return (...args) => trackResult(value.apply(target, args))
+      }
+      return typeof value === 'function' ? value.bind(target) : value
+    }
+  })
+}
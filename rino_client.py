@@ -0,0 +1,462 @@
+"""Async client for the Rino Rental Sorong API
+
+Shared by backend_test.py and the ops scripts in ``scripts/``. One
+``RinoRentalClient`` owns an ``httpx.AsyncClient``, so every call reuses a
+pooled keep-alive connection, and a semaphore caps how many requests are
+in flight at once. Failed attempts are retried with exponential backoff and
+full jitter:
+
+* connection failures are retried for every method, the request never
+  reached the server;
+* 429/502/503/504 and read timeouts are retried for idempotent methods
+  (GET, PUT, DELETE) only, unless the call passes ``retry=True``.
+
+Error responses raise ``RinoApiError`` carrying the status and the
+Indonesian ``error`` message from the API.
+
+Maintenance calls (archive, rollup rebuild, image migration) need an admin
+session: call ``login()`` first, or pass ``session_id`` (default
+``RINO_SESSION_ID``) and it is sent as a Bearer token.
+
+    async with RinoRentalClient(concurrency=20) as api:
+        kendaraan, laporan = await asyncio.gather(
+            api.list_kendaraan(limit=50),
+            api.laporan_keuangan(periode='1-bulan'),
+        )
+"""
+
+import asyncio
+import json
+import os
+import random
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, TypedDict, Union
+
+import httpx
+
+DEFAULT_BASE_URL = os.environ.get('RINO_BASE_URL', 'http://localhost:3000')
+DEFAULT_SESSION_ID = os.environ.get('RINO_SESSION_ID')
+
+RETRY_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+
+class Kendaraan(TypedDict, total=False):
+    id: str
+    nama: str
+    merek: str
+    plat_nomor: str
+    kategori: str
+    harga_harian: int
+    harga_bulanan: int
+    kapasitas: int
+    transmisi: str
+    bahan_bakar: str
+    status: str
+    deskripsi: str
+    foto: str
+    foto_thumb: str
+    created_at: str
+    updated_at: str
+
+
+class Booking(TypedDict, total=False):
+    id: str
+    kendaraan_id: str
+    nama_penyewa: str
+    no_hp: str
+    email: str
+    tanggal_sewa: str
+    tanggal_selesai: str
+    durasi: int
+    tipe_sewa: str
+    dengan_sopir: bool
+    alamat_jemput: str
+    catatan: str
+    status: str
+    total_harga: int
+    created_at: str
+    updated_at: str
+
+
+class Page(TypedDict):
+    data: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+
+
+class SearchResult(TypedDict):
+    data: List[Kendaraan]
+    total: int
+    offset: int
+    limit: int
+    next_offset: Optional[int]
+    facets: Dict[str, List[Dict[str, Any]]]
+    harga: Dict[str, Optional[int]]
+
+
+class RowResult(TypedDict, total=False):
+    index: int
+    status: str
+    id: str
+    error: str
+
+
+class BulkResult(TypedDict):
+    total: int
+    berhasil: int
+    gagal: int
+    hasil: List[RowResult]
+
+
+class Quote(TypedDict, total=False):
+    index: int
+    status: str
+    error: str
+    kendaraan_id: str
+    durasi: int
+    tipe_sewa: str
+    dengan_sopir: bool
+    harga_sewa: int
+    biaya_sopir: int
+    total_harga: int
+
+
+class Laporan(TypedDict, total=False):
+    periode: str
+    dari: str
+    sampai: str
+    total_pendapatan: int
+    total_transaksi: int
+    rata_rata_per_transaksi: int
+    pendapatan_harian: List[Dict[str, Any]]
+    detail_booking: List[Booking]
+    detail_next_cursor: Optional[str]
+
+
+class AdminSession(TypedDict):
+    id: str
+    username: str
+    login_time: str
+    expires_at: str
+
+
+class Statistics(TypedDict):
+    total_kendaraan: int
+    total_booking: int
+    kendaraan_tersedia: int
+    kendaraan_disewa: int
+
+
+class LiveEvent(TypedDict):
+    id: int
+    topik: str
+    data: Dict[str, Any]
+
+
+class RinoApiError(Exception):
+    """An error response from the API"""
+
+    def __init__(self, status: int, message: str, response: Optional[httpx.Response] = None):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+        self.response = response
+
+
+def _params(**values) -> Dict[str, Any]:
+    """Drop unset query parameters and join list values with commas"""
+    params = {}
+    for name, value in values.items():
+        if value is None or value is False:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = ','.join(str(item) for item in value)
+        elif value is True:
+            value = 'true'
+        params[name] = value
+    return params
+
+
+class RinoRentalClient:
+    """Async client with a connection pool, a concurrency cap and retries"""
+
+    def __init__(self, base_url: Optional[str] = None, *, concurrency: int = 20,
+                 max_connections: Optional[int] = None, retries: int = 3,
+                 backoff: float = 0.2, max_backoff: float = 5.0, timeout: float = 30.0,
+                 session_id: Optional[str] = None):
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip('/')
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.session_id = session_id or DEFAULT_SESSION_ID
+        self._limit = asyncio.Semaphore(concurrency)
+        self._http = httpx.AsyncClient(
+            base_url=f"{self.base_url}/api",
+            timeout=timeout,
+            # Keep one pooled connection per allowed in-flight request
+            limits=httpx.Limits(max_connections=max_connections or concurrency,
+                                max_keepalive_connections=max_connections or concurrency),
+            headers={'Accept': 'application/json'},
+        )
+
+    async def __aenter__(self) -> 'RinoRentalClient':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self._http.aclose()
+
+    # -- transport --------------------------------------------------------
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def request(self, method: str, path: str, *, retry: Optional[bool] = None,
+                      raise_for_status: bool = True, **kwargs) -> httpx.Response:
+        """Send one API request (``path`` is relative to ``/api``) with retries"""
+        method = method.upper()
+        resend = method in IDEMPOTENT_METHODS if retry is None else retry
+        headers = kwargs.pop('headers', None) or {}
+        if self.session_id and 'Authorization' not in headers:
+            headers['Authorization'] = f"Bearer {self.session_id}"
+
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            response = None
+            try:
+                async with self._limit:
+                    response = await self._http.request(method, path, headers=headers, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                # Nothing reached the server, safe for any method
+                if last:
+                    raise
+            except (httpx.TimeoutException, httpx.RemoteProtocolError, httpx.ReadError):
+                if last or not resend:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or last or not resend:
+                    break
+            await asyncio.sleep(self._delay(attempt, response))
+
+        if raise_for_status and response.status_code >= 400:
+            try:
+                message = response.json().get('error', response.text)
+            except ValueError:
+                message = response.text
+            raise RinoApiError(response.status_code, message, response)
+        return response
+
+    async def _json(self, method: str, path: str, **kwargs) -> Any:
+        response = await self.request(method, path, **kwargs)
+        return response.json()
+
+    # -- kendaraan --------------------------------------------------------
+
+    async def health(self) -> Dict[str, str]:
+        return await self._json('GET', '/')
+
+    async def list_kendaraan(self, *, limit: Optional[int] = None, cursor: Optional[str] = None,
+                             fields: Optional[Iterable[str]] = None,
+                             format: Optional[str] = None) -> Union[List[Kendaraan], Page, Dict[str, Any]]:
+        """All vehicles, or one page when ``limit``/``cursor`` is given"""
+        return await self._json('GET', '/kendaraan', params=_params(limit=limit, cursor=cursor, fields=fields, format=format))
+
+    async def iter_kendaraan(self, *, page_size: int = 100, fields: Optional[Iterable[str]] = None) -> AsyncIterator[Kendaraan]:
+        """Every vehicle, following the keyset cursor page by page"""
+        cursor = None
+        while True:
+            page = await self.list_kendaraan(limit=page_size, cursor=cursor, fields=fields)
+            for kendaraan in page['data']:
+                yield kendaraan
+            cursor = page['next_cursor']
+            if not cursor:
+                return
+
+    async def search_kendaraan(self, q: Optional[str] = None, *, kategori: Optional[Iterable[str]] = None,
+                               transmisi: Optional[Iterable[str]] = None, bahan_bakar: Optional[Iterable[str]] = None,
+                               kapasitas: Optional[Iterable[int]] = None, status: Optional[Iterable[str]] = None,
+                               harga_min: Optional[int] = None, harga_max: Optional[int] = None,
+                               sort: Optional[str] = None, limit: Optional[int] = None,
+                               offset: Optional[int] = None, fields: Optional[Iterable[str]] = None,
+                               cocok: Optional[str] = None) -> SearchResult:
+        return await self._json('GET', '/kendaraan/cari', params=_params(
+            q=q, cocok=cocok, kategori=kategori, transmisi=transmisi, bahan_bakar=bahan_bakar, kapasitas=kapasitas,
+            status=status, harga_min=harga_min, harga_max=harga_max, sort=sort, limit=limit,
+            offset=offset, fields=fields))
+
+    async def get_kendaraan(self, kendaraan_id: str) -> Kendaraan:
+        return await self._json('GET', f"/kendaraan/{kendaraan_id}")
+
+    async def create_kendaraan(self, kendaraan: Kendaraan) -> Kendaraan:
+        return await self._json('POST', '/kendaraan', json=kendaraan)
+
+    async def update_kendaraan(self, kendaraan_id: str, changes: Dict[str, Any]) -> Kendaraan:
+        return await self._json('PUT', f"/kendaraan/{kendaraan_id}", json=changes)
+
+    async def delete_kendaraan(self, kendaraan_id: str) -> Dict[str, str]:
+        return await self._json('DELETE', f"/kendaraan/{kendaraan_id}")
+
+    async def bulk_import_kendaraan(self, rows: Iterable[Kendaraan]) -> BulkResult:
+        return await self._json('POST', '/kendaraan/bulk', **self._ndjson(rows))
+
+    async def bulk_status_kendaraan(self, rows: Iterable[Dict[str, str]]) -> BulkResult:
+        return await self._json('POST', '/kendaraan/bulk-status', json=list(rows))
+
+    async def ketersediaan(self, dari: str, sampai: Optional[str] = None,
+                           fields: Optional[Iterable[str]] = None) -> List[Kendaraan]:
+        """Vehicles free for the whole ``dari``..``sampai`` window (YYYY-MM-DD)"""
+        return await self._json('GET', '/ketersediaan', params=_params(**{'from': dari, 'to': sampai, 'fields': fields}))
+
+    # -- booking ----------------------------------------------------------
+
+    async def list_booking(self, *, limit: Optional[int] = None, cursor: Optional[str] = None,
+                           fields: Optional[Iterable[str]] = None,
+                           format: Optional[str] = None) -> Union[List[Booking], Page, Dict[str, Any]]:
+        return await self._json('GET', '/booking', params=_params(limit=limit, cursor=cursor, fields=fields, format=format))
+
+    async def create_booking(self, booking: Booking, *, confirm: bool = False) -> Booking:
+        """Create a booking; ``confirm`` claims the vehicle atomically"""
+        body = dict(booking, confirm_booking=True) if confirm else booking
+        return await self._json('POST', '/booking', json=body)
+
+    async def update_booking(self, booking_id: str, changes: Dict[str, Any]) -> Booking:
+        return await self._json('PUT', f"/booking/{booking_id}", json=changes)
+
+    async def delete_booking(self, booking_id: str) -> Dict[str, str]:
+        return await self._json('DELETE', f"/booking/{booking_id}")
+
+    async def bulk_import_booking(self, rows: Iterable[Booking]) -> BulkResult:
+        return await self._json('POST', '/booking/bulk', **self._ndjson(rows))
+
+    async def bulk_status_booking(self, rows: Iterable[Dict[str, str]]) -> BulkResult:
+        return await self._json('POST', '/booking/bulk-status', json=list(rows))
+
+    async def archive_bookings(self, umur_hari: Optional[int] = None) -> Dict[str, Any]:
+        """Move Selesai bookings older than ``umur_hari`` days to the archive (admin)"""
+        # Each batch is copied before it is deleted, so a retry finishes the job
+        return await self._json('POST', '/booking/arsip', params=_params(umur_hari=umur_hari), retry=True)
+
+    async def quote(self, items: Iterable[Dict[str, Any]]) -> List[Quote]:
+        """Price many ``{kendaraan_id, durasi, tipe_sewa, dengan_sopir}`` at once"""
+        result = await self._json('POST', '/harga', json=list(items), retry=True)
+        return result['hasil']
+
+    async def export_booking(self, *, status: Optional[Iterable[str]] = None, dari: Optional[str] = None,
+                             sampai: Optional[str] = None, periode: Optional[str] = None,
+                             arsip: bool = False) -> AsyncIterator[Booking]:
+        """Stream every matching booking from the NDJSON export, archived ones too with ``arsip``"""
+        params = _params(format='ndjson', status=status, periode=periode, arsip=arsip, **{'from': dari, 'to': sampai})
+        async for row in self._stream_ndjson('/booking/export', params):
+            yield row
+
+    # -- gallery and images -----------------------------------------------
+
+    async def list_gallery(self) -> List[Dict[str, Any]]:
+        return await self._json('GET', '/gallery')
+
+    async def add_gallery(self, judul: str, foto: str, *, deskripsi: str = '', kategori: str = 'kendaraan') -> Dict[str, Any]:
+        return await self._json('POST', '/gallery', json={'judul': judul, 'foto': foto, 'deskripsi': deskripsi, 'kategori': kategori})
+
+    async def migrate_images(self) -> Dict[str, Any]:
+        """Move inline base64 photos into the image store (admin)"""
+        return await self._json('POST', '/images/migrate', retry=True)
+
+    async def image(self, url: str) -> bytes:
+        """Fetch a ``/api/images/{hash}`` (or ``/thumb``) URL as returned by the API"""
+        response = await self.request('GET', url[len('/api'):] if url.startswith('/api/') else url)
+        return response.content
+
+    # -- laporan keuangan -------------------------------------------------
+
+    async def laporan_keuangan(self, *, periode: Optional[str] = None, dari: Optional[str] = None,
+                               sampai: Optional[str] = None, detail: bool = False,
+                               limit: Optional[int] = None, cursor: Optional[str] = None,
+                               format: Optional[str] = None, arsip: bool = False) -> Laporan:
+        return await self._json('GET', '/laporan-keuangan', params=_params(
+            periode=periode, detail=detail, limit=limit, cursor=cursor, format=format, arsip=arsip,
+            **{'from': dari, 'to': sampai}))
+
+    async def export_laporan(self, *, periode: Optional[str] = None, dari: Optional[str] = None,
+                             sampai: Optional[str] = None, arsip: bool = False) -> AsyncIterator[Booking]:
+        params = _params(format='ndjson', periode=periode, arsip=arsip, **{'from': dari, 'to': sampai})
+        async for row in self._stream_ndjson('/laporan-keuangan/export', params):
+            yield row
+
+    async def rebuild_laporan(self) -> Dict[str, Any]:
+        """Recompute the daily revenue rollup (admin)"""
+        # Rebuilding from booking is idempotent, so retrying it is safe
+        return await self._json('POST', '/laporan-keuangan/rebuild', retry=True)
+
+    async def verify_laporan(self) -> Dict[str, Any]:
+        return await self._json('GET', '/laporan-keuangan/verify')
+
+    # -- admin and operations ---------------------------------------------
+
+    async def login(self, username: str, password: str) -> AdminSession:
+        """Log in and send the session as a Bearer token from now on"""
+        session = await self._json('POST', '/admin/login', json={'username': username, 'password': password})
+        self.session_id = session['id']
+        return session
+
+    async def logout(self) -> Dict[str, str]:
+        result = await self._json('POST', '/admin/logout', json={'session_id': self.session_id})
+        self.session_id = None
+        return result
+
+    async def admin_session(self) -> AdminSession:
+        return await self._json('GET', '/admin/session')
+
+    async def statistics(self) -> Statistics:
+        return await self._json('GET', '/statistics')
+
+    async def pool_stats(self) -> Dict[str, Any]:
+        return await self._json('GET', '/pool/stats')
+
+    async def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        return await self._json('GET', '/cache/stats')
+
+    async def metrics(self) -> str:
+        response = await self.request('GET', '/metrics')
+        return response.text
+
+    async def events(self, topik: Optional[Iterable[str]] = None,
+                     last_event_id: Optional[int] = None) -> AsyncIterator[LiveEvent]:
+        """Follow /api/events. The stream holds one pooled connection but
+        not a concurrency slot, so it can stay open next to other calls."""
+        headers = {'Accept': 'text/event-stream'}
+        if last_event_id is not None:
+            headers['Last-Event-ID'] = str(last_event_id)
+        timeout = httpx.Timeout(self._http.timeout.connect, read=None)
+        async with self._http.stream('GET', '/events', params=_params(topik=topik), headers=headers, timeout=timeout) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                raise RinoApiError(response.status_code, response.json().get('error', response.text), response)
+            event = {}
+            async for line in response.aiter_lines():
+                if line:
+                    field, _, value = line.partition(': ')
+                    event[field] = value
+                elif 'data' in event:
+                    yield {'id': int(event['id']), 'topik': event['event'], 'data': json.loads(event['data'])}
+                    event = {}
+
+    # -- helpers ------------------------------------------------------------
+
+    @staticmethod
+    def _ndjson(rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        body = '\n'.join(json.dumps(row, default=str) for row in rows)
+        return {'content': body.encode('utf-8'), 'headers': {'Content-Type': 'application/x-ndjson'}}
+
+    async def _stream_ndjson(self, path: str, params: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        async with self._limit:
+            async with self._http.stream('GET', path, params=params) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                    raise RinoApiError(response.status_code, response.json().get('error', response.text), response)
+                async for line in response.aiter_lines():
+                    if line:
+                        yield json.loads(line)
@@ -0,0 +1,61 @@
+// Dispatch micro-benchmark: node scripts/bench-router.mjs [iterations]
+//
+// Registers the route templates declared in app/api/[[...path]]/route.js
+// with no-op handlers and times Router.match per route, next to a linear
+// scan in declaration order (what the old if-chain did). Only dispatch is
+// measured; no request objects, MongoDB or Next.js are involved.
+
+import { readFileSync } from 'fs'
+import { Router } from '../lib/router.js'
+
+const ITERATIONS = parseInt(process.argv[2] || '1000000')
+const source = readFileSync(new URL('../app/api/[[...path]]/route.js', import.meta.url), 'utf8')
+const declared = [...source.matchAll(/^router\.(get|post|put|delete)\('([^']+)'/gm)]
+  .map(([, method, template]) => ({ method: method.toUpperCase(), template }))
+
+const router = new Router()
+for (const { method, template } of declared) router.add(method, template, () => null)
+
+// Old style: join the path, then test every route in order until one
+// matches (string equality for static paths, a pattern for `{id}` ones)
+const linear = declared.map(({ method, template }) => ({
+  method,
+  template,
+  pattern: template.includes('{') ? new RegExp(`^${template.replace(/\{\w+\}/g, '[^/]+')}$`) : null
+}))
+function linearMatch(method, segments) {
+  const route = `/${segments.join('/')}`
+  for (const candidate of linear) {
+    if (candidate.method !== method) continue
+    if (candidate.pattern ? candidate.pattern.test(route) : candidate.template === route) return candidate
+  }
+  return null
+}
+
+function samplePath(template) {
+  return template.split('/').filter(Boolean)
+    .map(segment => segment.startsWith('{') ? '3f2b9c1e-8d4a-4c8e-9b1a-2f6d7e8c9a0b' : segment)
+}
+
+function nsPerOp(fn) {
+  for (let i = 0; i < 10000; i++) fn() // warm up the JIT
+  const start = process.hrtime.bigint()
+  for (let i = 0; i < ITERATIONS; i++) fn()
+  return Number(process.hrtime.bigint() - start) / ITERATIONS
+}
+
+const cases = [
+  ...declared.map(({ method, template }) => ({ label: `${method} ${template}`, method, segments: samplePath(template) })),
+  { label: 'GET (unmatched)', method: 'GET', segments: ['tidak', 'ada'] }
+]
+
+let sink = 0
+const rows = cases.map(({ label, method, segments }) => {
+  const table = nsPerOp(() => { sink ^= router.match(method, segments) ? 1 : 0 })
+  const chain = nsPerOp(() => { sink ^= linearMatch(method, segments) ? 1 : 0 })
+  return { route: label, 'table ns/op': table.toFixed(1), 'linear ns/op': chain.toFixed(1) }
+})
+
+console.log(`${declared.length} routes, ${ITERATIONS.toLocaleString()} iterations per case`)
+console.table(rows)
+if (sink === 42) console.log('') // keep the results observable to the JIT
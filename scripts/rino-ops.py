@@ -0,0 +1,153 @@
+"""Operational tasks against a running Rino Rental Sorong API
+
+    python scripts/rino-ops.py reconcile [--fix]
+    python scripts/rino-ops.py archive [--umur-hari 365]
+    python scripts/rino-ops.py seed --kendaraan 200 --booking 50000 [--batch 2000]
+
+``reconcile`` compares the daily revenue rollup with the bookings and, with
+``--fix``, rebuilds it when they disagree. ``archive`` moves completed
+bookings older than the given age into ``booking_archive``. ``seed``
+bulk-imports generated vehicles and historical bookings, sending several
+batches at once through the async client. All read RINO_BASE_URL (default http://localhost:3000).
+
+``archive`` and ``reconcile --fix`` call admin-only endpoints. They send
+RINO_SESSION_ID as a Bearer token when it is set. Otherwise they log in
+with RINO_ADMIN_USERNAME and RINO_ADMIN_PASSWORD for the run.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rino_client import RinoRentalClient  # noqa: E402
+
+KATEGORI = [('MPV', 'Toyota', 'Avanza', 350000), ('MPV', 'Daihatsu', 'Xenia', 300000),
+            ('SUV', 'Toyota', 'Fortuner', 1200000), ('SUV', 'Mitsubishi', 'Pajero Sport', 1100000),
+            ('Hatchback', 'Honda', 'Brio', 250000), ('Sedan', 'Toyota', 'Vios', 450000)]
+BOOKING_STATUSES = ['Pending', 'Dikonfirmasi', 'Selesai', 'Selesai', 'Dibatalkan']
+
+
+def batches(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+async def reconcile(api, fix):
+    verify = await api.verify_laporan()
+    print(f"Rollup covers {verify['hari_diperiksa']} day(s), {len(verify['selisih'])} mismatching")
+    for day in verify['selisih'][:20]:
+        print(f"  {day['tanggal']}: booking={day['booking']} rollup={day['rollup']}")
+
+    if verify['konsisten'] or not fix:
+        return verify['konsisten']
+
+    rebuilt = await api.rebuild_laporan()
+    verify = await api.verify_laporan()
+    print(f"Rebuilt rollup: {rebuilt}, consistent now: {verify['konsisten']}")
+    return verify['konsisten']
+
+
+async def archive(api, umur_hari):
+    result = await api.archive_bookings(umur_hari)
+    print(f"Archived {result['dipindahkan']} booking(s) that ended before {result['batas']}")
+    return True
+
+
+def generate_kendaraan(rng, count):
+    rows = []
+    for i in range(count):
+        kategori, merek, nama, harga = rng.choice(KATEGORI)
+        rows.append({
+            'nama': f"{merek} {nama}", 'merek': merek, 'plat_nomor': f"PB {1000 + i} {rng.choice('ABCDEFGH')}S",
+            'kategori': kategori, 'harga_harian': harga, 'harga_bulanan': harga * 25,
+            'kapasitas': 7 if kategori in ('MPV', 'SUV') else 5, 'transmisi': rng.choice(['Manual', 'Automatic']),
+            'bahan_bakar': rng.choice(['Bensin', 'Diesel']), 'deskripsi': f"{merek} {nama}, siap pakai di Sorong",
+        })
+    return rows
+
+
+def generate_booking(rng, count, vehicle_ids):
+    today = datetime.now()
+    return [{
+        'kendaraan_id': rng.choice(vehicle_ids),
+        'nama_penyewa': 'Seed Ops',
+        'no_hp': f"08{rng.randint(1100000000, 9999999999)}",
+        'tanggal_sewa': (today - timedelta(days=rng.randint(0, 365))).isoformat(),
+        'durasi': rng.randint(1, 7),
+        'dengan_sopir': rng.random() < 0.3,
+        'status': rng.choice(BOOKING_STATUSES),
+        'catatan': 'Seed ops',
+    } for _ in range(count)]
+
+
+async def import_all(import_batch, rows, batch_size):
+    results = await asyncio.gather(*(import_batch(batch) for batch in batches(rows, batch_size)))
+    ids = [row['id'] for result in results for row in result['hasil'] if row['status'] == 'ok']
+    failed = sum(result['gagal'] for result in results)
+    return ids, failed
+
+
+async def seed(api, kendaraan, booking, batch_size, rng):
+    start = datetime.now()
+    vehicle_ids, failed = await import_all(api.bulk_import_kendaraan, generate_kendaraan(rng, kendaraan), batch_size)
+    print(f"Imported {len(vehicle_ids)} vehicles ({failed} failed)")
+    if booking and not vehicle_ids:
+        print("No vehicles to book against")
+        return False
+
+    booking_ids, failed = await import_all(api.bulk_import_booking, generate_booking(rng, booking, vehicle_ids), batch_size)
+    print(f"Imported {len(booking_ids)} bookings ({failed} failed) in {(datetime.now() - start).total_seconds():.1f} s")
+    return failed == 0
+
+
+async def run(api, args):
+    if args.command == 'reconcile':
+        return await reconcile(api, args.fix)
+    if args.command == 'archive':
+        return await archive(api, args.umur_hari)
+    return await seed(api, args.kendaraan, args.booking, args.batch, random.Random(args.seed))
+
+
+async def main(args):
+    # Bulk imports are single-statement inserts of new ids; a retried batch
+    # could duplicate rows, so only connection failures are retried
+    async with RinoRentalClient(concurrency=args.concurrency, timeout=300) as api:
+        needs_admin = args.command == 'archive' or (args.command == 'reconcile' and args.fix)
+        if not needs_admin or api.session_id:
+            return await run(api, args)
+
+        username, password = os.environ.get('RINO_ADMIN_USERNAME'), os.environ.get('RINO_ADMIN_PASSWORD')
+        if not username or not password:
+            print("Set RINO_SESSION_ID, or RINO_ADMIN_USERNAME and RINO_ADMIN_PASSWORD, for this command")
+            return False
+        await api.login(username, password)
+        try:
+            return await run(api, args)
+        finally:
+            await api.logout()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rino Rental Sorong operational tasks")
+    parser.add_argument('--concurrency', type=int, default=4, help="requests in flight")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    reconcile_parser = commands.add_parser('reconcile', help="check the revenue rollup against the bookings")
+    reconcile_parser.add_argument('--fix', action='store_true', help="rebuild the rollup when it is inconsistent")
+
+    archive_parser = commands.add_parser('archive', help="move old completed bookings to booking_archive")
+    archive_parser.add_argument('--umur-hari', type=int, default=None,
+                                help="archive bookings that ended more than this many days ago (server default 365)")
+
+    seed_parser = commands.add_parser('seed', help="bulk-import generated vehicles and bookings")
+    seed_parser.add_argument('--kendaraan', type=int, default=50, help="vehicles to create")
+    seed_parser.add_argument('--booking', type=int, default=1000, help="historical bookings to create")
+    seed_parser.add_argument('--batch', type=int, default=1000, help="rows per bulk request")
+    seed_parser.add_argument('--seed', type=int, default=42, help="random seed for the generated rows")
+
+    sys.exit(0 if asyncio.run(main(parser.parse_args())) else 1)